@@ -0,0 +1,110 @@
+"""
+Measures the latency of box score requests with and without hedging (see
+services/hedging.py) against a local stand-in for the NBA Data API that answers
+most requests quickly and a few of them very slowly. Besides a plain NbaService
+it measures the daemon's setup (see scheduler.py): a CachingNbaService in
+stale-while-revalidate mode, where every lookup is past the box score's
+time-to-live like on a live tick. It answers right away with the stale box score
+and looks it up again in the background, so for it the latency is how long the
+box score takes to be refreshed.
+
+Usage (from the root of the repo):
+
+    $ python3 -m benchmarks.hedging
+"""
+
+from optparse import OptionParser
+from services.caching_nba_service import CachingNbaService
+from services.fake_nba_server import FakeNbaServer
+from services.hedging import MIN_SAMPLES, HedgingPolicy
+from services.nba_service import NbaService
+
+import logging
+import math
+import random
+import time
+
+FAST_SECONDS = 0.02
+SLOW_SECONDS = 0.3
+# The share of requests that are slow. It has to stay below 5% for the 95th
+# percentile to be a fast request.
+SLOW_RATE = 0.03
+
+
+def percentile(latencies, p):
+  latencies = sorted(latencies)
+  return latencies[math.ceil(p * len(latencies)) - 1]
+
+
+def look_up(nba_service):
+  start = time.monotonic()
+  nba_service.boxscore('20201227', '0022000036')
+  if isinstance(nba_service, CachingNbaService):
+    # Wait for the refresh in the background to replace the box score.
+    while True:
+      elapsed = time.monotonic() - start
+      if nba_service.age('boxscore', '20201227', '0022000036') <= elapsed:
+        break
+      time.sleep(0.001)
+  return time.monotonic() - start
+
+
+def measure(nba_service, calls):
+  """Returns the latency in seconds of each of calls box score lookups, after
+  enough lookups for a HedgingPolicy to start hedging."""
+  for _ in range(MIN_SAMPLES):
+    look_up(nba_service)
+  return [look_up(nba_service) for _ in range(calls)]
+
+
+def main(calls, seed):
+  rng = random.Random(seed)
+  logger = logging.getLogger('benchmark')
+  logger.setLevel(logging.WARNING)
+  with FakeNbaServer(
+      delay=lambda path:
+          SLOW_SECONDS if rng.random() < SLOW_RATE else FAST_SECONDS) as server:
+    print(f'{"service":<16}{"p50 ms":>10}{"p95 ms":>10}{"p99 ms":>10}'
+          f'{"max ms":>10}{"requests":>10}')
+    for name, service, hedging in (
+        ('plain', NbaService, None),
+        ('hedged', NbaService, HedgingPolicy(logger)),
+        ('cached', CachingNbaService, None),
+        ('cached hedged', CachingNbaService, HedgingPolicy(logger))):
+      if service is CachingNbaService:
+        nba_service = CachingNbaService(
+            logger,
+            host=server.host,
+            ttls={'boxscore': 0},
+            stale_while_revalidate=True,
+            hedging=hedging)
+      else:
+        nba_service = NbaService(logger, host=server.host, hedging=hedging)
+      before = len(server.requests)
+      latencies = measure(nba_service, calls)
+      requests = len(server.requests) - before - MIN_SAMPLES
+      nba_service.close()
+      print(f'{name:<16}'
+            + ''.join(f'{percentile(latencies, p) * 1000:>10.1f}'
+                      for p in (0.5, 0.95, 0.99, 1))
+            + f'{requests:>10}')
+
+
+if __name__ == '__main__':
+  parser = OptionParser()
+  parser.add_option(
+      '-n',
+      '--calls',
+      dest='calls',
+      type='int',
+      default=500,
+      help='How many box scores to look up with each policy.')
+  parser.add_option(
+      '-s',
+      '--seed',
+      dest='seed',
+      type='int',
+      default=0,
+      help='Seeds which requests are slow.')
+  (options, args) = parser.parse_args()
+  main(options.calls, options.seed)
@@ -0,0 +1,119 @@
+"""
+Measures how long it takes to render game thread and post game thread bodies
+and how much memory a render allocates, for each box score in services/testdata.
+
+To compare the renderer with an earlier version of it, check that version out
+next to this one and run this same script against both (from the root of the
+repo):
+
+    $ python3 -m benchmarks.rendering
+    $ git worktree add ../before <commit>
+    $ (cd ../before && PYTHONPATH=. python3 "$OLDPWD/benchmarks/rendering.py")
+    $ git worktree remove ../before
+
+It only uses GameThreadBot's _build_game_thread_text and _build_boxscore_text,
+so it runs against any version that renders the typed box score records (see
+services/models.py).
+"""
+
+from constants import UTC
+from datetime import datetime
+from game_thread_bot import GameThreadBot
+from optparse import OptionParser
+from services.fake_nba_service import FakeNbaService
+from services.models import Boxscore, team_map
+from unittest.mock import MagicMock
+
+import functools
+import glob
+import json
+import logging
+import os.path
+import time
+import timeit
+import tracemalloc
+
+FIXTURES = 'services/testdata/*_boxscore.json'
+
+
+# Times are the best of this many rounds of iterations, which hides most of the
+# noise from other processes.
+ROUNDS = 5
+
+
+class MemoizedNbaService:
+  """Looks up each feed of a FakeNbaService only once, so that renders that
+  need the rosters or players feed don't read them from disk every time."""
+
+  def __init__(self, nba_service):
+    self._nba_service = nba_service
+    self.roster = functools.lru_cache(maxsize=None)(self._roster)
+
+  def __getattr__(self, name):
+    method = functools.lru_cache(maxsize=None)(getattr(self._nba_service, name))
+    setattr(self, name, method)
+    return method
+
+  def _roster(self, team, year):
+    """Only a couple of teams have a roster in services/testdata, so every
+    roster is read from the players feed instead."""
+    team_ids = [
+        team_id for team_id, t in self.teams(year).items()
+        if t['urlName'] == team]
+    return set(
+        p['personId'] for p in self.players(year)
+        if p.get('teamId') in team_ids)
+
+
+def measure(render, iterations):
+  """Returns the mean time in microseconds and the peak memory allocated in
+  bytes of one call to render."""
+  render()
+  elapsed = min(timeit.repeat(
+      render, number=iterations, repeat=ROUNDS, timer=time.process_time))
+  elapsed = elapsed / iterations * 1e6
+
+  tracemalloc.start()
+  tracemalloc.reset_peak()
+  baseline = tracemalloc.get_traced_memory()[0]
+  render()
+  peak = tracemalloc.get_traced_memory()[1] - baseline
+  tracemalloc.stop()
+  return elapsed, peak
+
+
+def main(iterations):
+  nba_service = MemoizedNbaService(FakeNbaService())
+  teams = team_map(nba_service.teams('2020'))
+  bot = GameThreadBot(
+      logger=logging.getLogger('benchmark'),
+      nba_service=nba_service,
+      now=datetime(2021, 1, 1, 0, 0, 0, 0, UTC),
+      reddit=MagicMock(),
+      subreddit_name='NYKnicks')
+
+  print(f'{"fixture":<28}{"body":<12}{"us":>10}{"KiB":>10}')
+  for path in sorted(glob.glob(FIXTURES)):
+    with open(path, 'r') as f:
+      boxscore = Boxscore.from_json(json.loads(f.read()))
+    renders = [
+        ('game', lambda: bot._build_game_thread_text(boxscore, teams, '2020'))]
+    if boxscore.stats is not None:
+      renders.append(
+          ('post game', lambda: bot._build_boxscore_text(boxscore, teams)))
+    for name, render in renders:
+      elapsed, peak = measure(render, iterations)
+      print(f'{os.path.basename(path):<28}{name:<12}'
+            f'{elapsed:>10.1f}{peak / 1024:>10.1f}')
+
+if __name__ == '__main__':
+  parser = OptionParser()
+  parser.add_option(
+      '-n',
+      '--iterations',
+      dest='iterations',
+      type='int',
+      default=2000,
+      help='How many times to render each body.')
+  (options, args) = parser.parse_args()
+  main(options.iterations)
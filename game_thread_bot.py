@@ -11,12 +11,21 @@ from constants import CENTRAL_TIMEZONE, EASTERN_TIMEZONE, MOUNTAIN_TIMEZONE
 from constants import PACIFIC_TIMEZONE, TEAM_SUB_MAP, UTC, YAHOO_TEAM_CODES
 from datetime import datetime, timedelta
 from enum import Enum
+from game_thread_sections import GameThreadData, GameThreadState, Section
+from game_thread_sections import body, changed_sections, render
+from game_thread_sections import stale_sections
 from optparse import OptionParser
+from services.async_nba_service import AsyncNbaService
+from services.models import Boxscore, team_map
 from services.nba_service import NbaService
+from services.response_store import ResponseStore
+from services.schedule_index import ScheduleIndex
+from thread_registry import ThreadRegistry
 
-import dateutil.parser
+import asyncio
 import logging.config
 import praw
+import prawcore
 import random
 import sys
 import traceback
@@ -48,6 +57,14 @@ DEFEAT_SYNONYMS = [
 # Will ignore posts older than this many hours
 MAX_POST_AGE_HOURS = 6
 
+# How long before tip-off the game thread is posted.
+GAME_THREAD_LEAD = timedelta(hours=1)
+
+# How long before the game thread is due the bot starts preparing it: it looks
+# up (and so caches) everything the game thread needs and renders its body from
+# the preview boxscore, so that only posting it is left when it's due.
+PREGAME_LEAD = timedelta(minutes=20)
+
 
 class GameThreadBot:
 
@@ -57,175 +74,314 @@ class GameThreadBot:
       nba_service: NbaService,
       now: datetime,
       reddit: praw.Reddit,
-      subreddit_name: str):
+      subreddit_name: str,
+      thread_registry: ThreadRegistry = None,
+      state: GameThreadState = None,
+      pregame_lead: timedelta = PREGAME_LEAD):
     self.logger = logger
     self.nba_service = nba_service
     self.now = now
     self.reddit = reddit
     self.subreddit = self.reddit.subreddit(subreddit_name)
+    self.thread_registry = thread_registry
+    self.state = state
+    self.pregame_lead = pregame_lead
 
   def run(self):
     season_year = self.nba_service.current_year()
-    schedule = self.nba_service.schedule('knicks', season_year)
+    schedule = ScheduleIndex.of(
+        self.nba_service.schedule('knicks', season_year))
     (action, game) = self._get_current_game(schedule)
 
     if action == Action.DO_NOTHING:
       self.logger.info('Nothing to do. Goodbye.')
       return
+    if self._post_prepared_game_thread(action, game):
+      return
 
     boxscore = self._get_boxscore(game)
-    teams = self.nba_service.teams(season_year)
-    title, body = self._build_game_thread_text(boxscore, teams, season_year) \
-        if action == Action.DO_GAME_THREAD \
-        else self._build_postgame_thread_text(boxscore, teams)
-    self._create_or_update_game_thread(action, title, body)
+    if self._is_unchanged(action, game, boxscore):
+      return
+    teams = team_map(self.nba_service.teams(season_year))
+    if action == Action.DO_PREGAME:
+      self._prepare_game_thread(game.game_id, GameThreadData(
+          boxscore, teams, season_year,
+          self.nba_service.player_index(season_year)))
+      return
+    if action == Action.DO_GAME_THREAD:
+      self._post_game_thread(
+          game.game_id, GameThreadData(boxscore, teams, season_year))
+      return
+    title, body = self._build_postgame_thread_text(boxscore, teams)
+    self._create_or_update_game_thread(action, game.game_id, title, body)
+
+  async def run_async(self, nba_service=None):
+    """Same as run but makes independent NBA Data API calls concurrently.
+
+    Parameters
+    ----------
+    nba_service: AsyncNbaService
+      Optional service to look up NBA data with. Defaults to wrapping the
+      bot's NbaService.
+    """
+    if nba_service is not None:
+      return await self._run_async(nba_service)
+    nba_service = AsyncNbaService(self.nba_service)
+    try:
+      return await self._run_async(nba_service)
+    finally:
+      nba_service.close()
+
+  async def _run_async(self, nba_service):
+    season_year = await nba_service.current_year()
+    schedule = ScheduleIndex.of(
+        await nba_service.schedule('knicks', season_year))
+    (action, game) = self._get_current_game(schedule)
+
+    if action == Action.DO_NOTHING:
+      self.logger.info('Nothing to do. Goodbye.')
+      return
+    if self._post_prepared_game_thread(action, game):
+      return
+
+    if action == Action.DO_PREGAME:
+      boxscore, teams, player_index = await asyncio.gather(
+          nba_service.boxscore(game.start_date_eastern, game.game_id),
+          nba_service.teams(season_year),
+          nba_service.player_index(season_year))
+      self._prepare_game_thread(game.game_id, GameThreadData(
+          Boxscore.from_json(boxscore), team_map(teams), season_year,
+          player_index))
+      return
+
+    # The boxscore is looked up first because most runs during a game stop
+    # there (see _is_unchanged).
+    boxscore = Boxscore.from_json(
+        await nba_service.boxscore(game.start_date_eastern, game.game_id))
+    if self._is_unchanged(action, game, boxscore):
+      return
+    teams = team_map(await nba_service.teams(season_year))
+
+    if action == Action.DO_GAME_THREAD:
+      player_index = None
+      # The rosters are only needed if the inactive players are rendered again.
+      if (boxscore.stats is not None and 'inactive' in stale_sections(
+          GAME_THREAD_SECTIONS, boxscore, self._posted(game.game_id))):
+        player_index = await nba_service.player_index(season_year)
+      self._post_game_thread(game.game_id, GameThreadData(
+          boxscore, teams, season_year, player_index))
+      return
+    title, body = self._build_postgame_thread_text(boxscore, teams)
+    self._create_or_update_game_thread(action, game.game_id, title, body)
+
+  def _post_game_thread(self, game_id, data):
+    """Creates or updates the game thread, unless none of its sections changed
+    since the last time it was posted (see GameThreadState)."""
+    previous = self._posted(game_id)
+    sections = self._build_game_thread_sections(data, previous)
+    changed = changed_sections(previous, sections) if previous else None
+    if changed == [] and not self.state.needs_check():
+      self.logger.info('No section of the game thread changed. Not updating.')
+      self.state.remember(game_id, sections, checked=False)
+      return
+    self._create_or_update_game_thread(
+        Action.DO_GAME_THREAD,
+        game_id,
+        self._build_game_thread_title(data.boxscore, data.teams),
+        body(sections),
+        changed)
+    if self.state is not None:
+      self.state.remember(game_id, sections)
+
+  def _prepare_game_thread(self, game_id, data):
+    """Renders the body of a game thread that isn't due yet so that it can be
+    posted as soon as it is. Looking up the data it's built from also warms the
+    caches of the bot's NbaService."""
+    if self.state is None:
+      self.logger.info('Looked up the data for the game thread. Goodbye.')
+      return
+    self.state.prepare(game_id, data, self._build_game_thread_sections(data))
+    self.logger.info('Prepared the game thread. Goodbye.')
+
+  def _post_prepared_game_thread(self, action, game):
+    """Posts the body prepared before the game thread was due, without looking
+    anything up. The next run updates it like any other game thread.
+
+    Returns True if there was a prepared game thread to post."""
+    if action != Action.DO_GAME_THREAD or self.state is None:
+      return False
+    prepared = self.state.prepared(game.game_id)
+    if prepared is None or self._posted(game.game_id):
+      return False
+    data, sections = prepared
+    self._create_or_update_game_thread(
+        Action.DO_GAME_THREAD,
+        game.game_id,
+        self._build_game_thread_title(data.boxscore, data.teams),
+        body(sections))
+    self.state.remember(game.game_id, sections)
+    return True
+
+  def _is_unchanged(self, action, game, boxscore):
+    """Returns True if this is a game thread run and nothing the game thread
+    shows changed since it was last posted, in which case there's nothing else
+    to do."""
+    if (action != Action.DO_GAME_THREAD
+        or self.state is None
+        or not self.state.is_unchanged(
+            game.game_id, GAME_THREAD_SECTIONS, boxscore)):
+      return False
+    self.logger.info(
+        f'Boxscore did not change ({self.state.stats}). Goodbye.')
+    return True
+
+  def _posted(self, game_id):
+    return self.state.posted(game_id) if self.state is not None else ()
 
   def _get_boxscore(self, game):
-    game_start = game['startDateEastern']
-    game_id = game['gameId']
-    return self.nba_service.boxscore(game_start, game_id)
+    return Boxscore.from_json(
+        self.nba_service.boxscore(game.start_date_eastern, game.game_id))
 
   def _get_current_game(self, schedule):
-    """Returns the nba_data game object we want to focus on right now (or None)
-    and an enum describing what we should do with it (create a game thread or
-    post game thread or do nothing).
+    """Returns the ScheduleGame we want to focus on right now (or None) and an
+    enum describing what we should do with it (prepare or create a game thread,
+    create a post game thread or do nothing).
 
-    This implementation searches for a game that looks like it might be on the
-    same day. It relies heavily on NBA's lastStandardGamePlayedIndex field to
-    tell us  where to start looking, rather than scanning the entire schedule.
-    """
-    last_played_idx = schedule['league']['lastStandardGamePlayedIndex']
-    games = schedule['league']['standard']
-
-    # Skip preseason games. This may also end up skipping the first game of the
-    # regular season. Revisit this logic.
-    if last_played_idx == -1:
-      return Action.DO_NOTHING, None
-
-    # Check the game after lastStandardGamePlayedIndex. If we are an hour before
-    # tip-off or later and there's no score, then we want to make a game thread.
-    if len(games) > last_played_idx + 1:
-      game = games[last_played_idx + 1]
-      gametime = dateutil.parser.parse(game['startTimeUTC'])
-      has_score = bool(game['vTeam']['score']) or bool(game['hTeam']['score'])
-      if gametime - timedelta(hours=1) <= self.now and not has_score:
-        return Action.DO_GAME_THREAD, game
-
-    # If the previous game was finished 6 hours ago or less, then use that to
-    # make a post game thread.
-    game = games[last_played_idx]
-    gametime = dateutil.parser.parse(game['startTimeUTC'])
-    has_score = bool(game['vTeam']['score'] + game['hTeam']['score'])
-    if gametime + timedelta(hours=MAX_POST_AGE_HOURS) >= self.now and has_score:
-      return Action.DO_POST_GAME_THREAD, game
+    The main candidate is the last game that tips off within the next hour (or
+    already did), which is found with a binary search over the schedule. It gets
+    a game thread until it's over and then a post game thread, for up to
+    MAX_POST_AGE_HOURS after tip-off. Otherwise, the game thread of the next
+    game is prepared for up to pregame_lead before it's due. Preseason games are
+    skipped.
 
+    Parameters
+    ----------
+    schedule: ScheduleIndex
+    """
+    i = schedule.last_started(self.now + GAME_THREAD_LEAD, preseason=False)
+    if i != -1:
+      game = schedule.games[i]
+      if game.start_time + timedelta(hours=MAX_POST_AGE_HOURS) >= self.now:
+        if not game.is_final:
+          return Action.DO_GAME_THREAD, game
+        return Action.DO_POST_GAME_THREAD, game
+
+    i = schedule.next_to_start(self.now + GAME_THREAD_LEAD, preseason=False)
+    if (i is not None and schedule.games[i].start_time
+        <= self.now + GAME_THREAD_LEAD + self.pregame_lead):
+      return Action.DO_PREGAME, schedule.games[i]
     return Action.DO_NOTHING, None
 
-  def _build_game_thread_text(self, boxscore, teams, year):
+  def _build_game_thread_text(
+      self, boxscore, teams, year, player_index=None):
     """Builds the title and selftext for a game thread (not post game). This just
-    builds strings and it doesn't actually interact with Reddit.
+    builds strings and it doesn't actually interact with Reddit (but it will look
+    up the league's rosters unless player_index is given).
 
     This is heavily inspired by https://bit.ly/3hBwfmC.
     """
-    basic_game_data = boxscore['basicGameData']
-    hteam = basic_game_data['hTeam']
-    vteam = basic_game_data['vTeam']
-
-    if hteam['triCode'] == 'NYK':
-      us = 'hTeam'
-      them = 'vTeam'
-      home_away_sign = 'vs'
+    data = GameThreadData(boxscore, teams, year, player_index)
+    sections = self._build_game_thread_sections(data)
+    return self._build_game_thread_title(boxscore, teams), body(sections)
+
+  def _build_game_thread_sections(self, data, previous=()):
+    """Returns the RenderedSection of every part of a game thread's body,
+    rendering only the sections whose fingerprint differs from previous (see
+    game_thread_sections.py). Without a GameThreadState to remember them in, no
+    fingerprint is computed."""
+    return render(
+        GAME_THREAD_SECTIONS,
+        lambda section: section.build(self, data),
+        data.boxscore,
+        previous,
+        fingerprints=self.state is not None)
+
+  def _build_game_thread_title(self, boxscore, teams):
+    if boxscore.home.tricode == 'NYK':
+      us, them, home_away_sign = boxscore.home, boxscore.road, 'vs'
+    else:
+      us, them, home_away_sign = boxscore.road, boxscore.home, '@'
+    knicks_record = f'({us.win}-{us.loss})'
+    other_record = f'({them.win}-{them.loss})'
+    other_team = teams[them.team_id]
+    return (f'{GAME_THREAD_PREFIX} The New York Knicks {knicks_record} ' +
+            f'{home_away_sign} The {other_team.full_name} {other_record} - ' +
+            f'({self.now.astimezone(EASTERN_TIMEZONE).strftime("%B %d, %Y")})')
+
+  def _build_info_section(self, data):
+    boxscore = data.boxscore
+    hteam = boxscore.home
+    vteam = boxscore.road
+    broadcasters = boxscore.broadcasters
+
+    if hteam.tricode == 'NYK':
+      them = vteam
+      knicks_broadcaster = broadcasters.home
+      other_broadcaster = broadcasters.road
     else:
-      us = 'vTeam'
-      them = 'hTeam'
-      home_away_sign = '@'
+      them = hteam
+      knicks_broadcaster = broadcasters.road
+      other_broadcaster = broadcasters.home
 
-    def broadcaster_name(type):
-      if len(broadcasters[type]) == 0:
+    def broadcaster_name(name):
+      if name is None:
         return 'N/A'
-      name = broadcasters[type][0]['longName']
       if name == 'MSG':
         return f'[{name}](http://www.msggo.com)'
       return name
 
-    broadcasters = basic_game_data['watch']['broadcast']['broadcasters']
-    national_broadcaster = broadcaster_name('national')
-    knicks_broadcaster = broadcaster_name(us)
-    other_broadcaster = broadcaster_name(them)
-
-    knicks_record = f"({basic_game_data[us]['win']}-{basic_game_data[us]['loss']})"
-    other_record = f"({basic_game_data[them]['win']}-{basic_game_data[them]['loss']})"
-    other_subreddit = TEAM_SUB_MAP[teams[basic_game_data[them]['teamId']]['nickname']]
-    other_team_name = teams[basic_game_data[them]['teamId']]['fullName']
-    other_team_nickname = teams[basic_game_data[them]['teamId']]['nickname']
-    location = self._build_location_string(basic_game_data)
-    arena = basic_game_data['arena']['name']
-    start_time_utc = dateutil.parser.parse(basic_game_data['startTimeUTC'])
+    other_team = data.teams[them.team_id]
+    start_time_utc = boxscore.start_time
 
     def time_str(timezone):
       return start_time_utc.astimezone(timezone).strftime('%I:%M %p')
 
-    eastern = time_str(EASTERN_TIMEZONE)
-    central = time_str(CENTRAL_TIMEZONE)
-    mountain = time_str(MOUNTAIN_TIMEZONE)
-    pacific = time_str(PACIFIC_TIMEZONE)
-
-    urlpart = (
-        f'{vteam["triCode"].lower()}-vs-{hteam["triCode"].lower()}-'
-        f'{basic_game_data["gameId"]}')
-    nba_pass_link = f'https://www.nba.com/game/{urlpart}?watch'
-    preview_link = f'https://www.nba.com/game/{urlpart}'
-    play_link = f'https://www.nba.com/game/{urlpart}/play-by-play'
-    box_link = f'https://www.nba.com/game/{urlpart}/box-score#box-score'
-
-    body = '##### General Information\n\n'
-    body += '**TIME**|**BROADCAST**|**Media**|**Location and Subreddit**|\n'
-    body += ':------------|:------------------------------------|:------------------------------------|:-------------------|\n'
-    body += f'{eastern} Eastern   | National Broadcast: {national_broadcaster}           |[Game Preview]({preview_link})| {location}|\n'
-    body += f'{central} Central   | Knicks Broadcast: {knicks_broadcaster}               |[Play By Play]({play_link})| {arena}|\n'
-    body += f'{mountain} Mountain | {other_team_nickname} Broadcast: {other_broadcaster} |[Box Score]({box_link})| r/NYKnicks|\n'
-    body += f'{pacific} Pacific   | [NBA League Pass]({nba_pass_link})                   || r/{other_subreddit}|\n'
-
-    starters_table = self._build_starters_table(boxscore, teams)
-    if starters_table is not None:
-      body += '\n##### Starting lineups\n\n'
-      body += starters_table
-
-    inactive_table = self._build_inactive_table(boxscore, teams, year)
-    if inactive_table is not None:
-      body += '\n##### Inactive\n\n'
-      body += inactive_table
-
-    if basic_game_data['officials']['formatted']:
-      officials = ', '.join([o['firstNameLastName']
-          for o in basic_game_data['officials']['formatted']])
-      body += '\n##### Officials\n\n'
-      body += '||\n'
-      body += '|:--|\n'
-      body += f'|{officials}|\n'
-
-    linescore = self._build_linescore(boxscore, teams)
-    if linescore is not None:
-      body += '\n##### Score\n\n'
-      body += f'{linescore}\n'
-
-    body += '\n-----\n\n'
-    body += '[Reddit Stream](https://reddit-stream.com/comments/auto) '
-    body += '(You must click this link from the comment page.)\n'
-
-    title = (f'{GAME_THREAD_PREFIX} The New York Knicks {knicks_record} ' +
-             f'{home_away_sign} The {other_team_name} {other_record} - ' +
-             f'({self.now.astimezone(EASTERN_TIMEZONE).strftime("%B %d, %Y")})')
-
-    return title, body
+    game_url = (f'https://www.nba.com/game/{vteam.tricode.lower()}-vs-'
+                f'{hteam.tricode.lower()}-{boxscore.game_id}')
+    return ('##### General Information\n\n'
+            '**TIME**|**BROADCAST**|**Media**|**Location and Subreddit**|\n'
+            ':------------|:------------------------------------|:------------------------------------|:-------------------|\n'
+            f'{time_str(EASTERN_TIMEZONE)} Eastern   | National Broadcast: {broadcaster_name(broadcasters.national)}           |[Game Preview]({game_url})| {self._build_location_string(boxscore.arena)}|\n'
+            f'{time_str(CENTRAL_TIMEZONE)} Central   | Knicks Broadcast: {broadcaster_name(knicks_broadcaster)}               |[Play By Play]({game_url}/play-by-play)| {boxscore.arena.name}|\n'
+            f'{time_str(MOUNTAIN_TIMEZONE)} Mountain | {other_team.nickname} Broadcast: {broadcaster_name(other_broadcaster)} |[Box Score]({game_url}/box-score#box-score)| r/NYKnicks|\n'
+            f'{time_str(PACIFIC_TIMEZONE)} Pacific   | [NBA League Pass]({game_url}?watch)                   || r/{TEAM_SUB_MAP[other_team.nickname]}|\n')
+
+  def _build_starters_section(self, data):
+    starters_table = self._build_starters_table(data.boxscore, data.teams)
+    if starters_table is None:
+      return ''
+    return f'\n##### Starting lineups\n\n{starters_table}'
+
+  def _build_inactive_section(self, data):
+    inactive_table = self._build_inactive_table(
+        data.boxscore, data.teams, data.year, data.player_index)
+    if inactive_table is None:
+      return ''
+    return f'\n##### Inactive\n\n{inactive_table}'
+
+  def _build_officials_section(self, data):
+    if not data.boxscore.officials:
+      return ''
+    return ('\n##### Officials\n\n'
+            '||\n'
+            '|:--|\n'
+            f'|{", ".join(data.boxscore.officials)}|\n')
+
+  def _build_linescore_section(self, data):
+    linescore = self._build_linescore(data.boxscore, data.teams)
+    if linescore is None:
+      return ''
+    return f'\n##### Score\n\n{linescore}\n'
+
+  def _build_footer_section(self, data):
+    return ('\n-----\n\n'
+            '[Reddit Stream](https://reddit-stream.com/comments/auto) '
+            '(You must click this link from the comment page.)\n')
 
   @staticmethod
-  def _build_location_string(basic_game_data):
-    city = basic_game_data["arena"]["city"]
-    state = basic_game_data["arena"]["stateAbbr"]
-    location = f'{city}, {state}'
-    country = basic_game_data["arena"]["country"]
-    return location if country == 'USA' else f'{location} {country}'
+  def _build_location_string(arena):
+    location = f'{arena.city}, {arena.state}'
+    return location if arena.country == 'USA' else f'{location} {arena.country}'
 
   def _build_postgame_thread_text(self, boxscore, teams):
     title = self._build_postgame_title(boxscore, teams)
@@ -237,28 +393,25 @@ class GameThreadBot:
 
     Ported from https://bit.ly/3rOmvdd.
     """
-    basic_game_data = boxscore['basicGameData']
-    home_team = basic_game_data["hTeam"]
-    road_team = basic_game_data["vTeam"]
-    defeat = self._build_defeat_synonym(basic_game_data, teams)
-
-    home_team_score = int(home_team["score"])
-    road_team_score = int(road_team["score"])
-    score = (f'{max(road_team_score, home_team_score)}-'
-             f'{min(road_team_score, home_team_score)}')
-
-    home_team_name = teams[home_team["teamId"]]['fullName']
-    home_team_record = f'{home_team["win"]}-{home_team["loss"]}'
-    road_team_name = teams[road_team["teamId"]]['fullName']
-    road_team_record = f'{road_team["win"]}-{road_team["loss"]}'
-    if home_team_score > road_team_score:
+    home_team = boxscore.home
+    road_team = boxscore.road
+    defeat = self._build_defeat_synonym(home_team, road_team, teams)
+
+    score = (f'{max(road_team.score, home_team.score)}-'
+             f'{min(road_team.score, home_team.score)}')
+
+    home_team_name = teams[home_team.team_id].full_name
+    home_team_record = f'{home_team.win}-{home_team.loss}'
+    road_team_name = teams[road_team.team_id].full_name
+    road_team_record = f'{road_team.win}-{road_team.loss}'
+    if home_team.score > road_team.score:
       winners = f'{home_team_name} ({home_team_record})'
       losers = f'{road_team_name} ({road_team_record})'
     else:
       losers = f'{home_team_name} ({home_team_record})'
       winners = f'{road_team_name} ({road_team_record})'
 
-    quarters = len(basic_game_data['vTeam']['linescore'])
+    quarters = len(road_team.linescore)
     maybe_overtime = ''
     if quarters == 5:
       maybe_overtime = ' in OT'
@@ -269,14 +422,14 @@ class GameThreadBot:
     return f'{POST_GAME_PREFIX} {title}'
 
   @staticmethod
-  def _build_defeat_synonym(basic_game_data, teams):
+  def _build_defeat_synonym(home_team, road_team, teams):
     """Says 'defeated' in creative and random ways.
 
     Ported from https://bit.ly/3o6QvPB.
     """
-    home_team_name = teams[basic_game_data['hTeam']['teamId']]['urlName']
-    hscore = int(basic_game_data["hTeam"]["score"])
-    vscore = int(basic_game_data["vTeam"]["score"])
+    home_team_name = teams[home_team.team_id].url_name
+    hscore = home_team.score
+    vscore = road_team.score
     knicks_win = ((home_team_name == "knicks" and hscore > vscore)
         or (home_team_name != "knicks" and vscore > hscore))
     if knicks_win:
@@ -296,181 +449,83 @@ class GameThreadBot:
 
      Ported over from the Spurs bot (https://bit.ly/3n8HYdA).
     """
-    basicGameData = boxscore["basicGameData"]
-
-    # Header
-    hTeamBasicData = basicGameData["hTeam"]
-    hTeamFullName = teams[hTeamBasicData['teamId']]['fullName']
-    hTeamNickname = teams[hTeamBasicData['teamId']]['nickname']
-    hTeamLogo = TEAM_SUB_MAP[teams[basicGameData['hTeam']['teamId']]['nickname']]
-    hTeamScore = hTeamBasicData["score"]
-    vTeamBasicData = basicGameData["vTeam"]
-    vTeamFullName = teams[vTeamBasicData['teamId']]['fullName']
-    vTeamNickname = teams[vTeamBasicData['teamId']]['nickname']
-    vTeamLogo = TEAM_SUB_MAP[teams[basicGameData['vTeam']['teamId']]['nickname']]
-    vTeamScore = vTeamBasicData["score"]
-    nba_url = (f'https://www.nba.com/game/{vTeamBasicData["triCode"]}-vs-'
-              f'{hTeamBasicData["triCode"]}-{basicGameData["gameId"]}')
+    home = boxscore.home
+    home_team = teams[home.team_id]
+    road = boxscore.road
+    road_team = teams[road.team_id]
     yahoo_url = ('http://sports.yahoo.com/nba/'
-                f'{vTeamFullName.lower().replace(" ", "-")}-'
-                f'{hTeamFullName.lower().replace(" ", "-")}-'
-                f'{basicGameData["startDateEastern"]}'
-                f'{YAHOO_TEAM_CODES[hTeamBasicData["triCode"]]}')
-    start_time_est = (dateutil.parser.parse(basicGameData['startTimeUTC'])
-        .astimezone(EASTERN_TIMEZONE))
-    threadalytics_url = (f'https://threadalytics.com/teams/NYK/games/'
-                         f'{hTeamBasicData["triCode"]}@{vTeamBasicData["triCode"]}'
-                         f'-{int(start_time_est.timestamp())}')
-    arena = basicGameData["arena"]["name"]
-    attendance = basicGameData["attendance"]
-    officials = ', '.join([o["firstNameLastName"]
-                           for o in basicGameData["officials"]["formatted"]])
-    duration = (f'{basicGameData["gameDuration"]["hours"]} hours and '
-                f'{basicGameData["gameDuration"]["minutes"]} minutes')
+                f'{road_team.full_name.lower().replace(" ", "-")}-'
+                f'{home_team.full_name.lower().replace(" ", "-")}-'
+                f'{boxscore.start_date_eastern}'
+                f'{YAHOO_TEAM_CODES[home.tricode]}')
+    start_time_est = boxscore.start_time.astimezone(EASTERN_TIMEZONE)
+    attendance = boxscore.attendance
+    if attendance == '0':
+      attendance = 'No in-person attendance'
+    duration = (f'{boxscore.duration_hours} hours and '
+                f'{boxscore.duration_minutes} minutes')
     duration = duration.replace(' and 0 minutes', '')
     duration = duration.replace(' and 1 minutes', ' and 1 minute')
 
-    # Game summary
-    body = f"""##### Game Summary
-
-|||
-|:--|:--|
-|**Score**|[{vTeamFullName}](/r/{vTeamLogo}) **{vTeamScore} -  {hTeamScore}** [{hTeamFullName}](/r/{hTeamLogo})|
-|**Data**|[NBA]({nba_url}), [Yahoo]({yahoo_url}), [Threadalytics]({threadalytics_url})|
-|**Location**|{self._build_location_string(basicGameData)}|
-|**Arena**|{arena}|
-|**Attendance**|{attendance if attendance != '0' else 'No in-person attendance'}|
-|**Start Time**|{(start_time_est.strftime('%B %d, %Y %-I:%M %p %Z'))}|
-|**Game Duration**|{duration}|
-|**Officials**|{officials}|
-"""
+    # The body is grown with += rather than joined from a list of pieces: a str
+    # that nothing else refers to is resized in place, so only one copy of the
+    # body is ever alive.
+    body = ('##### Game Summary\n\n'
+            '|||\n'
+            '|:--|:--|\n'
+            f'|**Score**|[{road_team.full_name}](/r/{TEAM_SUB_MAP[road_team.nickname]}) **{road.score} -  {home.score}** [{home_team.full_name}](/r/{TEAM_SUB_MAP[home_team.nickname]})|\n'
+            f'|**Data**|[NBA](https://www.nba.com/game/{road.tricode}-vs-{home.tricode}-{boxscore.game_id}), [Yahoo]({yahoo_url}), [Threadalytics](https://threadalytics.com/teams/NYK/games/{home.tricode}@{road.tricode}-{int(start_time_est.timestamp())})|\n'
+            f'|**Location**|{self._build_location_string(boxscore.arena)}|\n'
+            f'|**Arena**|{boxscore.arena.name}|\n'
+            f'|**Attendance**|{attendance}|\n'
+            f'|**Start Time**|{start_time_est.strftime("%B %d, %Y %-I:%M %p %Z")}|\n'
+            f'|**Game Duration**|{duration}|\n'
+            f'|**Officials**|{", ".join(boxscore.officials)}|\n')
 
     # Line score
     body += '\n##### Line Score\n'
     body += f'\n{self._build_linescore(boxscore, teams)}\n'
 
     # Team stats
-    allStats = boxscore["stats"]
-    playerStats = allStats["activePlayers"]
-    body += """
-##### Team Stats
-
-|**Team**|**PTS**|**FG**|**FG%**|**3P**|**3P%**|**FT**|**FT%**|**OREB**|**TREB**|**AST**|**PF**|**STL**|**TO**|**BLK**|
-|:--|:--:|:--:|:--:|:--:|:--:|:--:|:--:|:--:|:--:|:--:|:--:|:--:|:--:|:--:|
-|{vTeamName}|{vpts}|{vfgm}-{vfga}|{vfgp}%|{vtpm}-{vtpa}|{vtpp}%|{vftm}-{vfta}|{vftp}%|{voreb}|{vtreb}|{vast}|{vpf}|{vstl}|{vto}|{vblk}|
-|{hTeamName}|{hpts}|{hfgm}-{hfga}|{hfgp}%|{htpm}-{htpa}|{htpp}%|{hftm}-{hfta}|{hftp}%|{horeb}|{htreb}|{hast}|{hpf}|{hstl}|{hto}|{hblk}|
-
-|**Team**|**Biggest Lead**|**Longest Run**|**PTS: In Paint**|**PTS: Off TOs**|**PTS: Fastbreak**|
-|:--|:--:|:--:|:--:|:--:|:--:|
-|{vTeamName}|{vlead}|{vrun}|{vpaint}|{vpto}|{vfb}|
-|{hTeamName}|{hlead}|{hrun}|{hpaint}|{hpto}|{hfb}|
-  """.format(
-      vTeamName=vTeamFullName,
-      vpts=allStats["vTeam"]["totals"]["points"],
-      vfgm=allStats["vTeam"]["totals"]["fgm"],
-      vfga=allStats["vTeam"]["totals"]["fga"],
-      vfgp=allStats["vTeam"]["totals"]["fgp"],
-      vtpm=allStats["vTeam"]["totals"]["tpm"],
-      vtpa=allStats["vTeam"]["totals"]["tpa"],
-      vtpp=allStats["vTeam"]["totals"]["tpp"],
-      vftm=allStats["vTeam"]["totals"]["ftm"],
-      vfta=allStats["vTeam"]["totals"]["fta"],
-      vftp=allStats["vTeam"]["totals"]["ftp"],
-      voreb=allStats["vTeam"]["totals"]["offReb"],
-      vtreb=allStats["vTeam"]["totals"]["totReb"],
-      vast=allStats["vTeam"]["totals"]["assists"],
-      vpf=allStats["vTeam"]["totals"]["pFouls"],
-      vstl=allStats["vTeam"]["totals"]["steals"],
-      vto=allStats["vTeam"]["totals"]["turnovers"],
-      vblk=allStats["vTeam"]["totals"]["blocks"],
-      hTeamName=hTeamFullName,
-      hpts=allStats["hTeam"]["totals"]["points"],
-      hfgm=allStats["hTeam"]["totals"]["fgm"],
-      hfga=allStats["hTeam"]["totals"]["fga"],
-      hfgp=allStats["hTeam"]["totals"]["fgp"],
-      htpm=allStats["hTeam"]["totals"]["tpm"],
-      htpa=allStats["hTeam"]["totals"]["tpa"],
-      htpp=allStats["hTeam"]["totals"]["tpp"],
-      hftm=allStats["hTeam"]["totals"]["ftm"],
-      hfta=allStats["hTeam"]["totals"]["fta"],
-      hftp=allStats["hTeam"]["totals"]["ftp"],
-      horeb=allStats["hTeam"]["totals"]["offReb"],
-      htreb=allStats["hTeam"]["totals"]["totReb"],
-      hast=allStats["hTeam"]["totals"]["assists"],
-      hpf=allStats["hTeam"]["totals"]["pFouls"],
-      hstl=allStats["hTeam"]["totals"]["steals"],
-      hto=allStats["hTeam"]["totals"]["turnovers"],
-      hblk=allStats["hTeam"]["totals"]["blocks"],
-      vlead=self._plusminus(allStats["vTeam"]["biggestLead"]),
-      vrun=allStats["vTeam"]["longestRun"],
-      vpaint=allStats["vTeam"]["pointsInPaint"],
-      vpto=allStats["vTeam"]["pointsOffTurnovers"],
-      vfb=allStats["vTeam"]["fastBreakPoints"],
-      hlead=self._plusminus(allStats["hTeam"]["biggestLead"]),
-      hrun=allStats["hTeam"]["longestRun"],
-      hpaint=allStats["hTeam"]["pointsInPaint"],
-      hpto=allStats["hTeam"]["pointsOffTurnovers"],
-      hfb=allStats["hTeam"]["fastBreakPoints"]
-    )
-
-    body += """
-##### Team Leaders
-
-|**Team**|**Points**|**Rebounds**|**Assists**|
-|:--|:--|:--|:--|
-|{vTeam}|**{vpts}** {vply1}|**{vreb}** {vply2}|**{vast}** {vply3}|
-|{hTeam}|**{hpts}** {hply1}|**{hreb}** {hply2}|**{hast}** {hply3}|
-""".format(
-      vTeam=vTeamFullName,
-      vpts=allStats["vTeam"]["leaders"]["points"]["value"],
-      vply1=allStats["vTeam"]["leaders"]["points"]["players"][0]["firstName"] + " " +
-            allStats["vTeam"]["leaders"]["points"]["players"][0]["lastName"],
-      vreb=allStats["vTeam"]["leaders"]["rebounds"]["value"],
-      vply2=allStats["vTeam"]["leaders"]["rebounds"]["players"][0]["firstName"] + " " +
-            allStats["vTeam"]["leaders"]["rebounds"]["players"][0]["lastName"],
-      vast=allStats["vTeam"]["leaders"]["assists"]["value"],
-      vply3=allStats["vTeam"]["leaders"]["assists"]["players"][0]["firstName"] + " " +
-            allStats["vTeam"]["leaders"]["assists"]["players"][0]["lastName"],
-      hTeam=hTeamFullName,
-      hpts=allStats["hTeam"]["leaders"]["points"]["value"],
-      hply1=allStats["hTeam"]["leaders"]["points"]["players"][0]["firstName"] + " " +
-            allStats["hTeam"]["leaders"]["points"]["players"][0]["lastName"],
-      hreb=allStats["hTeam"]["leaders"]["rebounds"]["value"],
-      hply2=allStats["hTeam"]["leaders"]["rebounds"]["players"][0]["firstName"] + " " +
-            allStats["hTeam"]["leaders"]["rebounds"]["players"][0]["lastName"],
-      hast=allStats["hTeam"]["leaders"]["assists"]["value"],
-      hply3=allStats["hTeam"]["leaders"]["assists"]["players"][0]["firstName"] + " " +
-            allStats["hTeam"]["leaders"]["assists"]["players"][0]["lastName"]
-    )
+    both = ((road_team, boxscore.stats.road), (home_team, boxscore.stats.home))
+    body += ('\n##### Team Stats\n\n'
+             '|**Team**|**PTS**|**FG**|**FG%**|**3P**|**3P%**|**FT**|**FT%**|**OREB**|**TREB**|**AST**|**PF**|**STL**|**TO**|**BLK**|\n'
+             '|:--|:--:|:--:|:--:|:--:|:--:|:--:|:--:|:--:|:--:|:--:|:--:|:--:|:--:|:--:|\n')
+    for team, stats in both:
+      t = stats.totals
+      body += f'|{team.full_name}|{t.points}|{t.fgm}-{t.fga}|{t.fgp}%|{t.tpm}-{t.tpa}|{t.tpp}%|{t.ftm}-{t.fta}|{t.ftp}%|{t.off_reb}|{t.tot_reb}|{t.assists}|{t.p_fouls}|{t.steals}|{t.turnovers}|{t.blocks}|\n'
+    body += ('\n'
+             '|**Team**|**Biggest Lead**|**Longest Run**|**PTS: In Paint**|**PTS: Off TOs**|**PTS: Fastbreak**|\n'
+             '|:--|:--:|:--:|:--:|:--:|:--:|\n')
+    for team, stats in both:
+      body += f'|{team.full_name}|{self._plusminus(stats.biggest_lead)}|{stats.longest_run}|{stats.points_in_paint}|{stats.points_off_turnovers}|{stats.fast_break_points}|\n'
+    body += ('  \n'
+             '##### Team Leaders\n\n'
+             '|**Team**|**Points**|**Rebounds**|**Assists**|\n'
+             '|:--|:--|:--|:--|\n')
+    for team, stats in both:
+      body += f'|{team.full_name}|**{stats.points_leader.value}** {stats.points_leader.name}|**{stats.rebounds_leader.value}** {stats.rebounds_leader.name}|**{stats.assists_leader.value}** {stats.assists_leader.name}|\n'
 
     # Player stats.
-    # Only starters have a "pos" property.
-    def build_player_stat_header(team_name: str):
-      return (f'\n**{team_name.upper()}**|**MIN**|**FGM-A**|**3PM-A**|**FTM-A**'
-              f'|**ORB**|**DRB**|**REB**|**AST**|**STL**|**BLK**|**TO**|**PF**'
-              f'|**+/-**|**PTS**|\n'
-              f'|:--|:--|:--:|:--:|:--:|:--:|:--:|:--:|:--:|:--:|:--:|:--:|'
-              f':--:|:--:|:--:|\n')
-    away_players_stat_str = build_player_stat_header(vTeamNickname)
-    home_players_stat_str = build_player_stat_header(hTeamNickname)
-    for i in range(len(playerStats)):
-      stats = playerStats[i]
-      player_name = f'{stats["firstName"]} {stats["lastName"]}'
-      position = f'^{stats["pos"]}' if stats["pos"] else ''
-      stat_str = (f'|{player_name}{position}|{stats["min"]}|'
-                  f'{stats["fgm"]}-{stats["fga"]}|{stats["tpm"]}-{stats["tpa"]}|'
-                  f'{stats["ftm"]}-{stats["fta"]}|{stats["offReb"]}|'
-                  f'{stats["defReb"]}|{stats["totReb"]}|{stats["assists"]}|'
-                  f'{stats["steals"]}|{stats["blocks"]}|{stats["turnovers"]}|'
-                  f'{stats["pFouls"]}|{self._plusminus(stats["plusMinus"])}|'
-                  f'{stats["points"]}|\n')
-      if stats["teamId"] == vTeamBasicData["teamId"]:
-        away_players_stat_str += stat_str
-      else:
-        home_players_stat_str += stat_str
     body += '\n##### Player Stats\n'
-    body += away_players_stat_str
-    body += home_players_stat_str
+    for team_id, team in ((road.team_id, road_team), (home.team_id, home_team)):
+      body += (f'\n**{team.nickname.upper()}**|**MIN**|**FGM-A**|**3PM-A**|**FTM-A**'
+               f'|**ORB**|**DRB**|**REB**|**AST**|**STL**|**BLK**|**TO**|**PF**'
+               f'|**+/-**|**PTS**|\n'
+               f'|:--|:--|:--:|:--:|:--:|:--:|:--:|:--:|:--:|:--:|:--:|:--:|'
+               f':--:|:--:|:--:|\n')
+      for stats in boxscore.stats.players:
+        if stats.team_id != team_id:
+          continue
+        # Only starters have a position.
+        position = f'^{stats.pos}' if stats.pos else ''
+        body += (f'|{stats.name}{position}|{stats.min}|'
+                 f'{stats.fgm}-{stats.fga}|{stats.tpm}-{stats.tpa}|'
+                 f'{stats.ftm}-{stats.fta}|{stats.off_reb}|'
+                 f'{stats.def_reb}|{stats.tot_reb}|{stats.assists}|'
+                 f'{stats.steals}|{stats.blocks}|{stats.turnovers}|'
+                 f'{stats.p_fouls}|{self._plusminus(stats.plus_minus)}|'
+                 f'{stats.points}|\n')
     return body
 
   def _build_linescore(self, boxscore, teams):
@@ -478,23 +533,22 @@ class GameThreadBot:
 
     Will return None if there's no data, otherwise it will always print a table
     with at least 4 quarters even if some columns are blank."""
-    basic_game_data = boxscore["basicGameData"]
-    current_period = int(basic_game_data['period']['current'])
+    current_period = boxscore.period
 
-    home_team = basic_game_data["hTeam"]
-    home_score = home_team["linescore"]
-    home_team_name = teams[home_team['teamId']]['fullName']
+    home_team = boxscore.home
+    home_score = home_team.linescore
+    home_team_name = teams[home_team.team_id].full_name
 
-    road_team = basic_game_data["vTeam"]
-    road_score = road_team["linescore"]
-    road_team_name = teams[road_team['teamId']]['fullName']
+    road_team = boxscore.road
+    road_score = road_team.linescore
+    road_team_name = teams[road_team.team_id].full_name
 
     assert len(home_score) == len(road_score)
     num_periods = len(home_score)
     if num_periods == 0:
       return None
 
-    header1 = """|**Team**|"""
+    header1 = '|**Team**|'
     header2 = '|:---|'
     home_team_line = f'|{home_team_name}|'
     road_team_line = f'|{road_team_name}|'
@@ -508,77 +562,66 @@ class GameThreadBot:
     # Totals
     header1 += '**Total**|'
     header2 += ':--:|'
-    home_team_line += f'{home_team["score"]}|'
-    road_team_line += f'{road_team["score"]}|'
+    home_team_line += f'{home_team.score}|'
+    road_team_line += f'{road_team.score}|'
 
     return f'{header1}\n{header2}\n{road_team_line}\n{home_team_line}'
 
   def _build_starters_table(self, boxscore, teams):
-    if 'stats' not in boxscore or 'activePlayers' not in boxscore['stats']:
+    if boxscore.stats is None:
       return None
-    hteamid = boxscore['basicGameData']['hTeam']['teamId']
-    vteamid = boxscore['basicGameData']['vTeam']['teamId']
+    hteamid = boxscore.home.team_id
+    vteamid = boxscore.road.team_id
     away = []
     home = []
-    for i in range(len(boxscore["stats"]["activePlayers"])):
-      stats = boxscore["stats"]["activePlayers"][i]
-      if stats["pos"]:
-        player_name = f'{stats["firstName"]} {stats["lastName"]}'
-        arr = away if stats["teamId"] == vteamid else home
-        arr.append(f'{player_name} ({stats["pos"]})')
-    result = f'{teams[vteamid]["fullName"]}|{teams[hteamid]["fullName"]}|\n'
+    for stats in boxscore.stats.players:
+      if stats.pos:
+        arr = away if stats.team_id == vteamid else home
+        arr.append(f'{stats.name} ({stats.pos})')
+    result = f'{teams[vteamid].full_name}|{teams[hteamid].full_name}|\n'
     result += ':--|:--|\n'
     for away_player, home_player in zip(away, home):
       result += f'{away_player}|{home_player}|\n'
     return result
 
-  def _build_inactive_table(self, boxscore, teams, year):
+  def _build_inactive_table(self, boxscore, teams, year, player_index=None):
     """Builds a markdown table of players on each team that are inactive.
 
     It tries to figure out who is inactive by comparing the active players in the
-    boxscore feed with the full list of players in the team's player feed."""
-    if 'stats' not in boxscore or 'activePlayers' not in boxscore['stats']:
+    boxscore feed with each team's roster in the league's PlayerIndex.
+
+    player_index is optional for callers that already fetched it."""
+    if boxscore.stats is None:
       return None
 
     # Build a lookup table of active player ids.
-    active_players = boxscore["stats"]["activePlayers"]
-    active_player_ids = set(map(lambda p: p['personId'], active_players))
-
-    hteamid = boxscore['basicGameData']['hTeam']['teamId']
-    vteamid = boxscore['basicGameData']['vTeam']['teamId']
+    active_player_ids = set(p.person_id for p in boxscore.stats.players)
 
-    # Lookup each team's roster from the NBA API.
-    hroster = self.nba_service.roster(teams[hteamid]['urlName'], year)
-    vroster = self.nba_service.roster(teams[vteamid]['urlName'], year)
+    # Every roster comes from the same (cached) players feed.
+    if player_index is None:
+      player_index = self.nba_service.player_index(year)
 
     # Figure out whose inactive by comparing the team roster to active players.
-    hteam_inactive_player_ids = set(filter(
-        lambda pid: pid not in active_player_ids, hroster))
-    vteam_inactive_player_ids = set(filter(
-        lambda pid: pid not in active_player_ids, vroster))
+    hteamid = boxscore.home.team_id
+    vteamid = boxscore.road.team_id
+    hteam_inactive_player_ids = player_index.roster(hteamid) - active_player_ids
+    vteam_inactive_player_ids = player_index.roster(vteamid) - active_player_ids
 
     # Don't do anything if there's no inactive players.
-    total_inactive = len(hteam_inactive_player_ids) + len(vteam_inactive_player_ids)
-    if total_inactive == 0:
+    if not hteam_inactive_player_ids and not vteam_inactive_player_ids:
       return None
 
     # Convert personIds to "Player Name (Position)" string.
     def player_str(player):
       pos = f' ({player["pos"].replace("-", "/")})' if player["pos"] else ''
       return f'{player["firstName"]} {player["lastName"]}{pos}'
-    hinactive = []
-    vinactive = []
-    for player in self.nba_service.players(year):
-      if player["personId"] in hteam_inactive_player_ids:
-        hinactive.append(player_str(player))
-      if player["personId"] in vteam_inactive_player_ids:
-        vinactive.append(player_str(player))
-      # Terminate loop if we've already got everything we need.
-      if len(hinactive) + len(vinactive) == total_inactive:
-        break
+    hinactive = list(map(
+        player_str, player_index.lookup(hteam_inactive_player_ids)))
+    vinactive = list(map(
+        player_str, player_index.lookup(vteam_inactive_player_ids)))
 
     # Build up the table.
-    result = f'|{teams[vteamid]["fullName"]}|{teams[hteamid]["fullName"]}|\n'
+    result = f'|{teams[vteamid].full_name}|{teams[hteamid].full_name}|\n'
     result += '|:--|:--|\n'
     for i in range(max(len(hinactive), len(vinactive))):
       hplayer = hinactive[i] if i < len(hinactive) else ''
@@ -588,68 +631,149 @@ class GameThreadBot:
 
   @staticmethod
   def _plusminus(someStat):
-    if someStat.isdigit() and int(someStat) > 0:
-      return "+" + str(someStat)
+    if someStat is None:
+      return ''
+    if someStat > 0:
+      return '+' + str(someStat)
     return str(someStat)
 
   @staticmethod
   def _points(linescore, current_period, requested_period):
-    """Returns a string for the number of points in a quarter, or '-' if the
-    quarter hasn't started yet.
+    """Returns the number of points in a quarter, or '-' if the quarter hasn't
+    started yet.
 
     Parameters
     ----------
-    linescore: object
-      NBA data object for the linescore.
+    linescore: tuple of int
+      The points a team scored in each period so far.
     current_period: int
       The period/quarter NBA says the game is currently in.
     requested_period: int
       The period the caller wants to display.
     """
-    points = linescore[(requested_period - 1)]['score'] \
+    points = linescore[(requested_period - 1)] \
       if len(linescore) > requested_period - 1 else '-'
     # Display a hyphen for quarters that haven't started yet even though they
     # report it with a score of 0. Always display overtime data if present.
-    if (points == '0'
+    if (points == 0
         and requested_period > current_period
         and current_period <= 4):
       points = '-'
     return points
 
-  def _create_or_update_game_thread(self, act, title, body):
-    thread = None
+  def _create_or_update_game_thread(
+      self, act, game_id, title, body, changed=None):
+    """
+    Parameters
+    ----------
+    changed: list of str
+      The names of the sections that changed since the body was last posted, if
+      known. The thread is then edited without comparing its text to body. If
+      the list is empty the thread is only created again if it's missing.
+    """
     username = self.reddit.user.me(False).name
-
-    # Unfortunately subreddit.search sometimes lags by as much as 2-3 minutes.
-    # This introduces a risk of spamming the sub with autogenerated posts because
-    # this algorithm will create a new thread if doesn't find an already existing
-    # one. Instead it's using subreddit.new() which seems to work better but does
-    # does return a lot of extraneous results.
     q = GAME_THREAD_PREFIX if act == Action.DO_GAME_THREAD else POST_GAME_PREFIX
-    for submission in self.subreddit.new(limit=300):
-      # Need to make sure that we don't incorrectly update an old/obsolete post.
-      created_utc = datetime.fromtimestamp(submission.created_utc, UTC)
-      is_obsolete = created_utc + timedelta(hours=MAX_POST_AGE_HOURS) < self.now
-      is_bot_post = submission.author == username
-      if submission.title.startswith(q) and is_bot_post and not is_obsolete:
-        thread = submission
-        break
+    thread = self._find_registered_thread(act, game_id, q, username)
+    if thread is None:
+      thread = self._find_thread(q, username)
 
     if thread is None:
       thread = self.subreddit.submit(title, selftext=body, send_replies=False)
       thread.mod.sticky()
       self.logger.info(f'Created a new thread with title "{thread.title}".')
-    elif thread.selftext.strip() == body.strip():
+    elif changed == [] or (
+        changed is None and thread.selftext.strip() == body.strip()):
       self.logger.info(f'Text of "{thread.title}" did not change. Not updating.')
     else:
       thread.edit(body)
-      self.logger.info(f'Updated "{thread.title}".')
+      if changed:
+        self.logger.info(f'Updated {", ".join(changed)} of "{thread.title}".')
+      else:
+        self.logger.info(f'Updated "{thread.title}".')
+
+    if self.thread_registry is not None:
+      self.thread_registry.put(game_id, act.name, thread.id)
+
+  def _find_registered_thread(self, act, game_id, q, username):
+    """Fetches the thread recorded in the registry for this game, as long as it
+    still looks like one of ours. Returns None otherwise."""
+    if self.thread_registry is None:
+      return None
+    submission_id = self.thread_registry.get(game_id, act.name)
+    if submission_id is None:
+      return None
+    try:
+      submission = self.reddit.submission(id=submission_id)
+      if self._is_current_bot_thread(submission, q, username):
+        return submission
+    except prawcore.exceptions.PrawcoreException:
+      self.logger.exception(f'Could not fetch thread {submission_id}.')
+    self.logger.info(f'Thread {submission_id} is no longer usable. Forgetting it.')
+    self.thread_registry.remove(game_id, act.name)
+    return None
+
+  def _find_thread(self, q, username):
+    # Unfortunately subreddit.search sometimes lags by as much as 2-3 minutes.
+    # This introduces a risk of spamming the sub with autogenerated posts because
+    # this algorithm will create a new thread if doesn't find an already existing
+    # one. Instead it's using subreddit.new() which seems to work better but does
+    # does return a lot of extraneous results.
+    for submission in self.subreddit.new(limit=300):
+      if self._is_current_bot_thread(submission, q, username):
+        return submission
+    return None
+
+  def _is_current_bot_thread(self, submission, q, username):
+    # Need to make sure that we don't incorrectly update an old/obsolete post.
+    created_utc = datetime.fromtimestamp(submission.created_utc, UTC)
+    is_obsolete = created_utc + timedelta(hours=MAX_POST_AGE_HOURS) < self.now
+    is_bot_post = submission.author == username
+    return submission.title.startswith(q) and is_bot_post and not is_obsolete
+
+
+# The sections of a game thread's body, in order. Each one is rendered again only
+# when its fingerprint, the boxscore fields it shows, changes. The roster part of
+# the inactive players is assumed not to change during a game.
+GAME_THREAD_SECTIONS = (
+    Section(
+        'info',
+        GameThreadBot._build_info_section,
+        lambda b: (b.game_id, b.start_time, b.arena, b.broadcasters,
+                   b.home.team_id, b.home.tricode,
+                   b.road.team_id, b.road.tricode)),
+    Section(
+        'starters',
+        GameThreadBot._build_starters_section,
+        lambda b: b.stats and tuple(
+            (p.team_id, p.first_name, p.last_name, p.pos)
+            for p in b.stats.players if p.pos)),
+    Section(
+        'inactive',
+        GameThreadBot._build_inactive_section,
+        lambda b: b.stats and (
+            b.home.team_id, b.road.team_id,
+            tuple(p.person_id for p in b.stats.players))),
+    Section(
+        'officials',
+        GameThreadBot._build_officials_section,
+        lambda b: b.officials),
+    Section(
+        'linescore',
+        GameThreadBot._build_linescore_section,
+        lambda b: (b.period, b.home.linescore, b.road.linescore,
+                   b.home.score, b.road.score)),
+    Section(
+        'footer',
+        GameThreadBot._build_footer_section,
+        lambda b: ()),
+)
 
 
 class Action(Enum):
   DO_GAME_THREAD = 1
   DO_POST_GAME_THREAD = 2
   DO_NOTHING = 3
+  DO_PREGAME = 4
 
 
 if __name__ == '__main__':
@@ -677,9 +801,10 @@ if __name__ == '__main__':
   now = datetime.now(UTC)
 
   try:
-    nba_service = NbaService(logger)
+    nba_service = NbaService(logger, store=ResponseStore())
     reddit = praw.Reddit(username, validate_on_submit=True)
-    bot = GameThreadBot(logger, nba_service, now, reddit, subreddit_name)
+    bot = GameThreadBot(
+        logger, nba_service, now, reddit, subreddit_name, ThreadRegistry())
     bot.run()
   except:
     logger.error(traceback.format_exc())
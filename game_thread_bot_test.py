@@ -2,10 +2,17 @@ from constants import UTC
 from datetime import datetime, timedelta
 from game_thread_bot import DEFEAT_SYNONYMS, GAME_THREAD_PREFIX, POST_GAME_PREFIX
 from game_thread_bot import Action, GameThreadBot
+from game_thread_sections import GameThreadState, RenderedSection
 from services.fake_nba_service import FakeNbaService
+from services.models import Boxscore, BoxscoreTeam, team_map
+from services.schedule_index import ScheduleIndex
+from thread_registry import ThreadRegistry
 from unittest.mock import MagicMock, patch
 
+import asyncio
 import logging.config
+import os.path
+import tempfile
 import unittest
 
 EXPECTED_GAMETHREAD_TEXT = """##### General Information
@@ -31,11 +38,11 @@ Elfrid Payton (PG)|Darius Garland (PG)|
 
 |New York Knicks|Cleveland Cavaliers|
 |:--|:--|
-||Matthew Dellavedova (G)|
-||Kevin Love (F/C)|
-||Isaac Okoro (F/G)|
-||Kevin Porter Jr. (G/F)|
-||Dylan Windler (G/F)|
+|Taj Gibson (F)|Matthew Dellavedova (G)|
+|Immanuel Quickley (G)|Kevin Love (F/C)|
+|Austin Rivers (G)|Isaac Okoro (F/G)|
+|Dennis Smith Jr. (G)|Kevin Porter Jr. (G/F)|
+|Obi Toppin (F)|Dylan Windler (G/F)|
 
 ##### Officials
 
@@ -154,13 +161,20 @@ class GameThreadBotTest(unittest.TestCase):
     self.mock_subreddit = MagicMock(['new', 'search', 'submit'])
     self.mock_reddit.subreddit.return_value = self.mock_subreddit
 
-  def bot(self, now: datetime):
+  def bot(self, now: datetime, thread_registry=None, state=None):
     return GameThreadBot(
         logger=self.logger,
         nba_service=self.fake_nba_service,
         now=now,
         reddit=self.mock_reddit,
-        subreddit_name='test_NYKnicks')
+        subreddit_name='test_NYKnicks',
+        thread_registry=thread_registry,
+        state=state)
+
+  def thread_registry(self):
+    tmpdir = tempfile.TemporaryDirectory()
+    self.addCleanup(tmpdir.cleanup)
+    return ThreadRegistry(os.path.join(tmpdir.name, 'threads.json'))
 
   def test_run_createGameThread(self):
     # 1 hour before tip-off.
@@ -219,10 +233,258 @@ class GameThreadBotTest(unittest.TestCase):
     self.assertEqual(shitpost.selftext, 'better shut up')
     self.assertEqual(otherthread.selftext, "it's happening!")
 
+  def test_run_registeredGameThread_updatesWithoutScanning(self):
+    # 1 hour before tip-off.
+    now = datetime(2020, 12, 29, 23, 0, 0, 0, UTC)
+    gamethread = FakeThread(
+        author='nyknicks-automod',
+        created_utc=now,
+        selftext='we did it!',
+        title=f'{GAME_THREAD_PREFIX} A classic match of Good vs. Evil',
+        id='abc123')
+    self.mock_reddit.submission = MagicMock(return_value=gamethread)
+    thread_registry = self.thread_registry()
+    thread_registry.put('0022000046', Action.DO_GAME_THREAD.name, 'abc123')
+
+    # Execute.
+    self.bot(now, thread_registry).run()
+
+    # Verify.
+    self.mock_reddit.submission.assert_called_once_with(id='abc123')
+    self.mock_subreddit.new.assert_not_called()
+    self.mock_subreddit.submit.assert_not_called()
+    self.assertEqual(gamethread.selftext, EXPECTED_GAMETHREAD_TEXT)
+
+  def test_run_staleRegisteredThread_fallsBackToScan(self):
+    # 1 hour before tip-off.
+    now = datetime(2020, 12, 29, 23, 0, 0, 0, UTC)
+    oldthread = FakeThread(
+        author='nyknicks-automod',
+        created_utc=now - timedelta(days=2),
+        selftext='old',
+        title=f'{GAME_THREAD_PREFIX} Last game',
+        id='old123')
+    gamethread = FakeThread(
+        author='nyknicks-automod',
+        created_utc=now,
+        selftext='we did it!',
+        title=f'{GAME_THREAD_PREFIX} A classic match of Good vs. Evil',
+        id='abc123')
+    self.mock_reddit.submission = MagicMock(return_value=oldthread)
+    self.mock_subreddit.new.return_value = [gamethread]
+    thread_registry = self.thread_registry()
+    thread_registry.put('0022000046', Action.DO_GAME_THREAD.name, 'old123')
+
+    # Execute.
+    self.bot(now, thread_registry).run()
+
+    # Verify.
+    self.mock_subreddit.new.assert_called_once()
+    self.mock_subreddit.submit.assert_not_called()
+    self.assertEqual(oldthread.selftext, 'old')
+    self.assertEqual(gamethread.selftext, EXPECTED_GAMETHREAD_TEXT)
+    self.assertEqual(
+        thread_registry.get('0022000046', Action.DO_GAME_THREAD.name), 'abc123')
+
+  def test_run_createGameThread_registersThread(self):
+    # 1 hour before tip-off.
+    now = datetime(2020, 12, 29, 23, 0, 0, 0, UTC)
+    self.mock_subreddit.new.return_value = []
+    self.mock_subreddit.submit.return_value = MagicMock(
+        mod=MagicMock(['sticky']), title='game thread', id='new123')
+    thread_registry = self.thread_registry()
+
+    # Execute.
+    self.bot(now, thread_registry).run()
+
+    # Verify.
+    self.assertEqual(
+        thread_registry.get('0022000046', Action.DO_GAME_THREAD.name), 'new123')
+
+  def test_runAsync_createGameThread(self):
+    # 1 hour before tip-off.
+    now = datetime(2020, 12, 29, 23, 0, 0, 0, UTC)
+    self.mock_subreddit.new.return_value = []
+    mock_submit_mod = MagicMock(['sticky'])
+    self.mock_subreddit.submit.return_value = MagicMock(
+        mod=mock_submit_mod, title='game thread')
+
+    # Execute.
+    asyncio.run(self.bot(now).run_async())
+
+    # Verify.
+    expected_title = ('[Game Thread] The New York Knicks (2-2) @ The Cleveland '
+                      'Cavaliers (3-1) - (December 29, 2020)');
+    self.mock_subreddit.submit.assert_called_once_with(
+        expected_title,
+        selftext=EXPECTED_GAMETHREAD_TEXT,
+        send_replies=False)
+    mock_submit_mod.sticky.assert_called_once()
+
+  def test_run_withState_unchangedSections_skipsReddit(self):
+    # 1 hour before tip-off.
+    now = datetime(2020, 12, 29, 23, 0, 0, 0, UTC)
+    self.mock_subreddit.new.return_value = []
+    self.mock_subreddit.submit.return_value = MagicMock(
+        mod=MagicMock(['sticky']), title='game thread')
+    state = GameThreadState()
+    self.bot(now, state=state).run()
+    self.mock_subreddit.submit.assert_called_once()
+
+    # Execute.
+    with patch.object(
+        self.fake_nba_service, 'teams',
+        wraps=self.fake_nba_service.teams) as mock_teams:
+      self.bot(now + timedelta(minutes=1), state=state).run()
+
+    # Verify.
+    mock_teams.assert_not_called()
+    self.mock_subreddit.new.assert_called_once()
+    self.mock_subreddit.submit.assert_called_once()
+    self.assertEqual(state.stats.checked, 2)
+    self.assertEqual(state.stats.skipped, 1)
+    self.assertEqual(state.stats.skip_rate, 0.5)
+
+  def test_run_withState_unchangedSections_looksUpTheThreadAgainEventually(
+      self):
+    # 1 hour before tip-off.
+    now = datetime(2020, 12, 29, 23, 0, 0, 0, UTC)
+    self.mock_subreddit.new.return_value = []
+    self.mock_subreddit.submit.return_value = MagicMock(
+        mod=MagicMock(['sticky']), title='game thread')
+    state = GameThreadState(max_unchecked_runs=2)
+    for minutes in range(3):
+      self.bot(now + timedelta(minutes=minutes), state=state).run()
+    self.mock_subreddit.new.assert_called_once()
+    self.assertEqual(state.stats.skipped, 2)
+
+    # Execute.
+    self.bot(now + timedelta(minutes=3), state=state).run()
+
+    # Verify. The thread is gone, so it's posted again.
+    self.assertEqual(self.mock_subreddit.new.call_count, 2)
+    self.assertEqual(self.mock_subreddit.submit.call_count, 2)
+    self.assertEqual(state.stats.skipped, 2)
+    self.assertFalse(state.needs_check())
+
+  def test_runAsync_withState_unchangedBoxscore_skipsTeamsLookup(self):
+    # 1 hour before tip-off.
+    now = datetime(2020, 12, 29, 23, 0, 0, 0, UTC)
+    self.mock_subreddit.new.return_value = []
+    self.mock_subreddit.submit.return_value = MagicMock(
+        mod=MagicMock(['sticky']), title='game thread')
+    state = GameThreadState()
+    asyncio.run(self.bot(now, state=state).run_async())
+
+    # Execute.
+    with patch.object(
+        self.fake_nba_service, 'teams',
+        wraps=self.fake_nba_service.teams) as mock_teams:
+      asyncio.run(self.bot(now, state=state).run_async())
+
+    # Verify.
+    mock_teams.assert_not_called()
+    self.mock_subreddit.submit.assert_called_once()
+    self.assertEqual(state.stats.skipped, 1)
+
+  def test_run_withState_changedSection_editsWithoutComparingText(self):
+    # 1 hour before tip-off.
+    now = datetime(2020, 12, 29, 23, 0, 0, 0, UTC)
+    gamethread = FakeThread(
+        author='nyknicks-automod',
+        created_utc=now,
+        selftext=EXPECTED_GAMETHREAD_TEXT,
+        title=f'{GAME_THREAD_PREFIX} A classic match of Good vs. Evil')
+    gamethread.edit = MagicMock()
+    self.mock_subreddit.new.return_value = [gamethread]
+    state = GameThreadState()
+    # Pretend the line score was different when the thread was last posted.
+    state.remember('0022000046', (
+        RenderedSection('linescore', 'earlier', '\n##### Score\n\n...\n'),))
+
+    # Execute.
+    self.bot(now, state=state).run()
+
+    # Verify.
+    gamethread.edit.assert_called_once_with(EXPECTED_GAMETHREAD_TEXT)
+    self.assertEqual(
+        [s.name for s in state.posted('0022000046')],
+        ['info', 'starters', 'inactive', 'officials', 'linescore', 'footer'])
+
+  def test_build_inactive_table_withPlayerIndex_makesNoCalls(self):
+    now = datetime(2020, 12, 29, 23, 0, 0, 0, UTC)
+    boxscore = Boxscore.from_json(
+        self.fake_nba_service.boxscore('20201229', '0022000036'))
+    teams = team_map(self.fake_nba_service.teams('2020'))
+    player_index = self.fake_nba_service.player_index('2020')
+    self.fake_nba_service = MagicMock()
+
+    # Execute.
+    table = self.bot(now)._build_inactive_table(
+        boxscore, teams, '2020', player_index)
+
+    # Verify.
+    self.assertEqual(self.fake_nba_service.mock_calls, [])
+    self.assertEqual(
+        table,
+        '|Milwaukee Bucks|New York Knicks|\n'
+        '|:--|:--|\n'
+        '||Taj Gibson (F)|\n')
+
+  def test_run_pregameThenDue_postsPreparedThreadWithoutLookups(self):
+    # 1 hour and 10 minutes before tip-off.
+    now = datetime(2020, 12, 29, 22, 50, 0, 0, UTC)
+    self.mock_subreddit.new.return_value = []
+    mock_submit_mod = MagicMock(['sticky'])
+    self.mock_subreddit.submit.return_value = MagicMock(
+        mod=mock_submit_mod, title='game thread')
+    state = GameThreadState()
+
+    # Execute.
+    self.bot(now, state=state).run()
+
+    # Verify.
+    self.mock_subreddit.submit.assert_not_called()
+    self.assertIsNotNone(state.prepared('0022000046'))
+
+    # Execute when the game thread is due.
+    with patch.multiple(
+        self.fake_nba_service,
+        boxscore=MagicMock(),
+        player_index=MagicMock(),
+        teams=MagicMock()) as mocks:
+      self.bot(now + timedelta(minutes=10), state=state).run()
+
+    # Verify.
+    for mock in mocks.values():
+      mock.assert_not_called()
+    expected_title = ('[Game Thread] The New York Knicks (2-2) @ The Cleveland '
+                      'Cavaliers (3-1) - (December 29, 2020)');
+    self.mock_subreddit.submit.assert_called_once_with(
+        expected_title,
+        selftext=EXPECTED_GAMETHREAD_TEXT,
+        send_replies=False)
+    mock_submit_mod.sticky.assert_called_once()
+    self.assertEqual(len(state.posted('0022000046')), 6)
+
+  def test_runAsync_pregame_preparesThread(self):
+    # 1 hour and 10 minutes before tip-off.
+    now = datetime(2020, 12, 29, 22, 50, 0, 0, UTC)
+    state = GameThreadState()
+
+    # Execute.
+    asyncio.run(self.bot(now, state=state).run_async())
+
+    # Verify.
+    self.mock_subreddit.submit.assert_not_called()
+    _, sections = state.prepared('0022000046')
+    self.assertEqual(
+        ''.join(s.text for s in sections), EXPECTED_GAMETHREAD_TEXT)
+
   @patch('random.choice')
   def test_run_createPostGameThread(self, mock_random):
     # 3.5 hours after tip-off.
-    now = datetime(2020, 12, 27, 3, 0, 0, 0, UTC)
+    now = datetime(2020, 12, 28, 4, 0, 0, 0, UTC)
 
     mock_random.return_value = 'defeat'
 
@@ -251,7 +513,7 @@ class GameThreadBotTest(unittest.TestCase):
   @patch('random.choice')
   def test_run_updatePostGameThread(self, mock_random):
     # 3.5 hours after tip-off.
-    now = datetime(2020, 12, 27, 3, 0, 0, 0, UTC)
+    now = datetime(2020, 12, 28, 4, 0, 0, 0, UTC)
 
     mock_random.return_value = 'defeat'
 
@@ -285,7 +547,7 @@ class GameThreadBotTest(unittest.TestCase):
   @patch('random.choice')
   def test_run_withObsoletePost_createNewPostGameThread(self, mock_random):
     # 3.5 hours after tip-off.
-    now = datetime(2020, 12, 27, 3, 0, 0, 0, UTC)
+    now = datetime(2020, 12, 28, 4, 0, 0, 0, UTC)
     mock_random.return_value = 'defeat'
     shitpost = FakeThread(
         author='macdoogles',
@@ -324,12 +586,11 @@ class GameThreadBotTest(unittest.TestCase):
   def test_build_defeat_synonym_winAtHomeBy50(self, mock_random):
     now = datetime(2020, 12, 27, 3, 0, 0, 0, UTC)
     mock_random.return_value = 'defeat'
-    teams = self.fake_nba_service.teams('2020')
-    basic_game_data = {
-      'hTeam': {'teamId': KNICKS_ID, 'score': '50'},
-      'vTeam': {'teamId': '1610612743', 'score': '0'},
-    }
-    defeat_synonym = self.bot(now)._build_defeat_synonym(basic_game_data, teams)
+    teams = team_map(self.fake_nba_service.teams('2020'))
+    home_team = self.boxscore_team(KNICKS_ID, 50)
+    road_team = self.boxscore_team('1610612743', 0)
+    defeat_synonym = self.bot(now)._build_defeat_synonym(
+        home_team, road_team, teams)
     mock_random.assert_called_once_with(DEFEAT_SYNONYMS[9:14])
     self.assertEqual(defeat_synonym, 'defeat')
 
@@ -337,12 +598,11 @@ class GameThreadBotTest(unittest.TestCase):
   def test_build_defeat_synonym_winOnTheRoadBy25(self, mock_random):
     now = datetime(2020, 12, 27, 3, 0, 0, 0, UTC)
     mock_random.return_value = 'defeat'
-    teams = self.fake_nba_service.teams('2020')
-    basic_game_data = {
-      'hTeam': {'teamId': '1610612743', 'score': '0'},
-      'vTeam': {'teamId': KNICKS_ID, 'score': '25'},
-    }
-    defeat_synonym = self.bot(now)._build_defeat_synonym(basic_game_data, teams)
+    teams = team_map(self.fake_nba_service.teams('2020'))
+    home_team = self.boxscore_team('1610612743', 0)
+    road_team = self.boxscore_team(KNICKS_ID, 25)
+    defeat_synonym = self.bot(now)._build_defeat_synonym(
+        home_team, road_team, teams)
     mock_random.assert_called_once_with(DEFEAT_SYNONYMS[3:9])
     self.assertEqual(defeat_synonym, 'defeat')
 
@@ -350,12 +610,11 @@ class GameThreadBotTest(unittest.TestCase):
   def test_build_defeat_synonym_winAtHomeBy10(self, mock_random):
     now = datetime(2020, 12, 27, 3, 0, 0, 0, UTC)
     mock_random.return_value = 'defeat'
-    teams = self.fake_nba_service.teams('2020')
-    basic_game_data = {
-      'hTeam': {'teamId': KNICKS_ID, 'score': '10'},
-      'vTeam': {'teamId': '1610612743', 'score': '0'},
-    }
-    defeat_synonym = self.bot(now)._build_defeat_synonym(basic_game_data, teams)
+    teams = team_map(self.fake_nba_service.teams('2020'))
+    home_team = self.boxscore_team(KNICKS_ID, 10)
+    road_team = self.boxscore_team('1610612743', 0)
+    defeat_synonym = self.bot(now)._build_defeat_synonym(
+        home_team, road_team, teams)
     mock_random.assert_called_once_with(DEFEAT_SYNONYMS[:3])
     self.assertEqual(defeat_synonym, 'defeat')
 
@@ -363,12 +622,11 @@ class GameThreadBotTest(unittest.TestCase):
   def test_build_defeat_synonym_winOnTheRoadBy5(self, mock_random):
     now = datetime(2020, 12, 27, 3, 0, 0, 0, UTC)
     mock_random.return_value = 'defeat'
-    teams = self.fake_nba_service.teams('2020')
-    basic_game_data = {
-      'hTeam': {'teamId': '1610612743', 'score': '0'},
-      'vTeam': {'teamId': KNICKS_ID, 'score': '5'},
-    }
-    defeat_synonym = self.bot(now)._build_defeat_synonym(basic_game_data, teams)
+    teams = team_map(self.fake_nba_service.teams('2020'))
+    home_team = self.boxscore_team('1610612743', 0)
+    road_team = self.boxscore_team(KNICKS_ID, 5)
+    defeat_synonym = self.bot(now)._build_defeat_synonym(
+        home_team, road_team, teams)
     mock_random.assert_called_once_with(DEFEAT_SYNONYMS[15:])
     self.assertEqual(defeat_synonym, 'defeat')
 
@@ -376,12 +634,11 @@ class GameThreadBotTest(unittest.TestCase):
   def test_build_defeat_synonym_winAtHomeBy2(self, mock_random):
     now = datetime(2020, 12, 27, 3, 0, 0, 0, UTC)
     mock_random.return_value = 'defeat'
-    teams = self.fake_nba_service.teams('2020')
-    basic_game_data = {
-      'hTeam': {'teamId': KNICKS_ID, 'score': '2'},
-      'vTeam': {'teamId': NUGGETS_ID, 'score': '0'},
-    }
-    defeat_synonym = self.bot(now)._build_defeat_synonym(basic_game_data, teams)
+    teams = team_map(self.fake_nba_service.teams('2020'))
+    home_team = self.boxscore_team(KNICKS_ID, 2)
+    road_team = self.boxscore_team(NUGGETS_ID, 0)
+    defeat_synonym = self.bot(now)._build_defeat_synonym(
+        home_team, road_team, teams)
     mock_random.assert_called_once_with(DEFEAT_SYNONYMS[14:16])
     self.assertEqual(defeat_synonym, 'defeat')
 
@@ -389,12 +646,11 @@ class GameThreadBotTest(unittest.TestCase):
   def test_build_defeat_synonym_knicksLose(self, mock_random):
     now = datetime(2020, 12, 27, 3, 0, 0, 0, UTC)
     mock_random.return_value = 'defeat'
-    teams = self.fake_nba_service.teams('2020')
-    basic_game_data = {
-      'hTeam': {'teamId': KNICKS_ID, 'score': '0'},
-      'vTeam': {'teamId': NUGGETS_ID, 'score': '5'},
-    }
-    defeat_synonym = self.bot(now)._build_defeat_synonym(basic_game_data, teams)
+    teams = team_map(self.fake_nba_service.teams('2020'))
+    home_team = self.boxscore_team(KNICKS_ID, 0)
+    road_team = self.boxscore_team(NUGGETS_ID, 5)
+    defeat_synonym = self.bot(now)._build_defeat_synonym(
+        home_team, road_team, teams)
     mock_random.assert_called_once_with(DEFEAT_SYNONYMS[:2])
     self.assertEqual(defeat_synonym, 'defeat')
 
@@ -410,43 +666,66 @@ class GameThreadBotTest(unittest.TestCase):
     # Previous game (20201227/MILNYK) started at 2020-12-28T00:30:00.000Z.
     # Next game (20201229/NYKCLE) starts at 2020-12-30T00:00:00.000Z.
     now = datetime(2020, 12, 29, 12, 0, 0, 0, UTC)
-    schedule = self.fake_nba_service.schedule('knicks', '2020')
+    schedule = ScheduleIndex.of(
+        self.fake_nba_service.schedule('knicks', '2020'))
     (action, game) = self.bot(now)._get_current_game(schedule)
     self.assertIsNone(game)
     self.assertEqual(action, Action.DO_NOTHING)
 
+  def test_get_current_game_beforePregame_doNothing(self):
+    # Next game (20201229/NYKCLE) starts at 2020-12-30T00:00:00.000Z.
+    now = datetime(2020, 12, 29, 22, 39, 0, 0, UTC)
+    schedule = ScheduleIndex.of(
+        self.fake_nba_service.schedule('knicks', '2020'))
+    (action, game) = self.bot(now)._get_current_game(schedule)
+    self.assertIsNone(game)
+    self.assertEqual(action, Action.DO_NOTHING)
+
+  def test_get_current_game_pregame_doPregame(self):
+    # Next game (20201229/NYKCLE) starts at 2020-12-30T00:00:00.000Z.
+    now = datetime(2020, 12, 29, 22, 40, 0, 0, UTC)
+    schedule = ScheduleIndex.of(
+        self.fake_nba_service.schedule('knicks', '2020'))
+    (action, game) = self.bot(now)._get_current_game(schedule)
+    self.assertEqual(action, Action.DO_PREGAME)
+    self.assertEqual(game.game_url_code, '20201229/NYKCLE')
+
   def test_get_current_game_1HourBefore_doGameThread(self):
     # Previous game (20201227/MILNYK) started at 2020-12-28T00:30:00.000Z.
     # Next game (20201229/NYKCLE) starts at 2020-12-30T00:00:00.000Z.
     now = datetime(2020, 12, 29, 23, 0, 0, 0, UTC)
-    schedule = self.fake_nba_service.schedule('knicks', '2020')
+    schedule = ScheduleIndex.of(
+        self.fake_nba_service.schedule('knicks', '2020'))
     (action, game) = self.bot(now)._get_current_game(schedule)
     self.assertEqual(action, Action.DO_GAME_THREAD)
-    self.assertEqual(game['gameUrlCode'], '20201229/NYKCLE')
+    self.assertEqual(game.game_url_code, '20201229/NYKCLE')
 
   def test_get_current_game_gameStarted_doGameThread(self):
     # Previous game (20201227/MILNYK) started at 2020-12-28T00:30:00.000Z.
     # Next game (20201229/NYKCLE) starts at 2020-12-30T00:00:00.000Z.
     now = datetime(2020, 12, 30, 1, 0, 0, 0, UTC)
-    schedule = self.fake_nba_service.schedule('knicks', '2020')
+    schedule = ScheduleIndex.of(
+        self.fake_nba_service.schedule('knicks', '2020'))
     (action, game) = self.bot(now)._get_current_game(schedule)
     self.assertEqual(action, Action.DO_GAME_THREAD)
-    self.assertEqual(game['gameUrlCode'], '20201229/NYKCLE')
+    self.assertEqual(game.game_url_code, '20201229/NYKCLE')
 
   def test_get_current_game_afterGame_postGameThread(self):
     # Previous game (20201227/MILNYK) started at 2020-12-28T00:30:00.000Z.
     # Next game (20201229/NYKCLE) starts at 2020-12-30T00:00:00.000Z.
-    now = datetime(2020, 12, 27, 3, 0, 0, 0, UTC)
-    schedule = self.fake_nba_service.schedule('knicks', '2020')
+    now = datetime(2020, 12, 28, 3, 0, 0, 0, UTC)
+    schedule = ScheduleIndex.of(
+        self.fake_nba_service.schedule('knicks', '2020'))
     (action, game) = self.bot(now)._get_current_game(schedule)
     self.assertEqual(action, Action.DO_POST_GAME_THREAD)
-    self.assertEqual(game['gameUrlCode'], '20201227/MILNYK')
+    self.assertEqual(game.game_url_code, '20201227/MILNYK')
 
   def test_get_current_game_tooLate_doNothing(self):
     # Previous game (20201227/MILNYK) started at 2020-12-28T00:30:00.000Z.
     # Next game (20201229/NYKCLE) starts at 2020-12-30T00:00:00.000Z.
     now = datetime(2020, 12, 28, 7, 0, 0, 0, UTC)
-    schedule = self.fake_nba_service.schedule('knicks', '2020')
+    schedule = ScheduleIndex.of(
+        self.fake_nba_service.schedule('knicks', '2020'))
     (action, game) = self.bot(now)._get_current_game(schedule)
     self.assertEqual(action, Action.DO_NOTHING)
     self.assertIsNone(game)
@@ -458,21 +737,52 @@ class GameThreadBotTest(unittest.TestCase):
         "lastStandardGamePlayedIndex": 0,
         "standard": [
           {
+            'gameId': '0022000049',
             'gameUrlCode': '20201231/NYKTOR',
+            'seasonStageId': 2,
+            'startDateEastern': '20201231',
             'startTimeUTC': '2021-01-01T00:30:00.000Z',
             'statusNum': 3,
-            'vTeam': {'score': '83'},
-            'hTeam': {'score': '100'},
+            'isHomeTeam': False,
+            'vTeam': {'teamId': KNICKS_ID, 'score': '83'},
+            'hTeam': {'teamId': '1610612761', 'score': '100'},
           },
         ],
       }
     }
-    (action, game) = self.bot(now)._get_current_game(schedule)
+    (action, game) = self.bot(now)._get_current_game(
+        ScheduleIndex.of(schedule))
     self.assertEqual(action, Action.DO_NOTHING)
     self.assertIsNone(game)
 
+  def test_get_current_game_seasonOpener_doGameThread(self):
+    now = datetime(2020, 12, 23, 23, 30, 0, 0, UTC)
+    schedule = {
+      "league": {
+        # The upstream index isn't used. It's -1 until the opener is over.
+        "lastStandardGamePlayedIndex": -1,
+        "standard": [
+          {
+            'gameId': '0022000010',
+            'gameUrlCode': '20201223/NYKIND',
+            'seasonStageId': 2,
+            'startDateEastern': '20201223',
+            'startTimeUTC': '2020-12-24T00:00:00.000Z',
+            'statusNum': 1,
+            'isHomeTeam': False,
+            'vTeam': {'teamId': KNICKS_ID, 'score': ''},
+            'hTeam': {'teamId': '1610612754', 'score': ''},
+          },
+        ],
+      }
+    }
+    (action, game) = self.bot(now)._get_current_game(
+        ScheduleIndex.of(schedule))
+    self.assertEqual(action, Action.DO_GAME_THREAD)
+    self.assertEqual(game.game_url_code, '20201223/NYKIND')
+
   def test_build_linescore_withNoData_returnNone(self):
-    teams = self.fake_nba_service.teams('2020')
+    teams = team_map(self.fake_nba_service.teams('2020'))
     now = datetime(2020, 12, 27, 3, 0, 0, 0, UTC)
 
     # Read a real boxscore response and modify it for our test case.
@@ -480,12 +790,13 @@ class GameThreadBotTest(unittest.TestCase):
     boxscore['basicGameData']['vTeam']['linescore'] = []
     boxscore['basicGameData']['hTeam']['linescore'] = []
 
-    linescore = self.bot(now)._build_linescore(boxscore, teams)
+    linescore = self.bot(now)._build_linescore(
+        Boxscore.from_json(boxscore), teams)
 
     self.assertIsNone(linescore)
 
   def test_build_linescore_withOneQuarter(self):
-    teams = self.fake_nba_service.teams('2020')
+    teams = team_map(self.fake_nba_service.teams('2020'))
     now = datetime(2020, 12, 27, 3, 0, 0, 0, UTC)
 
     # Read a real boxscore response and modify it for our test case.
@@ -493,7 +804,8 @@ class GameThreadBotTest(unittest.TestCase):
     boxscore = self.update_boxscore(boxscore, [27, 0, 0, 0], [30, 0, 0, 0], 1)
 
     # Execute
-    linescore = self.bot(now)._build_linescore(boxscore, teams)
+    linescore = self.bot(now)._build_linescore(
+        Boxscore.from_json(boxscore), teams)
 
     self.assertEqual(
         linescore,
@@ -503,7 +815,7 @@ class GameThreadBotTest(unittest.TestCase):
          '|New York Knicks|30|-|-|-|30|'))
 
   def test_build_linescore_withTwoQuarters(self):
-    teams = self.fake_nba_service.teams('2020')
+    teams = team_map(self.fake_nba_service.teams('2020'))
     now = datetime(2020, 12, 27, 3, 0, 0, 0, UTC)
 
     # Read a real boxscore response and modify it for our test case.
@@ -511,7 +823,8 @@ class GameThreadBotTest(unittest.TestCase):
     boxscore = self.update_boxscore(boxscore, [27, 18, 0, 0], [30, 31, 0, 0], 2)
 
     # Execute
-    linescore = self.bot(now)._build_linescore(boxscore, teams)
+    linescore = self.bot(now)._build_linescore(
+        Boxscore.from_json(boxscore), teams)
 
     self.assertEqual(
         linescore,
@@ -521,7 +834,7 @@ class GameThreadBotTest(unittest.TestCase):
          '|New York Knicks|30|31|-|-|61|'))
 
   def test_build_linescore_withThreeQuarters(self):
-    teams = self.fake_nba_service.teams('2020')
+    teams = team_map(self.fake_nba_service.teams('2020'))
     now = datetime(2020, 12, 27, 3, 0, 0, 0, UTC)
 
     # Read a real boxscore response and modify it for our test case.
@@ -530,7 +843,8 @@ class GameThreadBotTest(unittest.TestCase):
       boxscore, [27, 18, 30, 0], [30, 31, 35, 0], 3)
 
     # Execute
-    linescore = self.bot(now)._build_linescore(boxscore, teams)
+    linescore = self.bot(now)._build_linescore(
+        Boxscore.from_json(boxscore), teams)
 
     self.assertEqual(
         linescore,
@@ -540,7 +854,7 @@ class GameThreadBotTest(unittest.TestCase):
          '|New York Knicks|30|31|35|-|96|'))
 
   def test_build_linescore_withOneOvertime(self):
-    teams = self.fake_nba_service.teams('2020')
+    teams = team_map(self.fake_nba_service.teams('2020'))
     now = datetime(2020, 12, 27, 3, 0, 0, 0, UTC)
 
     # Read a real boxscore response and modify it for our test case.
@@ -552,7 +866,8 @@ class GameThreadBotTest(unittest.TestCase):
         period=4)  # I don't actually know what this value will be for OT.
 
     # Execute
-    linescore = self.bot(now)._build_linescore(boxscore, teams)
+    linescore = self.bot(now)._build_linescore(
+        Boxscore.from_json(boxscore), teams)
 
     self.assertEqual(
         linescore,
@@ -562,7 +877,7 @@ class GameThreadBotTest(unittest.TestCase):
          '|New York Knicks|30|31|35|19|16|131|'))
 
   def test_build_linescore_withTwoOvertimes(self):
-    teams = self.fake_nba_service.teams('2020')
+    teams = team_map(self.fake_nba_service.teams('2020'))
     now = datetime(2020, 12, 27, 3, 0, 0, 0, UTC)
 
     # Read a real boxscore response and modify it for our test case.
@@ -574,7 +889,8 @@ class GameThreadBotTest(unittest.TestCase):
         period=4)
 
     # Execute
-    linescore = self.bot(now)._build_linescore(boxscore, teams)
+    linescore = self.bot(now)._build_linescore(
+        Boxscore.from_json(boxscore), teams)
 
     self.assertEqual(
         linescore,
@@ -583,6 +899,11 @@ class GameThreadBotTest(unittest.TestCase):
          '|Milwaukee Bucks|27|18|30|40|15|10|140|\n'
          '|New York Knicks|30|31|35|19|15|13|143|'))
 
+  @staticmethod
+  def boxscore_team(team_id, score):
+    return BoxscoreTeam(
+        team_id=team_id, tricode='', win=0, loss=0, score=score, linescore=())
+
   @staticmethod
   def update_boxscore(boxscore, home_scores, road_scores, period):
     def score(scores):
@@ -596,7 +917,9 @@ class GameThreadBotTest(unittest.TestCase):
 
 
 class FakeThread:
-  def __init__(self, author, created_utc: datetime, selftext='', title=''):
+  def __init__(
+      self, author, created_utc: datetime, selftext='', title='', id='thread'):
+    self.id = id
     self.author = author
     self.created_utc = created_utc.timestamp()
     self.selftext = selftext
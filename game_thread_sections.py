@@ -0,0 +1,223 @@
+"""
+Splits the body of a game thread into named sections so that a run during a
+live game only renders the sections whose data changed and knows whether the
+thread needs an edit without fetching it and comparing its text.
+
+Every section declares a fingerprint: a function of the Boxscore that returns
+the fields its text is built from, i.e., the period and the points per period
+for the line score. A section whose fingerprint is the same as on the last run
+reuses the text it had then. The sections that were rendered again are the ones
+that moved, and if none of them did there's nothing to post.
+
+Together the fingerprints are a digest of everything the game thread shows, so
+a run during a timeout or halftime, when none of them changed, can stop right
+after looking up the boxscore (see GameThreadState.is_unchanged).
+"""
+
+from typing import Any, Callable, NamedTuple
+
+import threading
+
+# Never equal to a fingerprint.
+_MISSING = object()
+
+# How many runs in a row can skip reddit before the game thread is looked up
+# again to make sure it's still there (i.e., that a moderator didn't remove it).
+# A live game is polled every 20 seconds, so that's about every 5 minutes.
+MAX_UNCHECKED_RUNS = 15
+
+
+class Section(NamedTuple):
+  # A short name for logs, i.e., linescore.
+  name: str
+  # Called with the bot and GameThreadData. Returns the section's text, which is
+  # empty if there's nothing to show yet.
+  build: Callable
+  # Called with the Boxscore. Returns a hashable value that changes whenever the
+  # text of the section would.
+  fingerprint: Callable
+
+
+class GameThreadData(NamedTuple):
+  """Everything the sections of a game thread are built from."""
+  boxscore: Any
+  teams: dict
+  year: str
+  # The league's PlayerIndex, or None to look it up when the inactive players
+  # are rendered.
+  player_index: Any = None
+
+
+class RenderedSection(NamedTuple):
+  name: str
+  fingerprint: Any
+  text: str
+
+
+def stale_sections(sections, boxscore, previous=()):
+  """Returns the names of the sections that render would build again.
+
+  Parameters
+  ----------
+  sections: list of Section
+  boxscore: Boxscore
+  previous: tuple of RenderedSection
+    The sections of the body from an earlier run.
+  """
+  fingerprints = {s.name: s.fingerprint for s in previous}
+  return [s.name for s in sections
+          if fingerprints.get(s.name, _MISSING) != s.fingerprint(boxscore)]
+
+
+def render(sections, build, boxscore, previous=(), fingerprints=True):
+  """Returns a RenderedSection for every section, in order, reusing the text of
+  the previous sections with the same fingerprint.
+
+  Parameters
+  ----------
+  sections: list of Section
+  build: function
+    Called with a Section. Returns its text.
+  boxscore: Boxscore
+  previous: tuple of RenderedSection
+    The sections of the body from an earlier run.
+  fingerprints: bool
+    Whether to compute the fingerprint of every section. Without them nothing
+    can be reused by a later run and every RenderedSection's fingerprint is
+    None.
+  """
+  if not fingerprints:
+    return tuple([
+        RenderedSection(section.name, None, build(section))
+        for section in sections])
+  earlier = {s.name: s for s in previous}
+  rendered = []
+  for section in sections:
+    fingerprint = section.fingerprint(boxscore)
+    before = earlier.get(section.name)
+    if before is not None and before.fingerprint == fingerprint:
+      rendered.append(before)
+    else:
+      rendered.append(
+          RenderedSection(section.name, fingerprint, build(section)))
+  return tuple(rendered)
+
+
+def changed_sections(previous, current):
+  """Returns the names of the sections in current whose text differs from (or
+  is missing in) previous. Only the sections that were rendered again are
+  compared."""
+  earlier = {s.name: s for s in previous}
+  changed = []
+  for section in current:
+    before = earlier.pop(section.name, None)
+    if before is section:
+      continue
+    if before is None or before.text != section.text:
+      changed.append(section.name)
+  # Sections that were dropped.
+  changed.extend(earlier)
+  return changed
+
+
+def body(sections):
+  return ''.join([s.text for s in sections])
+
+
+class ChangeStats:
+  """Counts the runs that checked the boxscore for changes and the ones that
+  were skipped because nothing had changed."""
+
+  def __init__(self):
+    self.checked = 0
+    self.skipped = 0
+
+  @property
+  def skip_rate(self):
+    return self.skipped / self.checked if self.checked else 0.0
+
+  def __repr__(self):
+    return (f'checked={self.checked} skipped={self.skipped} '
+            f'skip_rate={self.skip_rate:.2f}')
+
+
+class GameThreadState:
+  """Remembers the sections of the last game thread body that is known to be
+  on reddit, and the body prepared for the next game thread before it's due.
+
+  The state is only kept in memory, to be shared by the runs of a long-lived
+  process (see scheduler.py). A new process renders every section once and
+  compares the thread's text like before."""
+
+  def __init__(self, max_unchecked_runs=MAX_UNCHECKED_RUNS):
+    """
+    Parameters
+    ----------
+    max_unchecked_runs: int
+      How many runs in a row can skip reddit before the game thread has to be
+      looked up again.
+    """
+    self.max_unchecked_runs = max_unchecked_runs
+    self._lock = threading.Lock()
+    self._game_id = None
+    self._sections = ()
+    # The runs since the game thread was last looked up on reddit.
+    self._unchecked_runs = 0
+    # (game_id, GameThreadData, sections) of a game thread that isn't due yet.
+    self._prepared = None
+    self.stats = ChangeStats()
+
+  def is_unchanged(self, game_id, sections, boxscore):
+    """Returns True if the game thread of game_id was posted, none of the
+    fingerprints of sections changed since and the thread doesn't need to be
+    looked up again (see needs_check). Every call is counted in stats.
+
+    Parameters
+    ----------
+    game_id: str
+    sections: list of Section
+    boxscore: Boxscore
+    """
+    posted = self.posted(game_id)
+    unchanged = (
+        len(posted) > 0
+        and not self.needs_check()
+        and not stale_sections(sections, boxscore, posted))
+    with self._lock:
+      self.stats.checked += 1
+      if unchanged:
+        self.stats.skipped += 1
+        self._unchecked_runs += 1
+    return unchanged
+
+  def needs_check(self):
+    """Returns True if enough runs in a row skipped reddit that the game thread
+    should be looked up again."""
+    with self._lock:
+      return self._unchecked_runs >= self.max_unchecked_runs
+
+  def posted(self, game_id):
+    """Returns the tuple of RenderedSection posted for a game, or an empty
+    tuple."""
+    with self._lock:
+      return self._sections if self._game_id == game_id else ()
+
+  def prepared(self, game_id):
+    """Returns the (GameThreadData, tuple of RenderedSection) prepared for a
+    game, or None."""
+    with self._lock:
+      if self._prepared is None or self._prepared[0] != game_id:
+        return None
+      return self._prepared[1:]
+
+  def prepare(self, game_id, data, sections):
+    with self._lock:
+      self._prepared = (game_id, data, tuple(sections))
+
+  def remember(self, game_id, sections, checked=True):
+    """Remembers the sections of the game thread of game_id. checked says
+    whether the thread was looked up on reddit on this run."""
+    with self._lock:
+      self._game_id = game_id
+      self._sections = tuple(sections)
+      self._unchecked_runs = 0 if checked else self._unchecked_runs + 1
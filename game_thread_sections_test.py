@@ -0,0 +1,112 @@
+from game_thread_sections import (
+    GameThreadState, RenderedSection, Section, body, changed_sections, render,
+    stale_sections)
+
+import unittest
+
+
+class GameThreadSectionsTest(unittest.TestCase):
+
+  def setUp(self):
+    self.builds = []
+    # The "boxscore" is a dict of fields here.
+    self.sections = [
+        Section('period', None, lambda b: b['period']),
+        Section('score', None, lambda b: (b['home'], b['road'])),
+    ]
+
+  def build(self, boxscore):
+    def build(section):
+      self.builds.append(section.name)
+      return f'{section.name} {section.fingerprint(boxscore)}\n'
+    return build
+
+  def render(self, boxscore, previous=()):
+    return render(self.sections, self.build(boxscore), boxscore, previous)
+
+  def test_render_firstRun_buildsEverySection(self):
+    boxscore = {'period': 1, 'home': 2, 'road': 0}
+    sections = self.render(boxscore)
+    self.assertEqual(self.builds, ['period', 'score'])
+    self.assertEqual(body(sections), 'period 1\nscore (2, 0)\n')
+    self.assertEqual(changed_sections((), sections), ['period', 'score'])
+
+  def test_render_reusesSectionsWithTheSameFingerprint(self):
+    previous = self.render({'period': 1, 'home': 2, 'road': 0})
+    self.builds.clear()
+
+    boxscore = {'period': 1, 'home': 4, 'road': 0}
+    self.assertEqual(stale_sections(self.sections, boxscore, previous), ['score'])
+    sections = self.render(boxscore, previous)
+    self.assertEqual(self.builds, ['score'])
+    self.assertIs(sections[0], previous[0])
+    self.assertEqual(body(sections), 'period 1\nscore (4, 0)\n')
+    self.assertEqual(changed_sections(previous, sections), ['score'])
+
+  def test_render_withoutFingerprints_buildsEverySection(self):
+    boxscore = {'period': 1, 'home': 2, 'road': 0}
+    sections = render(
+        self.sections, self.build(boxscore), boxscore, fingerprints=False)
+    self.assertEqual(self.builds, ['period', 'score'])
+    self.assertEqual(body(sections), 'period 1\nscore (2, 0)\n')
+    self.assertEqual([s.fingerprint for s in sections], [None, None])
+
+  def test_changedSections_sameTextIsNotAChange(self):
+    previous = (RenderedSection('score', 1, 'text'),)
+    current = (RenderedSection('score', 2, 'text'),)
+    self.assertEqual(changed_sections(previous, current), [])
+
+  def test_changedSections_droppedSection(self):
+    previous = (RenderedSection('a', 1, 'a'), RenderedSection('b', 1, 'b'))
+    self.assertEqual(changed_sections(previous, previous[:1]), ['b'])
+
+  def test_state_onlyReturnsSectionsOfTheSameGame(self):
+    state = GameThreadState()
+    self.assertEqual(state.posted('1'), ())
+    sections = (RenderedSection('a', 1, 'a'),)
+    state.remember('1', sections)
+    self.assertEqual(state.posted('1'), sections)
+    self.assertEqual(state.posted('2'), ())
+
+  def test_state_preparedForOneGame(self):
+    state = GameThreadState()
+    self.assertIsNone(state.prepared('1'))
+    sections = (RenderedSection('a', 1, 'a'),)
+    state.prepare('1', 'data', sections)
+    self.assertEqual(state.prepared('1'), ('data', sections))
+    self.assertIsNone(state.prepared('2'))
+
+  def test_state_isUnchanged_countsSkips(self):
+    state = GameThreadState()
+    boxscore = {'period': 1, 'home': 2, 'road': 0}
+    self.assertFalse(state.is_unchanged('1', self.sections, boxscore))
+    state.remember('1', self.render(boxscore))
+
+    self.assertTrue(state.is_unchanged('1', self.sections, boxscore))
+    self.assertFalse(state.is_unchanged(
+        '1', self.sections, {'period': 2, 'home': 2, 'road': 0}))
+    self.assertFalse(state.is_unchanged('2', self.sections, boxscore))
+    self.assertEqual(state.stats.checked, 4)
+    self.assertEqual(state.stats.skipped, 1)
+    self.assertEqual(state.stats.skip_rate, 0.25)
+    self.assertEqual(
+        repr(state.stats), 'checked=4 skipped=1 skip_rate=0.25')
+
+  def test_state_isUnchanged_needsACheckAfterMaxUncheckedRuns(self):
+    state = GameThreadState(max_unchecked_runs=2)
+    boxscore = {'period': 1, 'home': 2, 'road': 0}
+    state.remember('1', self.render(boxscore))
+
+    self.assertTrue(state.is_unchanged('1', self.sections, boxscore))
+    state.remember('1', state.posted('1'), checked=False)
+    self.assertTrue(state.needs_check())
+    self.assertFalse(state.is_unchanged('1', self.sections, boxscore))
+
+    # Looking the thread up on reddit starts the count over.
+    state.remember('1', state.posted('1'))
+    self.assertFalse(state.needs_check())
+    self.assertTrue(state.is_unchanged('1', self.sections, boxscore))
+
+
+if __name__ == '__main__':
+  unittest.main()
@@ -0,0 +1,149 @@
+"""
+Runs the bots of a tick side by side on a small thread pool so that a slow bot
+(i.e., a sidebar wiki edit) doesn't hold up the others (i.e., the live game
+thread).
+
+Each job gets a deadline. The runner stops waiting for a job once its deadline
+passes but it can't interrupt it, so a job that is still running when the next
+tick comes around is skipped for that tick instead of being started twice. A job
+can also be started without being waited for at all, so that the tick (and the
+scheduling of the next one) only depends on the jobs that matter most. Every
+outcome is counted per job so that skipped (coalesced) and missed ticks show up
+in the logs.
+"""
+
+from concurrent.futures import ThreadPoolExecutor, wait
+
+import threading
+import time
+import traceback
+
+DONE = 'done'
+FAILED = 'failed'
+OVERRAN = 'overran'
+SKIPPED = 'skipped'
+STARTED = 'started'
+
+
+class Job:
+
+  def __init__(self, name, func, deadline_seconds, wait=True):
+    """
+    Parameters
+    ----------
+    name: str
+      Identifies the job across ticks.
+    func: function
+      Called without any arguments to do the work.
+    deadline_seconds: float
+      How long to wait for func to return.
+    wait: bool
+      Whether JobRunner.run waits for the job. A job that isn't waited for is
+      still counted as overran if it takes longer than its deadline.
+    """
+    self.name = name
+    self.func = func
+    self.deadline_seconds = deadline_seconds
+    self.wait = wait
+
+
+class JobStats:
+
+  def __init__(self):
+    self.done = 0
+    self.failed = 0
+    self.overran = 0
+    self.skipped = 0
+    self.missed = 0
+    self.last_duration_seconds = None
+
+  def __repr__(self):
+    return (f'done={self.done} failed={self.failed} overran={self.overran} '
+            f'skipped={self.skipped} missed={self.missed} '
+            f'last_duration={self.last_duration_seconds}')
+
+
+class JobRunner:
+
+  def __init__(self, logger, max_workers=2, clock=time.monotonic):
+    self.logger = logger
+    self.stats = dict()
+    self._clock = clock
+    self._executor = ThreadPoolExecutor(
+        max_workers=max_workers, thread_name_prefix='job')
+    self._running = dict()
+    self._lock = threading.Lock()
+
+  def run(self, jobs):
+    """Starts every job that isn't still running from an earlier tick and waits
+    for each one until its deadline.
+
+    Returns a dict of job name to its outcome (DONE, FAILED, OVERRAN or
+    SKIPPED, or STARTED for jobs that aren't waited for).
+    """
+    outcomes = dict()
+    futures = dict()
+    start = self._clock()
+    with self._lock:
+      for job in jobs:
+        stats = self.stats.setdefault(job.name, JobStats())
+        if job.name in self._running:
+          stats.skipped += 1
+          outcomes[job.name] = SKIPPED
+          self.logger.warning(f'{job.name} is still running. Skipping it.')
+          continue
+        future = self._executor.submit(self._call, job)
+        self._running[job.name] = future
+        if job.wait:
+          futures[job.name] = (job, future)
+        else:
+          outcomes[job.name] = STARTED
+
+    for name, (job, future) in futures.items():
+      remaining = job.deadline_seconds - (self._clock() - start)
+      wait([future], timeout=max(0, remaining))
+      if not future.done():
+        outcomes[name] = OVERRAN
+        with self._lock:
+          self.stats[name].overran += 1
+        self.logger.warning(
+            f'{name} missed its {job.deadline_seconds}s deadline.')
+      else:
+        outcomes[name] = DONE if future.result() else FAILED
+    return outcomes
+
+  def record_missed(self, name):
+    """Counts a tick that the scheduler never started (i.e., it was too late)."""
+    with self._lock:
+      self.stats.setdefault(name, JobStats()).missed += 1
+
+  def shutdown(self):
+    self._executor.shutdown(wait=False)
+
+  def _call(self, job):
+    """Runs a job and returns whether it succeeded."""
+    start = self._clock()
+    succeeded = False
+    try:
+      job.func()
+      succeeded = True
+    except:
+      self.logger.error(f'{job.name} failed: {traceback.format_exc()}')
+    finally:
+      duration = self._clock() - start
+      # Jobs that are waited for are counted by run.
+      overran = not job.wait and duration > job.deadline_seconds
+      with self._lock:
+        del self._running[job.name]
+        stats = self.stats[job.name]
+        stats.last_duration_seconds = duration
+        if succeeded:
+          stats.done += 1
+        else:
+          stats.failed += 1
+        if overran:
+          stats.overran += 1
+      if overran:
+        self.logger.warning(
+            f'{job.name} missed its {job.deadline_seconds}s deadline.')
+    return succeeded
@@ -0,0 +1,96 @@
+from job_runner import DONE, FAILED, OVERRAN, SKIPPED, STARTED, Job, JobRunner
+
+import logging.config
+import threading
+import time
+import unittest
+
+
+class JobRunnerTest(unittest.TestCase):
+
+  def setUp(self):
+    logging.basicConfig(level=logging.CRITICAL)
+    self.runner = JobRunner(logging.getLogger(__name__), max_workers=2)
+
+  def tearDown(self):
+    self.runner.shutdown()
+
+  def test_run_jobsRunConcurrently(self):
+    barrier = threading.Barrier(2, timeout=1)
+    jobs = [
+      Job('sidebar', barrier.wait, deadline_seconds=2),
+      Job('game_thread', barrier.wait, deadline_seconds=2),
+    ]
+    # Would time out (and fail) if the jobs ran one after the other.
+    outcomes = self.runner.run(jobs)
+    self.assertEqual(outcomes, {'sidebar': DONE, 'game_thread': DONE})
+    self.assertEqual(self.runner.stats['sidebar'].done, 1)
+
+  def test_run_failedJob(self):
+    def fail():
+      raise Exception('boom')
+    outcomes = self.runner.run([Job('sidebar', fail, deadline_seconds=1)])
+    self.assertEqual(outcomes, {'sidebar': FAILED})
+    self.assertEqual(self.runner.stats['sidebar'].failed, 1)
+
+  def test_run_slowJob_doesNotHoldUpOthersAndIsSkippedNextTick(self):
+    release = threading.Event()
+    slow = Job('sidebar', release.wait, deadline_seconds=0.1)
+    fast = Job('game_thread', lambda: None, deadline_seconds=1)
+
+    start = time.monotonic()
+    outcomes = self.runner.run([slow, fast])
+    self.assertLess(time.monotonic() - start, 1)
+    self.assertEqual(outcomes, {'sidebar': OVERRAN, 'game_thread': DONE})
+
+    # The next tick skips the job that is still running.
+    outcomes = self.runner.run([slow, fast])
+    self.assertEqual(outcomes, {'sidebar': SKIPPED, 'game_thread': DONE})
+
+    release.set()
+    time.sleep(0.1)
+    outcomes = self.runner.run([slow, fast])
+    self.assertEqual(outcomes, {'sidebar': DONE, 'game_thread': DONE})
+
+    stats = self.runner.stats['sidebar']
+    self.assertEqual(stats.overran, 1)
+    self.assertEqual(stats.skipped, 1)
+    self.assertEqual(stats.done, 2)
+
+  def test_run_jobNotWaitedFor_doesNotHoldUpTheRun(self):
+    release = threading.Event()
+    self.addCleanup(release.set)
+    finished = threading.Event()
+
+    def slow():
+      release.wait()
+      finished.set()
+    background = Job('sidebar', slow, deadline_seconds=0.05, wait=False)
+    fast = Job('game_thread', lambda: None, deadline_seconds=1)
+
+    start = time.monotonic()
+    outcomes = self.runner.run([background, fast])
+    self.assertLess(time.monotonic() - start, 0.5)
+    self.assertEqual(outcomes, {'sidebar': STARTED, 'game_thread': DONE})
+
+    # Still running on the next tick.
+    outcomes = self.runner.run([background, fast])
+    self.assertEqual(outcomes, {'sidebar': SKIPPED, 'game_thread': DONE})
+
+    time.sleep(0.1)
+    release.set()
+    self.assertTrue(finished.wait(timeout=1))
+    time.sleep(0.05)
+    stats = self.runner.stats['sidebar']
+    self.assertEqual(stats.done, 1)
+    self.assertEqual(stats.skipped, 1)
+    self.assertEqual(stats.overran, 1)
+
+  def test_recordMissed(self):
+    self.runner.record_missed('tick')
+    self.runner.record_missed('tick')
+    self.assertEqual(self.runner.stats['tick'].missed, 2)
+
+
+if __name__ == '__main__':
+  unittest.main()
@@ -0,0 +1,63 @@
+"""
+Decides when the bots should run next based on the Knicks schedule.
+
+There is nothing to do most of the time, so the bots run hourly (which is enough
+to keep the sidebar fresh) until it's time to prepare the game thread. They run
+every minute while it's being prepared (see PREGAME_LEAD) and right when it's
+due to be posted. From an hour before tip-off until the game is over they run
+every few seconds so the game thread stays current, and then every minute while
+the post game thread is still being updated.
+"""
+
+from constants import EASTERN_TIMEZONE
+from datetime import datetime, timedelta
+from game_thread_bot import GAME_THREAD_LEAD, MAX_POST_AGE_HOURS, PREGAME_LEAD
+from services.schedule_index import ScheduleIndex
+
+LIVE_INTERVAL = timedelta(seconds=20)
+POST_GAME_INTERVAL = timedelta(minutes=1)
+PREGAME_INTERVAL = timedelta(minutes=1)
+IDLE_INTERVAL = timedelta(hours=1)
+
+
+def next_poll_time(schedule, now, pregame_lead=PREGAME_LEAD):
+  """Returns the datetime at which the bots should run next.
+
+  Parameters
+  ----------
+  schedule: dict
+    The Knicks schedule as returned by NbaService.schedule.
+  now: datetime
+    The current time, preferably in UTC.
+  pregame_lead: timedelta
+    How long before the game thread is due the bots start preparing it. Should
+    be the same as the game thread bot's.
+  """
+  index = ScheduleIndex.of(schedule)
+  post_game_window = timedelta(hours=MAX_POST_AGE_HOURS)
+  # Games that have a game thread or post game thread right now.
+  current = index.starting_between(
+      now - post_game_window, now + GAME_THREAD_LEAD, preseason=False)
+  if current:
+    if not index.games[current[-1]].is_final:
+      return now + LIVE_INTERVAL
+    return now + POST_GAME_INTERVAL
+
+  wake_up = min(now + IDLE_INTERVAL, _next_eastern_midnight(now))
+  i = index.next_to_start(now, preseason=False)
+  if i is not None:
+    due = index.games[i].start_time - GAME_THREAD_LEAD
+    if now >= due - pregame_lead:
+      return min(due, now + PREGAME_INTERVAL)
+    wake_up = min(wake_up, due - pregame_lead)
+  return wake_up
+
+
+def _next_eastern_midnight(now):
+  """The sidebar shows "Today", "Yesterday" and "Tomorrow" so it needs to be
+  updated right after midnight in New York."""
+  eastern_now = now.astimezone(EASTERN_TIMEZONE)
+  tomorrow = eastern_now.date() + timedelta(days=1)
+  midnight = EASTERN_TIMEZONE.localize(
+      datetime(tomorrow.year, tomorrow.month, tomorrow.day))
+  return midnight.astimezone(now.tzinfo)
@@ -0,0 +1,70 @@
+from constants import UTC
+from datetime import datetime, timedelta
+from game_thread_bot import PREGAME_LEAD
+from polling import IDLE_INTERVAL, LIVE_INTERVAL, POST_GAME_INTERVAL
+from polling import PREGAME_INTERVAL
+from polling import next_poll_time
+from services.fake_nba_service import FakeNbaService
+
+import unittest
+
+
+class PollingTest(unittest.TestCase):
+  # Previous game (20201227/MILNYK) started at 2020-12-28T00:30:00.000Z.
+  # Next game (20201229/NYKCLE) starts at 2020-12-30T00:00:00.000Z.
+
+  def setUp(self):
+    self.schedule = FakeNbaService().schedule('knicks', '2020')
+
+  def test_offDay_pollHourly(self):
+    now = datetime(2020, 12, 29, 12, 0, 0, 0, UTC)
+    self.assertEqual(next_poll_time(self.schedule, now), now + IDLE_INTERVAL)
+
+  def test_shortlyBeforeGameThread_wakeUpToPrepareIt(self):
+    now = datetime(2020, 12, 29, 22, 0, 0, 0, UTC)
+    self.assertEqual(
+        next_poll_time(self.schedule, now),
+        datetime(2020, 12, 29, 23, 0, 0, 0, UTC) - PREGAME_LEAD)
+
+  def test_withoutPregame_wakeUpAnHourBeforeTipOff(self):
+    now = datetime(2020, 12, 29, 22, 30, 0, 0, UTC)
+    self.assertEqual(
+        next_poll_time(self.schedule, now, pregame_lead=timedelta(0)),
+        datetime(2020, 12, 29, 23, 0, 0, 0, UTC))
+
+  def test_pregameWindow_pollEveryMinuteUntilTheGameThreadIsDue(self):
+    now = datetime(2020, 12, 29, 22, 50, 0, 0, UTC)
+    self.assertEqual(next_poll_time(self.schedule, now), now + PREGAME_INTERVAL)
+    now = datetime(2020, 12, 29, 22, 59, 30, 0, UTC)
+    self.assertEqual(
+        next_poll_time(self.schedule, now),
+        datetime(2020, 12, 29, 23, 0, 0, 0, UTC))
+
+  def test_beforeMidnightInNewYork_wakeUpAtMidnight(self):
+    # 11:30 PM on 12/28 in New York.
+    now = datetime(2020, 12, 29, 4, 30, 0, 0, UTC)
+    self.assertEqual(
+        next_poll_time(self.schedule, now),
+        datetime(2020, 12, 29, 5, 0, 0, 0, UTC))
+
+  def test_gameThreadWindow_pollFast(self):
+    now = datetime(2020, 12, 29, 23, 0, 0, 0, UTC)
+    self.assertEqual(next_poll_time(self.schedule, now), now + LIVE_INTERVAL)
+
+  def test_gameFinal_pollEveryMinute(self):
+    now = datetime(2020, 12, 28, 3, 0, 0, 0, UTC)
+    self.assertEqual(
+        next_poll_time(self.schedule, now), now + POST_GAME_INTERVAL)
+
+  def test_postGameWindowOver_pollHourly(self):
+    now = datetime(2020, 12, 28, 7, 0, 0, 0, UTC)
+    self.assertEqual(next_poll_time(self.schedule, now), now + IDLE_INTERVAL)
+
+  def test_seasonOver_pollHourly(self):
+    now = datetime(2021, 7, 1, 12, 0, 0, 0, UTC)
+    self.assertEqual(
+        next_poll_time(self.schedule, now), now + timedelta(hours=1))
+
+
+if __name__ == '__main__':
+  unittest.main()
@@ -1,28 +1,84 @@
 """
-Runs Knicks bots every minute. This is the main entry point for the heroku app.
+Runs Knicks bots. This is the main entry point for the heroku app.
+
+Unlike the cron jobs (see the README.md), this is a long-lived daemon. The reddit
+client, the NBA data service and its caches are created once and reused for
+every tick, so a tick only pays for the work it actually has to do. The process
+shuts down cleanly when heroku sends it a SIGTERM.
+
+The service runs in stale-while-revalidate mode (see caching_nba_service.py): an
+expired response is used right away, for a bounded time, while it's looked up
+again in the background, so a slow or failing NBA Data API doesn't hold up or
+fail ticks. Each bot logs the age of every response it used when it's done.
+Every endpoint also has a circuit
+breaker (see circuit_breaker.py), so a tick doesn't spend its whole time budget
+on an endpoint that keeps failing, and their health is logged after each tick.
+Box score requests that take longer than usual are hedged (see hedging.py).
+
+The bots don't run at a fixed interval. After each tick the next one is
+scheduled based on the Knicks schedule (see polling.py): rarely on off days and
+every few seconds during games. Within a tick both bots run at the same time
+(see job_runner.py) so that sidebar updates never delay the game thread. A tick
+only waits for the game thread: the next one is scheduled as soon as it's done,
+while a slow sidebar update finishes in the background (and is skipped by the
+ticks that come around before it's done).
 
 See https://devcenter.heroku.com/articles/clock-processes-python.
 See https://able.bio/rhett/how-to-set-and-get-environment-variables-in-python--274rgt5.
 """
 
+from apscheduler.events import EVENT_JOB_MISSED
 from apscheduler.schedulers.blocking import BlockingScheduler
 from constants import UTC
-from datetime import datetime
+from datetime import datetime, timedelta
 from decouple import config
-from game_thread_bot import GameThreadBot
-from services.nba_service import NbaService
+from game_thread_bot import PREGAME_LEAD, GameThreadBot
+from game_thread_sections import GameThreadState
+from job_runner import Job, JobRunner
+from polling import next_poll_time
+from services.caching_nba_service import CachingNbaService
+from services.circuit_breaker import CircuitBreakers
+from services.hedging import HedgingPolicy
+from services.response_store import ResponseStore
+from services.tick_context import TickContext
+from thread_registry import ThreadRegistry
+import asyncio
 import logging.config
 import os
 import praw
+import signal
 import sidebarbot
+import traceback
+
+# How long to wait before trying again if the next tick can't be planned (i.e.,
+# because the schedule couldn't be downloaded).
+RETRY_INTERVAL = timedelta(minutes=1)
+
+# A tick that couldn't start on time is still run if it's no more than this many
+# seconds late.
+MISFIRE_GRACE_SECONDS = 60
+
+# How long each bot should take. A tick only waits for the game thread; a
+# sidebar update that takes longer is counted as overran. A bot that is still
+# running when the next tick starts is skipped for that tick.
+SIDEBAR_DEADLINE_SECONDS = 45
+GAME_THREAD_DEADLINE_SECONDS = 15
 
 
-sched = BlockingScheduler()
-logging.config.fileConfig('logging_heroku.conf')
-logger = logging.getLogger('main')
-gdlogger = logging.getLogger('game_thread_bot')
-sblogger = logging.getLogger('sidebarbot')
-nba_service = NbaService(gdlogger)
+def log_ages(logger, ages):
+  """Logs how old each of the responses a bot used was.
+
+  Parameters
+  ----------
+  logger: logging.Logger
+  ages: dict
+    (endpoint, args) -> age in seconds (see TickContext.ages).
+  """
+  ages = ', '.join(
+      f'{endpoint}{args}: {age:.0f}s'
+      for (endpoint, args), age in sorted(ages.items()))
+  logger.info(f'Response ages: {ages}.')
+
 
 class Config:
   """Container for reddit environment variables."""
@@ -61,17 +117,172 @@ class Config:
         user_agent=self.user_agent)
 
 
-@sched.scheduled_job('interval', minutes=1)
-def every_minute():
-  cfg = Config.from_env_vars()
-  now = datetime.now(UTC)
+class Daemon:
+  """Owns everything that lives across ticks and runs the bots on a schedule."""
+
+  def __init__(
+      self, cfg, nba_service, logger, gdlogger, sblogger,
+      pregame_lead=PREGAME_LEAD):
+    """
+    Parameters
+    ----------
+    cfg: Config
+    nba_service: NbaService
+      A long-lived (preferably caching) service shared by every tick.
+    logger: logging.Logger
+      The daemon's own logger.
+    gdlogger: logging.Logger
+      The game thread bot's logger.
+    sblogger: logging.Logger
+      The sidebar bot's logger.
+    pregame_lead: timedelta
+      How long before the game thread is due it's prepared (see
+      game_thread_bot.PREGAME_LEAD).
+    """
+    self.cfg = cfg
+    self.nba_service = nba_service
+    self.logger = logger
+    self.gdlogger = gdlogger
+    self.sblogger = sblogger
+    self.pregame_lead = pregame_lead
+    self.sched = BlockingScheduler()
+    self.sched.add_listener(self._on_missed, EVENT_JOB_MISSED)
+    self.runner = JobRunner(logger, max_workers=2)
+    self.thread_registry = ThreadRegistry()
+    self.sidebar_state = sidebarbot.SidebarState()
+    self.game_thread_state = GameThreadState()
+    self._reddits = dict()
+
+  def reddit(self, name):
+    """Returns the reddit client for a bot, logging in the first time it's
+    called.
+
+    praw keeps the OAuth access token it gets and only asks for a new one after
+    it expires, so reusing the same client avoids a login on every tick. Each bot
+    gets its own client because praw clients aren't thread safe.
+    """
+    if name not in self._reddits:
+      self.logger.info(f'Logging in to reddit for {name}.')
+      self.logger.info(
+          f'Using subreddit "{self.cfg.subreddit_name}" '
+          f'and user "{self.cfg.username}".')
+      self._reddits[name] = self.cfg.reddit()
+    return self._reddits[name]
+
+  def start(self):
+    """Runs the bots until the process is told to stop."""
+    signal.signal(signal.SIGTERM, self.stop)
+    signal.signal(signal.SIGINT, self.stop)
+    self._add_tick(datetime.now(UTC))
+    self.logger.info('Starting.')
+    self.sched.start()
+
+  def stop(self, signum=None, frame=None):
+    """Stops the scheduler without waiting for a running tick to finish."""
+    self.logger.info(f'Shutting down (signal {signum}).')
+    if self.sched.running:
+      self.sched.shutdown(wait=False)
+    self.runner.shutdown()
+    self.nba_service.close()
+
+  def tick(self):
+    try:
+      self.run_bots(datetime.now(UTC))
+    finally:
+      self._schedule_next_tick()
+
+  def _schedule_next_tick(self):
+    now = datetime.now(UTC)
+    try:
+      year = self.nba_service.current_year()
+      run_date = next_poll_time(
+          self.nba_service.schedule('knicks', year), now, self.pregame_lead)
+    except:
+      self.logger.error(traceback.format_exc())
+      run_date = now + RETRY_INTERVAL
+    if not self.sched.running:
+      return
+    self.logger.info(f'Next run at {run_date}.')
+    self._add_tick(run_date)
+
+  def _add_tick(self, run_date):
+    self.sched.add_job(
+        self.tick,
+        'date',
+        run_date=run_date,
+        misfire_grace_time=MISFIRE_GRACE_SECONDS)
+
+  def run_bots(self, now):
+    # Both bots need some of the same feeds. Share them for the whole tick so
+    # that each one is only looked up once.
+    tick = TickContext(self.nba_service)
+    subreddit_name = self.cfg.subreddit_name
+
+    def sidebar():
+      nba_service = tick.view()
+      try:
+        asyncio.run(sidebarbot.execute_async(
+            self.sblogger,
+            now,
+            self.reddit('sidebar'),
+            subreddit_name,
+            nba_service,
+            self.sidebar_state))
+      finally:
+        log_ages(self.sblogger, nba_service.ages)
+
+    def game_thread():
+      nba_service = tick.view()
+      bot = GameThreadBot(
+          self.gdlogger,
+          nba_service,
+          now,
+          self.reddit('game_thread'),
+          subreddit_name,
+          self.thread_registry,
+          self.game_thread_state,
+          self.pregame_lead)
+      try:
+        asyncio.run(bot.run_async())
+      finally:
+        log_ages(self.gdlogger, nba_service.ages)
+
+    outcomes = self.runner.run([
+      Job('sidebar', sidebar, SIDEBAR_DEADLINE_SECONDS, wait=False),
+      Job('game_thread', game_thread, GAME_THREAD_DEADLINE_SECONDS),
+    ])
+    self.logger.info(f'Done: {outcomes}.')
+    for name, stats in self.runner.stats.items():
+      self.logger.info(f'{name}: {stats}')
+    self.logger.info(f'game thread changes: {self.game_thread_state.stats}')
+    if self.nba_service.breakers is not None:
+      for endpoint, health in self.nba_service.breakers.health().items():
+        self.logger.info(f'{endpoint}: {health}')
+    if self.nba_service.hedging is not None:
+      self.logger.info(f'boxscore hedging: {self.nba_service.hedging.stats}')
 
-  logger.info('Logging in to reddit.')
-  logger.info(f'Using subreddit "{cfg.subreddit_name}" and user "{cfg.username}".')
-  reddit = cfg.reddit()
+  def _on_missed(self, event):
+    self.logger.warning(
+        f'Missed the tick scheduled for {event.scheduled_run_time}.')
+    self.runner.record_missed('tick')
+    # Every tick schedules the next one, so a missed tick has to be replaced.
+    if self.sched.running:
+      self._add_tick(datetime.now(UTC))
 
-  sidebarbot.execute(sblogger, now, reddit, cfg.subreddit_name)
-  GameThreadBot(gdlogger, nba_service, now, reddit, cfg.subreddit_name).run()
-  logger.info('Done.')
 
-sched.start()
+if __name__ == '__main__':
+  logging.config.fileConfig('logging_heroku.conf')
+  gdlogger = logging.getLogger('game_thread_bot')
+  Daemon(
+      cfg=Config.from_env_vars(),
+      nba_service=CachingNbaService(
+          gdlogger,
+          store=ResponseStore(),
+          stale_while_revalidate=True,
+          breakers=CircuitBreakers(gdlogger),
+          hedging=HedgingPolicy(gdlogger)),
+      logger=logging.getLogger('main'),
+      gdlogger=gdlogger,
+      sblogger=logging.getLogger('sidebarbot'),
+      pregame_lead=timedelta(minutes=config(
+          'pregame_lead_minutes', default=20, cast=int))).start()
@@ -0,0 +1,195 @@
+from constants import UTC
+from datetime import datetime, timedelta
+from scheduler import RETRY_INTERVAL, Daemon
+from services.fake_nba_service import FakeNbaService
+from unittest.mock import MagicMock, patch
+
+import logging.config
+import threading
+import time
+import unittest
+
+NOW = datetime(2021, 1, 1, 0, 0, 0, 0, UTC)
+
+
+class DaemonTest(unittest.TestCase):
+
+  def setUp(self):
+    logging.basicConfig(level=logging.CRITICAL)
+    patcher = patch('scheduler.BlockingScheduler')
+    self.sched = patcher.start().return_value
+    self.addCleanup(patcher.stop)
+    self.sched.running = True
+    self.cfg = MagicMock()
+    self.cfg.reddit.side_effect = lambda: MagicMock()
+    self.nba_service = MagicMock(wraps=FakeNbaService())
+    logger = logging.getLogger(__name__)
+    self.daemon = Daemon(self.cfg, self.nba_service, logger, logger, logger)
+    self.addCleanup(self.daemon.runner.shutdown)
+
+  def test_reddit_loggedInOncePerBot(self):
+    sidebar = self.daemon.reddit('sidebar')
+    self.assertIs(self.daemon.reddit('sidebar'), sidebar)
+    game_thread = self.daemon.reddit('game_thread')
+    self.assertIsNot(game_thread, sidebar)
+    self.assertIs(self.daemon.reddit('game_thread'), game_thread)
+    self.assertEqual(self.cfg.reddit.call_count, 2)
+
+  @patch('scheduler.signal.signal')
+  def test_start_schedulesTheFirstTick(self, mock_signal):
+    self.daemon.start()
+    self.assertEqual(mock_signal.call_count, 2)
+    self.sched.add_job.assert_called_once()
+    self.assertEqual(self.sched.add_job.call_args[0][0], self.daemon.tick)
+    self.sched.start.assert_called_once()
+
+  def test_stop_shutsEverythingDown(self):
+    self.daemon.runner = MagicMock()
+    self.daemon.stop()
+    self.sched.shutdown.assert_called_once_with(wait=False)
+    self.daemon.runner.shutdown.assert_called_once()
+    self.nba_service.close.assert_called_once()
+
+  def test_stop_schedulerNotRunning(self):
+    self.sched.running = False
+    self.daemon.stop()
+    self.sched.shutdown.assert_not_called()
+    self.nba_service.close.assert_called_once()
+
+
+class ScheduleNextTickTest(unittest.TestCase):
+
+  def setUp(self):
+    logging.basicConfig(level=logging.CRITICAL)
+    patcher = patch('scheduler.BlockingScheduler')
+    self.sched = patcher.start().return_value
+    self.addCleanup(patcher.stop)
+    self.sched.running = True
+    self.nba_service = MagicMock(wraps=FakeNbaService())
+    logger = logging.getLogger(__name__)
+    self.daemon = Daemon(
+        MagicMock(), self.nba_service, logger, logger, logger)
+    self.addCleanup(self.daemon.runner.shutdown)
+    patcher = patch('scheduler.datetime')
+    patcher.start().now.return_value = NOW
+    self.addCleanup(patcher.stop)
+
+  def run_date(self):
+    self.sched.add_job.assert_called_once()
+    return self.sched.add_job.call_args[1]['run_date']
+
+  @patch('scheduler.next_poll_time')
+  def test_nextTick_followsTheKnicksSchedule(self, mock_next_poll_time):
+    mock_next_poll_time.return_value = NOW + timedelta(seconds=20)
+    self.daemon._schedule_next_tick()
+    self.nba_service.schedule.assert_called_once_with('knicks', '2020')
+    self.assertEqual(
+        mock_next_poll_time.call_args[0][1:],
+        (NOW, self.daemon.pregame_lead))
+    self.assertEqual(self.run_date(), NOW + timedelta(seconds=20))
+
+  def test_scheduleLookupFails_retriesAfterRetryInterval(self):
+    self.nba_service.schedule.side_effect = Exception('down')
+    self.daemon._schedule_next_tick()
+    self.assertEqual(self.run_date(), NOW + RETRY_INTERVAL)
+
+  def test_schedulerStopped_noNextTick(self):
+    self.sched.running = False
+    self.daemon._schedule_next_tick()
+    self.sched.add_job.assert_not_called()
+
+  @patch('scheduler.next_poll_time')
+  def test_tick_failedRun_stillSchedulesTheNextTick(self, mock_next_poll_time):
+    mock_next_poll_time.return_value = NOW + timedelta(minutes=1)
+    self.daemon.run_bots = MagicMock(side_effect=Exception('boom'))
+    with self.assertRaises(Exception):
+      self.daemon.tick()
+    self.assertEqual(self.run_date(), NOW + timedelta(minutes=1))
+
+  def test_missedTick_isReplaced(self):
+    event = MagicMock(scheduled_run_time=NOW)
+    self.daemon._on_missed(event)
+    self.assertEqual(self.daemon.runner.stats['tick'].missed, 1)
+    self.assertEqual(self.run_date(), NOW)
+
+
+class RunBotsTest(unittest.TestCase):
+
+  def setUp(self):
+    logging.basicConfig(level=logging.CRITICAL)
+    patcher = patch('scheduler.BlockingScheduler')
+    self.sched = patcher.start().return_value
+    self.addCleanup(patcher.stop)
+    self.sched.running = True
+    logger = logging.getLogger(__name__)
+    self.daemon = Daemon(
+        MagicMock(), FakeNbaService(), logger, logger, logger)
+    self.addCleanup(self.daemon.runner.shutdown)
+    patcher = patch('scheduler.datetime')
+    patcher.start().now.return_value = NOW
+    self.addCleanup(patcher.stop)
+
+  @patch('scheduler.next_poll_time')
+  @patch('scheduler.GameThreadBot')
+  @patch('scheduler.sidebarbot.execute_async')
+  def test_slowSidebar_doesNotDelayTheGameThreadOrTheNextTick(
+      self, mock_sidebar, mock_bot, mock_next_poll_time):
+    release = threading.Event()
+    self.addCleanup(release.set)
+
+    async def slow_sidebar(*args):
+      release.wait()
+    mock_sidebar.side_effect = slow_sidebar
+    game_thread_done = threading.Event()
+
+    async def run_game_thread():
+      game_thread_done.set()
+    mock_bot.return_value.run_async.side_effect = run_game_thread
+    mock_next_poll_time.return_value = NOW + timedelta(seconds=20)
+
+    start = time.monotonic()
+    self.daemon.tick()
+    self.assertLess(time.monotonic() - start, 1)
+    self.assertTrue(game_thread_done.is_set())
+    self.sched.add_job.assert_called_once()
+    self.assertEqual(
+        self.sched.add_job.call_args[1]['run_date'],
+        NOW + timedelta(seconds=20))
+    # The sidebar is still running.
+    mock_sidebar.assert_called_once()
+    self.assertIn('sidebar', self.daemon.runner._running)
+
+  @patch('scheduler.next_poll_time')
+  @patch('scheduler.GameThreadBot')
+  @patch('scheduler.sidebarbot.execute_async')
+  def test_eachBot_logsTheAgesOfTheResponsesItUsed(
+      self, mock_sidebar, mock_bot, mock_next_poll_time):
+    self.daemon.nba_service.age = MagicMock(return_value=42)
+    self.daemon.sblogger = MagicMock()
+    self.daemon.gdlogger = MagicMock()
+    # The sidebar finishes in the background.
+    sidebar_logged = threading.Event()
+    self.daemon.sblogger.info.side_effect = lambda msg: sidebar_logged.set()
+
+    async def run_sidebar(logger, now, reddit, subreddit_name, nba_service,
+                          state):
+      nba_service.teams('2020')
+    mock_sidebar.side_effect = run_sidebar
+
+    async def run_game_thread():
+      nba_service = mock_bot.call_args[0][1]
+      nba_service.current_year()
+    mock_bot.return_value.run_async.side_effect = run_game_thread
+    mock_next_poll_time.return_value = NOW + timedelta(seconds=20)
+
+    self.daemon.tick()
+    self.assertTrue(sidebar_logged.wait(timeout=1))
+
+    self.daemon.gdlogger.info.assert_called_with(
+        "Response ages: current_year(): 42s.")
+    self.daemon.sblogger.info.assert_called_with(
+        "Response ages: teams('2020',): 42s.")
+
+
+if __name__ == '__main__':
+  unittest.main()
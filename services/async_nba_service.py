@@ -0,0 +1,71 @@
+"""
+An asyncio facade around NbaService so that independent NBA Data API calls can
+be made concurrently, i.e.:
+
+  players, roster = await asyncio.gather(
+      nba_service.players(year), nba_service.roster('knicks', year))
+
+Every call is delegated to a (blocking) NbaService on a small thread pool. That
+keeps the pooled session, timeouts, retries and caching of the wrapped service
+and doesn't need an async HTTP client. The size of the pool limits how many
+requests are in flight at the same time.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+
+import asyncio
+import functools
+
+DEFAULT_MAX_CONCURRENCY = 4
+
+
+class AsyncNbaService:
+
+  def __init__(self, nba_service, max_concurrency=DEFAULT_MAX_CONCURRENCY):
+    """
+    Parameters
+    ----------
+    nba_service: NbaService
+      The service that makes the actual calls. It must be safe to use from
+      several threads at once, which NbaService and CachingNbaService are.
+    max_concurrency: int
+      The maximum number of calls to make at the same time.
+    """
+    self.nba_service = nba_service
+    self._executor = ThreadPoolExecutor(
+        max_workers=max_concurrency, thread_name_prefix='nba_service')
+
+  def close(self):
+    self._executor.shutdown(wait=False)
+
+  async def boxscore(self, start_date_est, game_id):
+    return await self._call(self.nba_service.boxscore, start_date_est, game_id)
+
+  async def conference_standings(self):
+    return await self._call(self.nba_service.conference_standings)
+
+  async def current_year(self):
+    return await self._call(self.nba_service.current_year)
+
+  async def player_index(self, year):
+    return await self._call(self.nba_service.player_index, year)
+
+  async def players(self, year):
+    return await self._call(self.nba_service.players, year)
+
+  async def remaining_games(self, year):
+    return await self._call(self.nba_service.remaining_games, year)
+
+  async def roster(self, team, year):
+    return await self._call(self.nba_service.roster, team, year)
+
+  async def schedule(self, team, year):
+    return await self._call(self.nba_service.schedule, team, year)
+
+  async def teams(self, year):
+    return await self._call(self.nba_service.teams, year)
+
+  async def _call(self, method, *args):
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        self._executor, functools.partial(method, *args))
@@ -0,0 +1,67 @@
+from services.async_nba_service import AsyncNbaService
+from services.fake_nba_server import FakeNbaServer
+from services.nba_service import NbaService
+
+import asyncio
+import logging.config
+import time
+import unittest
+
+DELAY_SECONDS = 0.2
+
+
+class AsyncNbaServiceTest(unittest.TestCase):
+
+  def setUp(self):
+    logging.basicConfig(level=logging.ERROR)
+    self.server = FakeNbaServer(delay=DELAY_SECONDS).start()
+    self.nba_service = NbaService(
+        logging.getLogger(__name__), host=self.server.host)
+
+  def tearDown(self):
+    self.nba_service.close()
+    self.server.stop()
+
+  def test_gather_fetchesConcurrently(self):
+    async_service = AsyncNbaService(self.nba_service, max_concurrency=5)
+
+    async def fetch_all():
+      return await asyncio.gather(
+          async_service.players('2020'),
+          async_service.roster('knicks', '2020'),
+          async_service.teams('2020'),
+          async_service.schedule('knicks', '2020'),
+          async_service.conference_standings())
+
+    start = time.monotonic()
+    players, roster, teams, schedule, standings = asyncio.run(fetch_all())
+    elapsed = time.monotonic() - start
+    async_service.close()
+
+    self.assertEqual(players[0]['temporaryDisplayName'], 'Achiuwa, Precious')
+    self.assertEqual(roster, set(['1629628', '1629649', '203493', '202692']))
+    self.assertEqual(teams['1610612737']['fullName'], 'Atlanta Hawks')
+    self.assertEqual(schedule['league']['standard'][0]['gameId'], '0012000002')
+    self.assertEqual(standings['seasonYear'], 2017)
+    self.assertEqual(len(self.server.requests), 5)
+    # Five calls in series would take at least 5 * DELAY_SECONDS.
+    self.assertLess(elapsed, 3 * DELAY_SECONDS)
+
+  def test_maxConcurrency_limitsCallsInFlight(self):
+    async_service = AsyncNbaService(self.nba_service, max_concurrency=1)
+
+    async def fetch_all():
+      return await asyncio.gather(
+          async_service.current_year(), async_service.teams('2020'))
+
+    start = time.monotonic()
+    year, _ = asyncio.run(fetch_all())
+    elapsed = time.monotonic() - start
+    async_service.close()
+
+    self.assertEqual(year, 2020)
+    self.assertGreaterEqual(elapsed, 2 * DELAY_SECONDS)
+
+
+if __name__ == '__main__':
+  unittest.main()
@@ -0,0 +1,233 @@
+"""
+An implementation of NbaService that keeps responses in memory for a while so
+that long running processes don't download the same data over and over again.
+
+Each endpoint has its own time-to-live because the underlying data changes at
+very different rates: team and player metadata change about once a day while a
+live box score changes every few seconds. The cache holds a bounded number of
+entries and evicts the least recently used one when it is full.
+
+In stale-while-revalidate mode a response that outlived its time-to-live is
+returned right away, for up to its endpoint's maximum staleness, and looked up
+again in the background. The next caller gets the fresh copy once that lookup is
+done, and if it fails the expired response keeps being returned. Neither a slow
+nor a failing NBA Data API holds up a tick, as long as every feed the tick needs
+was looked up recently enough. Past the maximum staleness the caller waits for
+the lookup, like in the default mode, and any error is raised. age() says how
+old the response returned for a feed is.
+
+When the circuit breaker of an endpoint is open (see circuit_breaker.py) any
+cached response for it is returned, however old it is, instead of failing.
+"""
+
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from services.circuit_breaker import CircuitOpenError
+from services.nba_service import DEFAULT_HOST, NbaService
+
+import threading
+import time
+
+# Time-to-live in seconds for each endpoint.
+DEFAULT_TTLS = {
+  'boxscore': 10,
+  'conference_standings': 60 * 60,
+  'current_year': 24 * 60 * 60,
+  'player_index': 24 * 60 * 60,
+  'players': 24 * 60 * 60,
+  'remaining_games': 60 * 60,
+  'roster': 6 * 60 * 60,
+  'schedule': 60,
+  'teams': 24 * 60 * 60,
+}
+
+# How long past its time-to-live a response can still be returned in
+# stale-while-revalidate mode, in seconds.
+DEFAULT_MAX_STALE = {
+  'boxscore': 60,
+  'conference_standings': 6 * 60 * 60,
+  'current_year': 7 * 24 * 60 * 60,
+  'player_index': 7 * 24 * 60 * 60,
+  'players': 7 * 24 * 60 * 60,
+  'remaining_games': 6 * 60 * 60,
+  'roster': 24 * 60 * 60,
+  'schedule': 60 * 60,
+  'teams': 7 * 24 * 60 * 60,
+}
+
+# Enough for one season's worth of every feed plus a couple of box scores.
+DEFAULT_MAX_ENTRIES = 64
+
+# Threads that look up fresh copies of stale responses.
+REFRESH_WORKERS = 2
+
+
+class CachingNbaService(NbaService):
+
+  def __init__(
+      self,
+      logger=None,
+      session=None,
+      store=None,
+      host=DEFAULT_HOST,
+      ttls=None,
+      max_entries=DEFAULT_MAX_ENTRIES,
+      clock=time.monotonic,
+      stale_while_revalidate=False,
+      max_stale=None,
+      breakers=None,
+      hedging=None):
+    """
+    Parameters
+    ----------
+    logger: logging.Logger
+    session: requests.Session
+      Optional session to use instead of a new pooled one.
+    store: ResponseStore
+      Optional on-disk store used to make conditional requests.
+    host: str
+      Scheme and host name of the NBA Data API.
+    ttls: dict
+      Overrides for DEFAULT_TTLS, keyed by endpoint (method) name.
+    max_entries: int
+      The maximum number of responses to keep in memory.
+    clock: function
+      Returns the current time in seconds. Only meant to be replaced in tests.
+    stale_while_revalidate: bool
+      Whether to return stale responses while a fresh copy is looked up in the
+      background.
+    max_stale: dict
+      Overrides for DEFAULT_MAX_STALE, keyed by endpoint (method) name.
+    breakers: CircuitBreakers
+      Optional circuit breakers to make every request through.
+    hedging: HedgingPolicy
+      Optional policy to hedge box score requests with.
+    """
+    super().__init__(logger, session, store, host, breakers, hedging)
+    self.ttls = dict(DEFAULT_TTLS)
+    if ttls:
+      self.ttls.update(ttls)
+    self.max_entries = max_entries
+    self.stale_while_revalidate = stale_while_revalidate
+    self.max_stale = dict(DEFAULT_MAX_STALE)
+    if max_stale:
+      self.max_stale.update(max_stale)
+    self._clock = clock
+    # (endpoint, args) -> (time it was looked up, response)
+    self._entries = OrderedDict()
+    self._lock = threading.Lock()
+    # The keys whose responses are being looked up in the background.
+    self._refreshing = set()
+    self._executor = ThreadPoolExecutor(
+        max_workers=REFRESH_WORKERS, thread_name_prefix='nba-refresh') \
+        if stale_while_revalidate else None
+
+  def close(self):
+    if self._executor is not None:
+      self._executor.shutdown(wait=False)
+    super().close()
+
+  def boxscore(self, start_date_est, game_id):
+    return self._cached('boxscore', NbaService.boxscore, start_date_est, game_id)
+
+  def conference_standings(self):
+    return self._cached('conference_standings', NbaService.conference_standings)
+
+  def current_year(self):
+    return self._cached('current_year', NbaService.current_year)
+
+  def player_index(self, year):
+    return self._cached('player_index', NbaService.player_index, year)
+
+  def players(self, year):
+    return self._cached('players', NbaService.players, year)
+
+  def remaining_games(self, year):
+    return self._cached('remaining_games', NbaService.remaining_games, year)
+
+  def roster(self, team, year):
+    return self._cached('roster', NbaService.roster, team, year)
+
+  def schedule(self, team, year):
+    return self._cached('schedule', NbaService.schedule, team, year)
+
+  def teams(self, year):
+    return self._cached('teams', NbaService.teams, year)
+
+  def age(self, endpoint, *args):
+    """Returns how many seconds ago the cached response of an endpoint was
+    looked up, or None if it isn't cached."""
+    with self._lock:
+      entry = self._entries.get((endpoint, args))
+    return None if entry is None else self._clock() - entry[0]
+
+  def invalidate(self, endpoint=None, *args):
+    """Drops cached responses.
+
+    With no arguments the whole cache is cleared. With only an endpoint name
+    every response for that endpoint is dropped, otherwise only the response for
+    that endpoint and those exact arguments is dropped.
+    """
+    with self._lock:
+      if endpoint is None:
+        self._entries.clear()
+      elif args:
+        self._entries.pop((endpoint, args), None)
+      else:
+        for key in [k for k in self._entries if k[0] == endpoint]:
+          del self._entries[key]
+
+  def _cached(self, endpoint, fetch, *args):
+    key = (endpoint, args)
+    refresh = False
+    with self._lock:
+      entry = self._entries.get(key)
+      if entry is not None:
+        age = self._clock() - entry[0]
+        ttl = self.ttls.get(endpoint, 0)
+        if age < ttl:
+          self._entries.move_to_end(key)
+          return entry[1]
+        stale = (self.stale_while_revalidate
+                 and age < ttl + self.max_stale.get(endpoint, 0))
+        if stale:
+          self._entries.move_to_end(key)
+          refresh = key not in self._refreshing
+          if refresh:
+            self._refreshing.add(key)
+    if entry is None or not stale:
+      try:
+        return self._fetch(key, fetch)
+      except CircuitOpenError:
+        if entry is None:
+          raise
+        self.logger.warning(
+            f'{endpoint} is unavailable. Using its response from '
+            f'{age:.0f}s ago.')
+        return entry[1]
+    if refresh:
+      self._executor.submit(self._refresh, key, fetch)
+    return entry[1]
+
+  def _fetch(self, key, fetch):
+    value = fetch(self, *key[1])
+    with self._lock:
+      # Done along with storing the response, so that a caller that gets it
+      # stale again can start another refresh right away.
+      self._refreshing.discard(key)
+      self._entries[key] = (self._clock(), value)
+      self._entries.move_to_end(key)
+      while len(self._entries) > self.max_entries:
+        self._entries.popitem(last=False)
+    return value
+
+  def _refresh(self, key, fetch):
+    try:
+      self._fetch(key, fetch)
+      return
+    except CircuitOpenError as e:
+      self.logger.warning(f'Could not refresh {key[0]}{key[1]}: {e}')
+    except Exception:
+      self.logger.exception(f'Could not refresh {key[0]}{key[1]}.')
+    with self._lock:
+      self._refreshing.discard(key)
@@ -0,0 +1,223 @@
+from services.caching_nba_service import CachingNbaService
+from services.circuit_breaker import CircuitBreakers, CircuitOpenError
+from services.nba_service_test import mocked_requests_get
+from unittest.mock import patch
+
+import logging.config
+import requests
+import threading
+import unittest
+
+
+class FakeClock:
+
+  def __init__(self):
+    self.now = 0
+
+  def __call__(self):
+    return self.now
+
+
+class InlineExecutor:
+  """Runs background refreshes right away so that tests are deterministic."""
+
+  def submit(self, fn, *args):
+    fn(*args)
+
+  def shutdown(self, wait=True):
+    pass
+
+
+class CachingNbaServiceTest(unittest.TestCase):
+
+  def setUp(self):
+    logging.basicConfig(level=logging.ERROR)
+    self.clock = FakeClock()
+    self.nba_service = CachingNbaService(
+        logging.getLogger(__name__),
+        ttls={'teams': 100, 'boxscore': 10},
+        max_entries=2,
+        clock=self.clock)
+
+  @patch('requests.Session.get', side_effect=mocked_requests_get)
+  def test_teams_withinTtl_usesCache(self, mock_get):
+    first = self.nba_service.teams('2020')
+    self.clock.now = 99
+    second = self.nba_service.teams('2020')
+    self.assertIs(first, second)
+    mock_get.assert_called_once()
+
+  @patch('requests.Session.get', side_effect=mocked_requests_get)
+  def test_teams_afterTtl_refetches(self, mock_get):
+    self.nba_service.teams('2020')
+    self.clock.now = 100
+    self.nba_service.teams('2020')
+    self.assertEqual(mock_get.call_count, 2)
+
+  @patch('requests.Session.get', side_effect=mocked_requests_get)
+  def test_differentArguments_cachedSeparately(self, mock_get):
+    self.nba_service.boxscore('20201227', '0022000036')
+    self.nba_service.boxscore('20201229', '0022000046')
+    self.nba_service.boxscore('20201227', '0022000036')
+    self.assertEqual(mock_get.call_count, 2)
+
+  @patch('requests.Session.get', side_effect=mocked_requests_get)
+  def test_invalidate(self, mock_get):
+    self.nba_service.boxscore('20201227', '0022000036')
+    self.nba_service.boxscore('20201229', '0022000046')
+
+    self.nba_service.invalidate('boxscore', '20201227', '0022000036')
+    self.nba_service.boxscore('20201227', '0022000036')
+    self.nba_service.boxscore('20201229', '0022000046')
+    self.assertEqual(mock_get.call_count, 3)
+
+    self.nba_service.invalidate('boxscore')
+    self.nba_service.boxscore('20201229', '0022000046')
+    self.assertEqual(mock_get.call_count, 4)
+
+    self.nba_service.invalidate()
+    self.nba_service.boxscore('20201229', '0022000046')
+    self.assertEqual(mock_get.call_count, 5)
+
+  @patch('requests.Session.get', side_effect=mocked_requests_get)
+  def test_full_evictsLeastRecentlyUsed(self, mock_get):
+    self.nba_service.teams('2020')
+    self.nba_service.boxscore('20201227', '0022000036')
+    self.nba_service.teams('2020')
+    # Evicts the boxscore because teams was used more recently.
+    self.nba_service.boxscore('20201229', '0022000046')
+    self.assertEqual(mock_get.call_count, 3)
+
+    self.nba_service.teams('2020')
+    self.assertEqual(mock_get.call_count, 3)
+    self.nba_service.boxscore('20201227', '0022000036')
+    self.assertEqual(mock_get.call_count, 4)
+
+
+class StaleWhileRevalidateTest(unittest.TestCase):
+
+  def setUp(self):
+    logging.basicConfig(level=logging.CRITICAL)
+    self.clock = FakeClock()
+    self.nba_service = CachingNbaService(
+        logging.getLogger(__name__),
+        ttls={'teams': 100},
+        max_stale={'teams': 50},
+        clock=self.clock,
+        stale_while_revalidate=True)
+    self.addCleanup(self.nba_service.close)
+
+  @patch('requests.Session.get', side_effect=mocked_requests_get)
+  def test_pastTtl_returnsStaleAndRefreshesInTheBackground(self, mock_get):
+    self.nba_service._executor = InlineExecutor()
+    first = self.nba_service.teams('2020')
+    self.clock.now = 120
+    self.assertEqual(self.nba_service.age('teams', '2020'), 120)
+
+    self.assertIs(self.nba_service.teams('2020'), first)
+    self.assertEqual(mock_get.call_count, 2)
+    self.assertEqual(self.nba_service.age('teams', '2020'), 0)
+    second = self.nba_service.teams('2020')
+    self.assertIsNot(second, first)
+    self.assertEqual(second, first)
+    self.assertEqual(mock_get.call_count, 2)
+
+  @patch('requests.Session.get', side_effect=mocked_requests_get)
+  def test_liveBoxscorePastTtl_returnsTheLastTicksResponse(self, mock_get):
+    # A live tick every 20s, with the default boxscore TTL of 10s.
+    nba_service = CachingNbaService(
+        logging.getLogger(__name__),
+        clock=self.clock,
+        stale_while_revalidate=True)
+    nba_service._executor = InlineExecutor()
+    self.addCleanup(nba_service.close)
+    previous = nba_service.boxscore('20201227', '0022000036')
+    for now in (20, 40, 60):
+      self.clock.now = now
+      self.assertIs(nba_service.boxscore('20201227', '0022000036'), previous)
+      # It was refreshed for the next tick.
+      self.assertEqual(nba_service.age('boxscore', '20201227', '0022000036'), 0)
+      boxscore = nba_service.boxscore('20201227', '0022000036')
+      self.assertIsNot(boxscore, previous)
+      previous = boxscore
+    self.assertEqual(mock_get.call_count, 4)
+
+  @patch('requests.Session.get', side_effect=mocked_requests_get)
+  def test_slowRefresh_doesNotHoldUpTheCaller(self, mock_get):
+    first = self.nba_service.teams('2020')
+    self.clock.now = 120
+    release = threading.Event()
+    self.addCleanup(release.set)
+
+    def slow_get(*args, **kwargs):
+      release.wait()
+      return mocked_requests_get(*args, **kwargs)
+    mock_get.side_effect = slow_get
+
+    # Neither call waits and only one refresh is started.
+    self.assertIs(self.nba_service.teams('2020'), first)
+    self.assertIs(self.nba_service.teams('2020'), first)
+    release.set()
+    self.nba_service._executor.shutdown(wait=True)
+    self.assertEqual(mock_get.call_count, 2)
+    self.assertEqual(self.nba_service.age('teams', '2020'), 0)
+
+  @patch('requests.Session.get', side_effect=mocked_requests_get)
+  def test_failedRefresh_keepsServingStale(self, mock_get):
+    self.nba_service._executor = InlineExecutor()
+    first = self.nba_service.teams('2020')
+    self.clock.now = 120
+    mock_get.side_effect = requests.exceptions.ConnectionError('down')
+
+    self.assertIs(self.nba_service.teams('2020'), first)
+    self.assertIs(self.nba_service.teams('2020'), first)
+    self.assertEqual(mock_get.call_count, 3)
+    self.assertEqual(self.nba_service.age('teams', '2020'), 120)
+
+  @patch('requests.Session.get', side_effect=mocked_requests_get)
+  def test_pastMaxStale_looksUpAndRaises(self, mock_get):
+    self.nba_service.teams('2020')
+    self.clock.now = 150
+    mock_get.side_effect = requests.exceptions.ConnectionError('down')
+    with self.assertRaises(requests.exceptions.ConnectionError):
+      self.nba_service.teams('2020')
+
+  def test_age_notCached(self):
+    self.assertIsNone(self.nba_service.age('teams', '2020'))
+
+
+class CircuitBreakerFallbackTest(unittest.TestCase):
+
+  def setUp(self):
+    logging.basicConfig(level=logging.CRITICAL)
+    self.clock = FakeClock()
+    logger = logging.getLogger(__name__)
+    self.nba_service = CachingNbaService(
+        logger,
+        ttls={'teams': 100},
+        clock=self.clock,
+        breakers=CircuitBreakers(logger, failure_threshold=1))
+
+  @patch('requests.Session.get', side_effect=mocked_requests_get)
+  def test_openCircuit_returnsTheCachedResponse(self, mock_get):
+    first = self.nba_service.teams('2020')
+    self.clock.now = 1000
+    mock_get.side_effect = requests.exceptions.ConnectionError('down')
+    with self.assertRaises(requests.exceptions.ConnectionError):
+      self.nba_service.teams('2020')
+
+    self.assertIs(self.nba_service.teams('2020'), first)
+    self.assertEqual(mock_get.call_count, 2)
+
+  @patch('requests.Session.get',
+         side_effect=requests.exceptions.ConnectionError('down'))
+  def test_openCircuit_nothingCached_raises(self, mock_get):
+    with self.assertRaises(requests.exceptions.ConnectionError):
+      self.nba_service.teams('2020')
+    with self.assertRaises(CircuitOpenError):
+      self.nba_service.teams('2020')
+    mock_get.assert_called_once()
+
+
+if __name__ == '__main__':
+  unittest.main()
@@ -0,0 +1,210 @@
+"""
+Per-endpoint circuit breakers for the NBA Data API.
+
+When data.nba.net is having a bad night every request to it fails, but only
+after its timeouts and retries ran out, so a tick would spend its whole time
+budget on calls that can't succeed. A CircuitBreaker watches the calls to one
+endpoint and opens after FAILURE_THRESHOLD failures in a row: calls then fail
+right away with CircuitOpenError, without making a request. After
+RESET_TIMEOUT_SECONDS it's half open and lets a single probe request through.
+The breaker closes again if the probe succeeds and stays open for another
+RESET_TIMEOUT_SECONDS if it fails.
+
+Only errors that say something about the health of the server are failures:
+connection errors, timeouts and 5xx responses. A 404 (i.e., for a box score that
+isn't up yet) is a perfectly healthy answer.
+
+CircuitBreakers keeps a breaker per endpoint and reports their health (state,
+error rate and latency of the recent calls, how often they opened) for the logs.
+"""
+
+from collections import deque
+from typing import NamedTuple, Optional
+
+import requests
+import threading
+import time
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+# How many failures in a row open a breaker.
+FAILURE_THRESHOLD = 3
+
+# How long a breaker stays open before it lets a probe request through.
+RESET_TIMEOUT_SECONDS = 30
+
+# How many of the most recent calls the health of an endpoint is based on.
+WINDOW = 20
+
+
+class CircuitOpenError(Exception):
+  """Raised instead of making a request to an endpoint whose breaker is open."""
+
+  def __init__(self, endpoint, retry_in):
+    super().__init__(
+        f'The circuit for {endpoint} is open. Retrying in {retry_in:.0f}s.')
+    self.endpoint = endpoint
+    self.retry_in = retry_in
+
+
+class EndpointHealth(NamedTuple):
+  state: str
+  # How many calls the error rate and latency are based on.
+  calls: int
+  error_rate: float
+  # The mean duration of the calls in seconds, or None if there weren't any.
+  mean_latency: Optional[float]
+  # How many times the breaker opened.
+  opened: int
+
+
+def is_failure(e):
+  """Returns whether an error raised by a request means the server is
+  unhealthy."""
+  if isinstance(e, requests.exceptions.HTTPError):
+    return e.response is None or e.response.status_code >= 500
+  return isinstance(
+      e, (requests.exceptions.ConnectionError, requests.exceptions.Timeout))
+
+
+class CircuitBreaker:
+
+  def __init__(
+      self,
+      endpoint,
+      logger,
+      failure_threshold=FAILURE_THRESHOLD,
+      reset_timeout=RESET_TIMEOUT_SECONDS,
+      window=WINDOW,
+      clock=time.monotonic):
+    """
+    Parameters
+    ----------
+    endpoint: str
+      The name of the NbaService method the breaker guards, for logs.
+    logger: logging.Logger
+    failure_threshold: int
+      How many failures in a row open the breaker.
+    reset_timeout: float
+      How many seconds the breaker stays open before a probe.
+    window: int
+      How many of the most recent calls health() is based on.
+    clock: function
+      Returns the current time in seconds. Only meant to be replaced in tests.
+    """
+    self.endpoint = endpoint
+    self.logger = logger
+    self.failure_threshold = failure_threshold
+    self.reset_timeout = reset_timeout
+    self.state = CLOSED
+    self.opened = 0
+    self._clock = clock
+    self._failures = 0
+    self._opened_at = None
+    self._probing = False
+    # (succeeded, duration in seconds) of the most recent calls.
+    self._calls = deque(maxlen=window)
+    self._lock = threading.Lock()
+
+  def call(self, func):
+    """Returns func(), or raises CircuitOpenError without calling it if the
+    breaker is open.
+
+    Parameters
+    ----------
+    func: function
+      Makes the request. Called without any arguments.
+    """
+    self._before_call()
+    start = self._clock()
+    succeeded = False
+    try:
+      value = func()
+      succeeded = True
+      return value
+    except Exception as e:
+      succeeded = not is_failure(e)
+      raise
+    finally:
+      self._record(succeeded, self._clock() - start)
+
+  def health(self):
+    with self._lock:
+      calls = list(self._calls)
+      state = self.state
+      opened = self.opened
+    if not calls:
+      return EndpointHealth(state, 0, 0.0, None, opened)
+    errors = sum(1 for succeeded, _ in calls if not succeeded)
+    latency = sum(duration for _, duration in calls) / len(calls)
+    return EndpointHealth(
+        state, len(calls), errors / len(calls), latency, opened)
+
+  def _before_call(self):
+    with self._lock:
+      if self.state == OPEN:
+        retry_in = self._opened_at + self.reset_timeout - self._clock()
+        if retry_in > 0:
+          raise CircuitOpenError(self.endpoint, retry_in)
+        self._transition(HALF_OPEN)
+      if self.state == HALF_OPEN:
+        # Only one probe at a time.
+        if self._probing:
+          raise CircuitOpenError(self.endpoint, 0)
+        self._probing = True
+
+  def _record(self, succeeded, duration):
+    with self._lock:
+      self._calls.append((succeeded, duration))
+      self._probing = False
+      if succeeded:
+        self._failures = 0
+        if self.state != CLOSED:
+          self._transition(CLOSED)
+        return
+      self._failures += 1
+      if self.state == HALF_OPEN or self._failures >= self.failure_threshold:
+        self._opened_at = self._clock()
+        if self.state != OPEN:
+          self.opened += 1
+          self._transition(OPEN)
+
+  def _transition(self, state):
+    self.logger.warning(
+        f'Circuit for {self.endpoint}: {self.state} -> {state}.')
+    self.state = state
+
+
+class CircuitBreakers:
+  """A CircuitBreaker for each endpoint, created the first time it's used."""
+
+  def __init__(self, logger, **kwargs):
+    """
+    Parameters
+    ----------
+    logger: logging.Logger
+    kwargs:
+      Passed on to every CircuitBreaker, i.e., failure_threshold.
+    """
+    self.logger = logger
+    self._kwargs = kwargs
+    self._breakers = dict()
+    self._lock = threading.Lock()
+
+  def get(self, endpoint):
+    with self._lock:
+      if endpoint not in self._breakers:
+        self._breakers[endpoint] = CircuitBreaker(
+            endpoint, self.logger, **self._kwargs)
+      return self._breakers[endpoint]
+
+  def call(self, endpoint, func):
+    return self.get(endpoint).call(func)
+
+  def health(self):
+    """Returns a dict of endpoint name to its EndpointHealth."""
+    with self._lock:
+      breakers = sorted(self._breakers.items())
+    return {endpoint: breaker.health() for endpoint, breaker in breakers}
@@ -0,0 +1,133 @@
+from services.circuit_breaker import (
+    CLOSED, HALF_OPEN, OPEN, CircuitBreaker, CircuitBreakers, CircuitOpenError,
+    EndpointHealth)
+from unittest.mock import MagicMock
+
+import logging.config
+import requests
+import unittest
+
+
+class FakeClock:
+
+  def __init__(self):
+    self.now = 0
+
+  def __call__(self):
+    return self.now
+
+
+def http_error(status_code):
+  response = requests.Response()
+  response.status_code = status_code
+  return requests.exceptions.HTTPError(response=response)
+
+
+class CircuitBreakerTest(unittest.TestCase):
+
+  def setUp(self):
+    logging.basicConfig(level=logging.ERROR)
+    self.clock = FakeClock()
+    self.breaker = CircuitBreaker(
+        'boxscore',
+        logging.getLogger(__name__),
+        failure_threshold=2,
+        reset_timeout=30,
+        clock=self.clock)
+    self.down = MagicMock(
+        side_effect=requests.exceptions.ConnectionError('down'))
+
+  def fail_calls(self, times=1):
+    for _ in range(times):
+      with self.assertRaises(requests.exceptions.ConnectionError):
+        self.breaker.call(self.down)
+
+  def test_call_returnsTheResult(self):
+    self.assertEqual(self.breaker.call(lambda: 42), 42)
+    self.assertEqual(self.breaker.state, CLOSED)
+
+  def test_repeatedFailures_openAndFailFast(self):
+    self.fail_calls(2)
+    self.assertEqual(self.breaker.state, OPEN)
+    with self.assertRaises(CircuitOpenError):
+      self.breaker.call(self.down)
+    self.assertEqual(self.down.call_count, 2)
+
+  def test_successInBetween_resetsTheFailures(self):
+    self.fail_calls()
+    self.breaker.call(lambda: 42)
+    self.fail_calls()
+    self.assertEqual(self.breaker.state, CLOSED)
+
+  def test_clientErrors_areNotFailures(self):
+    not_found = MagicMock(side_effect=http_error(404))
+    for _ in range(3):
+      with self.assertRaises(requests.exceptions.HTTPError):
+        self.breaker.call(not_found)
+    self.assertEqual(self.breaker.state, CLOSED)
+
+  def test_serverErrors_areFailures(self):
+    unavailable = MagicMock(side_effect=http_error(503))
+    for _ in range(2):
+      with self.assertRaises(requests.exceptions.HTTPError):
+        self.breaker.call(unavailable)
+    self.assertEqual(self.breaker.state, OPEN)
+
+  def test_afterResetTimeout_successfulProbeCloses(self):
+    self.fail_calls(2)
+    self.clock.now = 30
+    self.assertEqual(self.breaker.call(lambda: 42), 42)
+    self.assertEqual(self.breaker.state, CLOSED)
+
+  def test_afterResetTimeout_failedProbeOpensAgain(self):
+    self.fail_calls(2)
+    self.clock.now = 30
+    self.fail_calls()
+    self.assertEqual(self.breaker.state, OPEN)
+    self.clock.now = 59
+    with self.assertRaises(CircuitOpenError):
+      self.breaker.call(self.down)
+    self.assertEqual(self.down.call_count, 3)
+
+  def test_halfOpen_onlyOneProbeAtATime(self):
+    self.fail_calls(2)
+    self.clock.now = 30
+
+    def probe():
+      self.assertEqual(self.breaker.state, HALF_OPEN)
+      with self.assertRaises(CircuitOpenError):
+        self.breaker.call(lambda: 0)
+      return 42
+    self.assertEqual(self.breaker.call(probe), 42)
+    self.assertEqual(self.breaker.state, CLOSED)
+
+  def test_health(self):
+    self.assertEqual(
+        self.breaker.health(), EndpointHealth(CLOSED, 0, 0.0, None, 0))
+
+    def slow():
+      self.clock.now += 2
+      return 42
+    self.breaker.call(slow)
+    self.fail_calls(2)
+    self.assertEqual(
+        self.breaker.health(), EndpointHealth(OPEN, 3, 2 / 3, 2 / 3, 1))
+
+
+class CircuitBreakersTest(unittest.TestCase):
+
+  def test_oneBreakerPerEndpoint(self):
+    breakers = CircuitBreakers(
+        logging.getLogger(__name__), failure_threshold=1)
+    with self.assertRaises(requests.exceptions.Timeout):
+      breakers.call('boxscore', MagicMock(
+          side_effect=requests.exceptions.Timeout('slow')))
+    self.assertEqual(breakers.call('teams', lambda: 42), 42)
+    self.assertIs(breakers.get('boxscore'), breakers.get('boxscore'))
+    self.assertEqual(
+        {e: h.state for e, h in breakers.health().items()},
+        {'boxscore': OPEN, 'teams': CLOSED})
+
+
+if __name__ == '__main__':
+  unittest.main()
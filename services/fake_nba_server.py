@@ -0,0 +1,89 @@
+"""
+A local HTTP server that stands in for the NBA Data API in tests. It answers
+every request with the file in services/testdata that has the same name as the
+last part of the requested path (i.e., /prod/v1/2020/players.json is answered
+with services/testdata/players.json) and 404s otherwise.
+
+It can optionally delay each response to simulate a slow upstream.
+"""
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import os.path
+import threading
+import time
+
+TESTDATA_DIR = os.path.join(os.path.dirname(__file__), 'testdata')
+
+
+class FakeNbaServer:
+
+  def __init__(self, delay=0):
+    """
+    Parameters
+    ----------
+    delay: float or function
+      Seconds to wait before answering each request. It may also be a function
+      that takes the requested path and returns the number of seconds.
+    """
+    self.delay = delay
+    self.requests = []
+    self._lock = threading.Lock()
+    self._server = ThreadingHTTPServer(('127.0.0.1', 0), self._handler_class())
+    self._server.daemon_threads = True
+    self._thread = None
+
+  @property
+  def host(self):
+    return f'http://127.0.0.1:{self._server.server_address[1]}'
+
+  def start(self):
+    self._thread = threading.Thread(
+        target=self._server.serve_forever, daemon=True)
+    self._thread.start()
+    return self
+
+  def stop(self):
+    self._server.shutdown()
+    self._server.server_close()
+    self._thread.join()
+
+  def __enter__(self):
+    return self.start()
+
+  def __exit__(self, *exc_info):
+    self.stop()
+
+  def _record(self, path):
+    with self._lock:
+      self.requests.append(path)
+
+  def _delay_for(self, path):
+    return self.delay(path) if callable(self.delay) else self.delay
+
+  def _handler_class(self):
+    server = self
+
+    class Handler(BaseHTTPRequestHandler):
+
+      def do_GET(self):
+        server._record(self.path)
+        delay = server._delay_for(self.path)
+        if delay:
+          time.sleep(delay)
+        file_name = os.path.join(TESTDATA_DIR, self.path.split('/')[-1])
+        if not os.path.isfile(file_name):
+          self.send_error(404)
+          return
+        with open(file_name, 'rb') as f:
+          content = f.read()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+      def log_message(self, format, *args):
+        pass
+
+    return Handler
@@ -3,14 +3,29 @@ An implementation of NbaService that returns fake data.
 """
 
 from services.nba_service import NbaService
+from services.player_index import PlayerIndex
+from services.remaining_games import RemainingGames
 
 import json
+import logging
+
+
+class OfflineSession:
+  """A stand-in for requests.Session that never goes to the network."""
+
+  def get(self, url, **kwargs):
+    raise RuntimeError(f'FakeNbaService does not make requests: {url}')
+
+  def close(self):
+    pass
 
 
 class FakeNbaService(NbaService):
 
   def __init__(self, logger=None):
-    pass
+    super().__init__(
+        logger if logger is not None else logging.getLogger(__name__),
+        session=OfflineSession())
 
   def boxscore(self, start_date_est, game_id):
     return self._json(f'{game_id}_boxscore.json')
@@ -21,9 +36,18 @@ class FakeNbaService(NbaService):
   def current_year(self):
     return '2020'
 
+  def player_index(self, year):
+    with open('services/testdata/all_players.json', 'rb') as f:
+      return PlayerIndex.parse(f.read())
+
   def players(self, year):
     return self._json('all_players.json')['league']['standard']
 
+  def remaining_games(self, year):
+    # The Knicks schedule has the same layout as the league schedule.
+    with open('services/testdata/schedule.json', 'rb') as f:
+      return RemainingGames.parse(f.read())
+
   def roster(self, team, year):
     data = self._json(f'{team}_roster.json')
     return set(
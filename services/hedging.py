@@ -0,0 +1,161 @@
+"""
+Hedged requests for the live box score.
+
+During a live game the box score is the one request whose tail latency decides
+how stale the game thread looks. A HedgingPolicy times every call it makes and,
+once it has seen MIN_SAMPLES of them, fires one duplicate request whenever a
+call takes longer than the 95th percentile of the recent ones. Whichever request
+answers first wins. The other one is cancelled if it hasn't started yet and
+otherwise left to finish in the background, its response thrown away.
+
+Hedges are extra load on the NBA Data API, so they're paid for out of a budget:
+every call earns HEDGE_BUDGET of a hedge, up to MAX_BURST saved up, and a call
+that would hedge without a whole one just keeps waiting. Over time no more than
+HEDGE_BUDGET extra requests per call are made.
+"""
+
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+import math
+import threading
+import time
+
+# How many of the most recent latencies the hedging delay is computed from, and
+# how many are needed before any request is hedged.
+WINDOW = 100
+MIN_SAMPLES = 20
+
+# The latency percentile after which a duplicate request is fired.
+PERCENTILE = 0.95
+
+# Extra requests per call, and how many unused hedges can be saved up.
+HEDGE_BUDGET = 0.1
+MAX_BURST = 3
+
+# Threads that make the requests. Each call needs at most two.
+WORKERS = 4
+
+
+class HedgingStats:
+
+  def __init__(self):
+    self.calls = 0
+    self.hedged = 0
+    # Calls the duplicate request answered first.
+    self.hedge_wins = 0
+    # Calls that would have hedged but the budget was spent.
+    self.over_budget = 0
+
+  def __repr__(self):
+    return (f'calls={self.calls} hedged={self.hedged} '
+            f'hedge_wins={self.hedge_wins} over_budget={self.over_budget}')
+
+
+class HedgingPolicy:
+
+  def __init__(
+      self,
+      logger,
+      percentile=PERCENTILE,
+      budget=HEDGE_BUDGET,
+      max_burst=MAX_BURST,
+      window=WINDOW,
+      min_samples=MIN_SAMPLES,
+      clock=time.monotonic):
+    """
+    Parameters
+    ----------
+    logger: logging.Logger
+    percentile: float
+      The latency percentile after which a request is hedged.
+    budget: float
+      How many hedges each call earns.
+    max_burst: float
+      How many unused hedges can be saved up.
+    window: int
+      How many of the most recent latencies the percentile is computed from.
+    min_samples: int
+      How many latencies are needed before any request is hedged.
+    clock: function
+      Returns the current time in seconds.
+    """
+    self.logger = logger
+    self.percentile = percentile
+    self.budget = budget
+    self.max_burst = max_burst
+    self.min_samples = min_samples
+    self.stats = HedgingStats()
+    self._clock = clock
+    self._latencies = deque(maxlen=window)
+    self._tokens = 0.0
+    self._lock = threading.Lock()
+    self._executor = ThreadPoolExecutor(
+        max_workers=WORKERS, thread_name_prefix='hedge')
+
+  def close(self):
+    self._executor.shutdown(wait=False, cancel_futures=True)
+
+  def delay(self):
+    """Returns how many seconds a call waits for its first request before
+    hedging it, or None if there aren't enough latencies to tell yet."""
+    with self._lock:
+      if len(self._latencies) < self.min_samples:
+        return None
+      latencies = sorted(self._latencies)
+    return latencies[math.ceil(self.percentile * len(latencies)) - 1]
+
+  def record(self, latency):
+    with self._lock:
+      self._latencies.append(latency)
+
+  def call(self, func):
+    """Returns func(), calling it a second time if the first call takes longer
+    than delay() and the budget allows.
+
+    Parameters
+    ----------
+    func: function
+      Makes the request. Called without any arguments, possibly twice at the
+      same time, so it must be thread safe.
+    """
+    with self._lock:
+      self.stats.calls += 1
+      self._tokens = min(self.max_burst, self._tokens + self.budget)
+    delay = self.delay()
+    first = self._executor.submit(self._timed, func)
+    if delay is None or wait([first], timeout=delay).done:
+      return first.result()
+
+    if not self._spend():
+      return first.result()
+    self.logger.info(f'No answer after {delay:.3f}s. Hedging the request.')
+    second = self._executor.submit(self._timed, func)
+    pending = {first, second}
+    while pending:
+      done, pending = wait(pending, return_when=FIRST_COMPLETED)
+      winner = next((f for f in done if f.exception() is None), None)
+      if winner is not None:
+        for f in pending:
+          f.cancel()
+        if winner is second:
+          with self._lock:
+            self.stats.hedge_wins += 1
+        return winner.result()
+    # Both failed.
+    return first.result()
+
+  def _spend(self):
+    with self._lock:
+      if self._tokens < 1:
+        self.stats.over_budget += 1
+        return False
+      self._tokens -= 1
+      self.stats.hedged += 1
+      return True
+
+  def _timed(self, func):
+    start = self._clock()
+    value = func()
+    self.record(self._clock() - start)
+    return value
@@ -0,0 +1,133 @@
+from services.caching_nba_service import CachingNbaService
+from services.fake_nba_server import FakeNbaServer
+from services.hedging import HedgingPolicy
+from services.nba_service import NbaService
+
+import itertools
+import logging.config
+import time
+import unittest
+
+SLOW_SECONDS = 1
+
+
+class HedgingPolicyTest(unittest.TestCase):
+
+  def setUp(self):
+    logging.basicConfig(level=logging.ERROR)
+    self.policy = HedgingPolicy(
+        logging.getLogger(__name__), budget=1, max_burst=1, min_samples=20)
+    self.addCleanup(self.policy.close)
+
+  def test_delay_isThe95thPercentile(self):
+    for latency in range(1, 20):
+      self.policy.record(latency / 100)
+    self.assertIsNone(self.policy.delay())
+    self.policy.record(0.2)
+    self.assertEqual(self.policy.delay(), 0.19)
+
+  def test_call_fastFirstRequest_isNotHedged(self):
+    calls = []
+    self.assertEqual(self.policy.call(lambda: calls.append(1) or 42), 42)
+    self.assertEqual(len(calls), 1)
+    self.assertEqual(self.policy.stats.hedged, 0)
+
+
+class HedgedBoxscoreTest(unittest.TestCase):
+
+  def setUp(self):
+    logging.basicConfig(level=logging.ERROR)
+    # Only the first box score request is slow.
+    requests = itertools.count()
+    self.server = FakeNbaServer(
+        delay=lambda path: SLOW_SECONDS if next(requests) == 0 else 0).start()
+    self.policy = HedgingPolicy(
+        logging.getLogger(__name__), budget=1, max_burst=1, min_samples=20)
+    for _ in range(20):
+      self.policy.record(0.05)
+    self.nba_service = NbaService(
+        logging.getLogger(__name__),
+        host=self.server.host,
+        hedging=self.policy)
+
+  def tearDown(self):
+    self.nba_service.close()
+    self.server.stop()
+
+  def test_boxscore_slowRequest_isHedged(self):
+    start = time.monotonic()
+    boxscore = self.nba_service.boxscore('20201227', '0022000036')
+    elapsed = time.monotonic() - start
+
+    self.assertEqual(boxscore['basicGameData']['gameId'], '0022000036')
+    self.assertEqual(len(self.server.requests), 2)
+    self.assertLess(elapsed, SLOW_SECONDS / 2)
+    self.assertEqual(self.policy.stats.hedged, 1)
+    self.assertEqual(self.policy.stats.hedge_wins, 1)
+
+  def test_boxscore_overBudget_waitsForTheFirstRequest(self):
+    self.policy.budget = 0
+    start = time.monotonic()
+    self.nba_service.boxscore('20201227', '0022000036')
+    elapsed = time.monotonic() - start
+
+    self.assertEqual(len(self.server.requests), 1)
+    self.assertGreaterEqual(elapsed, SLOW_SECONDS)
+    self.assertEqual(self.policy.stats.hedged, 0)
+    self.assertEqual(self.policy.stats.over_budget, 1)
+
+
+class FakeClock:
+
+  def __init__(self):
+    self.now = 0
+
+  def __call__(self):
+    return self.now
+
+
+class HedgedCachedBoxscoreTest(unittest.TestCase):
+  """The daemon's setup: a stale-while-revalidate cache in front of a hedged
+  box score."""
+
+  def setUp(self):
+    logging.basicConfig(level=logging.ERROR)
+    # Only the second box score request, the first refresh, is slow.
+    requests = itertools.count()
+    self.server = FakeNbaServer(
+        delay=lambda path: SLOW_SECONDS if next(requests) == 1 else 0).start()
+    self.policy = HedgingPolicy(
+        logging.getLogger(__name__), budget=1, max_burst=1, min_samples=20)
+    for _ in range(20):
+      self.policy.record(0.05)
+    self.clock = FakeClock()
+    self.nba_service = CachingNbaService(
+        logging.getLogger(__name__),
+        host=self.server.host,
+        clock=self.clock,
+        stale_while_revalidate=True,
+        hedging=self.policy)
+
+  def tearDown(self):
+    self.nba_service.close()
+    self.server.stop()
+
+  def test_expiredBoxscore_isRefreshedByTheHedgedRequest(self):
+    first = self.nba_service.boxscore('20201227', '0022000036')
+    # The next live tick, past the box score's time-to-live.
+    self.clock.now = 20
+    start = time.monotonic()
+    self.assertIs(self.nba_service.boxscore('20201227', '0022000036'), first)
+    # Wait for the refresh in the background.
+    self.nba_service._executor.shutdown(wait=True)
+    elapsed = time.monotonic() - start
+
+    self.assertIsNot(self.nba_service.boxscore('20201227', '0022000036'), first)
+    self.assertEqual(
+        self.nba_service.age('boxscore', '20201227', '0022000036'), 0)
+    self.assertEqual(len(self.server.requests), 3)
+    self.assertLess(elapsed, SLOW_SECONDS / 2)
+    self.assertEqual(self.policy.stats.hedge_wins, 1)
+
+if __name__ == '__main__':
+  unittest.main()
@@ -0,0 +1,391 @@
+"""
+Compact, immutable records for the parts of the NBA Data API responses that the
+bots actually use.
+
+The raw responses are deeply nested dicts with many more fields than the bots
+need, and every number in them is a string. The from_json functions in this
+module walk a response once, keep only the fields the renderers read and parse
+the fields that are compared or added up (scores, wins, losses, periods, etc.)
+into ints. Counting stats that are only ever printed (i.e., field goals made)
+are kept as the strings from the feed so they don't have to be converted back.
+Team ids and tricodes are interned because they're compared and used as dict
+keys over and over.
+
+Every record is a NamedTuple, which has no per-instance __dict__ (its __slots__
+is empty) and can't be modified. Use _replace to derive a changed copy.
+"""
+
+from datetime import datetime
+from typing import NamedTuple, Optional, Tuple
+
+import dateutil.parser
+import sys
+
+# ScheduleGame.season_stage_id of preseason games.
+PRESEASON = 1
+
+# ScheduleGame.status of a game that is over.
+STATUS_FINAL = 3
+
+
+class Team(NamedTuple):
+  team_id: str
+  tricode: str
+  full_name: str
+  nickname: str
+  url_name: str
+
+  @staticmethod
+  def from_json(team):
+    return Team(
+        team_id=sys.intern(team['teamId']),
+        tricode=sys.intern(team['tricode']),
+        full_name=team['fullName'],
+        nickname=team['nickname'],
+        url_name=team['urlName'])
+
+
+def team_map(teams):
+  """Converts the teamId -> team dict returned by NbaService.teams into a
+  teamId -> Team dict."""
+  return {team_id: Team.from_json(team) for team_id, team in teams.items()}
+
+
+class ScheduleTeam(NamedTuple):
+  team_id: str
+  # None until the game starts.
+  score: Optional[int]
+
+
+class ScheduleGame(NamedTuple):
+  game_id: str
+  game_url_code: str
+  start_date_eastern: str
+  start_time: datetime
+  is_home_team: bool
+  season_stage_id: int
+  status: int
+  home: ScheduleTeam
+  road: ScheduleTeam
+
+  @staticmethod
+  def from_json(game):
+    return ScheduleGame(
+        game_id=game['gameId'],
+        game_url_code=game['gameUrlCode'],
+        start_date_eastern=game['startDateEastern'],
+        start_time=dateutil.parser.parse(game['startTimeUTC']),
+        is_home_team=game['isHomeTeam'],
+        season_stage_id=game['seasonStageId'],
+        status=game['statusNum'],
+        home=_schedule_team(game['hTeam']),
+        road=_schedule_team(game['vTeam']))
+
+  @property
+  def knicks(self):
+    return self.home if self.is_home_team else self.road
+
+  @property
+  def opponent(self):
+    return self.road if self.is_home_team else self.home
+
+  @property
+  def has_score(self):
+    return self.home.score is not None or self.road.score is not None
+
+  @property
+  def is_final(self):
+    return self.status == STATUS_FINAL
+
+
+class Schedule(NamedTuple):
+  games: Tuple[ScheduleGame, ...]
+
+  @staticmethod
+  def from_json(schedule):
+    """Converts the response of NbaService.schedule."""
+    return Schedule(
+        games=tuple(map(ScheduleGame.from_json, schedule['league']['standard'])))
+
+
+class StandingsRow(NamedTuple):
+  team_id: str
+  win: int
+  loss: int
+  loss_pct: float
+  # Printed as is, i.e., '0' or '1.5'.
+  games_behind: str
+
+  @staticmethod
+  def from_json(row):
+    return StandingsRow(
+        team_id=sys.intern(row['teamId']),
+        win=int(row['win']),
+        loss=int(row['loss']),
+        loss_pct=float(row['lossPct']),
+        games_behind=row['gamesBehind'])
+
+
+class Standings(NamedTuple):
+  east: Tuple[StandingsRow, ...]
+  west: Tuple[StandingsRow, ...]
+
+  @staticmethod
+  def from_json(standings):
+    """Converts the response of NbaService.conference_standings."""
+    conference = standings['conference']
+    return Standings(
+        east=tuple(map(StandingsRow.from_json, conference['east'])),
+        west=tuple(map(StandingsRow.from_json, conference['west'])))
+
+
+class Arena(NamedTuple):
+  name: str
+  city: str
+  state: str
+  country: str
+
+
+class Broadcasters(NamedTuple):
+  """The name of the first TV broadcaster of each kind, or None."""
+  national: Optional[str]
+  home: Optional[str]
+  road: Optional[str]
+
+
+class BoxscoreTeam(NamedTuple):
+  team_id: str
+  tricode: str
+  win: int
+  loss: int
+  # None until the game starts.
+  score: Optional[int]
+  # Points scored in each period so far, including overtime.
+  linescore: Tuple[int, ...]
+
+  @staticmethod
+  def from_json(team):
+    return BoxscoreTeam(
+        team_id=sys.intern(team['teamId']),
+        tricode=sys.intern(team['triCode']),
+        win=int(team['win']),
+        loss=int(team['loss']),
+        score=_optional_int(team['score']),
+        linescore=tuple(int(p['score']) for p in team['linescore']))
+
+
+class TeamTotals(NamedTuple):
+  points: str
+  fgm: str
+  fga: str
+  fgp: str
+  tpm: str
+  tpa: str
+  tpp: str
+  ftm: str
+  fta: str
+  ftp: str
+  off_reb: str
+  tot_reb: str
+  assists: str
+  p_fouls: str
+  steals: str
+  turnovers: str
+  blocks: str
+
+  @staticmethod
+  def from_json(totals):
+    return TeamTotals(
+        points=totals['points'],
+        fgm=totals['fgm'],
+        fga=totals['fga'],
+        fgp=totals['fgp'],
+        tpm=totals['tpm'],
+        tpa=totals['tpa'],
+        tpp=totals['tpp'],
+        ftm=totals['ftm'],
+        fta=totals['fta'],
+        ftp=totals['ftp'],
+        off_reb=totals['offReb'],
+        tot_reb=totals['totReb'],
+        assists=totals['assists'],
+        p_fouls=totals['pFouls'],
+        steals=totals['steals'],
+        turnovers=totals['turnovers'],
+        blocks=totals['blocks'])
+
+
+class Leader(NamedTuple):
+  value: str
+  name: str
+
+  @staticmethod
+  def from_json(leader):
+    players = leader['players']
+    name = f'{players[0]["firstName"]} {players[0]["lastName"]}' \
+        if players else ''
+    return Leader(value=leader['value'], name=name)
+
+
+class TeamStats(NamedTuple):
+  totals: TeamTotals
+  biggest_lead: Optional[int]
+  longest_run: str
+  points_in_paint: str
+  points_off_turnovers: str
+  fast_break_points: str
+  points_leader: Leader
+  rebounds_leader: Leader
+  assists_leader: Leader
+
+  @staticmethod
+  def from_json(stats):
+    leaders = stats['leaders']
+    return TeamStats(
+        totals=TeamTotals.from_json(stats['totals']),
+        biggest_lead=_optional_int(stats['biggestLead']),
+        longest_run=stats['longestRun'],
+        points_in_paint=stats['pointsInPaint'],
+        points_off_turnovers=stats['pointsOffTurnovers'],
+        fast_break_points=stats['fastBreakPoints'],
+        points_leader=Leader.from_json(leaders['points']),
+        rebounds_leader=Leader.from_json(leaders['rebounds']),
+        assists_leader=Leader.from_json(leaders['assists']))
+
+
+class PlayerLine(NamedTuple):
+  """One player's line in the box score. Every stat is an empty string for
+  players that didn't play."""
+  person_id: str
+  team_id: str
+  first_name: str
+  last_name: str
+  # Only starters have a position.
+  pos: str
+  min: str
+  fgm: str
+  fga: str
+  tpm: str
+  tpa: str
+  ftm: str
+  fta: str
+  off_reb: str
+  def_reb: str
+  tot_reb: str
+  assists: str
+  steals: str
+  blocks: str
+  turnovers: str
+  p_fouls: str
+  plus_minus: Optional[int]
+  points: str
+
+  @staticmethod
+  def from_json(player):
+    return PlayerLine(
+        person_id=player['personId'],
+        team_id=sys.intern(player['teamId']),
+        first_name=player['firstName'],
+        last_name=player['lastName'],
+        pos=player['pos'],
+        min=player['min'],
+        fgm=player['fgm'],
+        fga=player['fga'],
+        tpm=player['tpm'],
+        tpa=player['tpa'],
+        ftm=player['ftm'],
+        fta=player['fta'],
+        off_reb=player['offReb'],
+        def_reb=player['defReb'],
+        tot_reb=player['totReb'],
+        assists=player['assists'],
+        steals=player['steals'],
+        blocks=player['blocks'],
+        turnovers=player['turnovers'],
+        p_fouls=player['pFouls'],
+        plus_minus=_optional_int(player['plusMinus']),
+        points=player['points'])
+
+  @property
+  def name(self):
+    return f'{self.first_name} {self.last_name}'
+
+
+class BoxscoreStats(NamedTuple):
+  home: TeamStats
+  road: TeamStats
+  players: Tuple[PlayerLine, ...]
+
+
+class Boxscore(NamedTuple):
+  game_id: str
+  start_date_eastern: str
+  start_time: datetime
+  period: int
+  arena: Arena
+  attendance: str
+  officials: Tuple[str, ...]
+  duration_hours: str
+  duration_minutes: str
+  broadcasters: Broadcasters
+  home: BoxscoreTeam
+  road: BoxscoreTeam
+  # None until the players are announced (about an hour before tip off).
+  stats: Optional[BoxscoreStats]
+
+  @staticmethod
+  def from_json(boxscore):
+    """Converts the response of NbaService.boxscore."""
+    data = boxscore['basicGameData']
+    arena = data['arena']
+    broadcasters = data['watch']['broadcast']['broadcasters']
+    return Boxscore(
+        game_id=data['gameId'],
+        start_date_eastern=data['startDateEastern'],
+        start_time=dateutil.parser.parse(data['startTimeUTC']),
+        period=int(data['period']['current']),
+        arena=Arena(
+            name=arena['name'],
+            city=arena['city'],
+            state=arena['stateAbbr'],
+            country=arena['country']),
+        attendance=data['attendance'],
+        officials=tuple(
+            o['firstNameLastName'] for o in data['officials']['formatted']),
+        duration_hours=data['gameDuration']['hours'],
+        duration_minutes=data['gameDuration']['minutes'],
+        broadcasters=Broadcasters(
+            national=_broadcaster(broadcasters, 'national'),
+            home=_broadcaster(broadcasters, 'hTeam'),
+            road=_broadcaster(broadcasters, 'vTeam')),
+        home=BoxscoreTeam.from_json(data['hTeam']),
+        road=BoxscoreTeam.from_json(data['vTeam']),
+        stats=_boxscore_stats(boxscore))
+
+
+def _boxscore_stats(boxscore):
+  stats = boxscore.get('stats')
+  if stats is None or 'activePlayers' not in stats:
+    return None
+  return BoxscoreStats(
+      home=TeamStats.from_json(stats['hTeam']),
+      road=TeamStats.from_json(stats['vTeam']),
+      players=tuple(map(PlayerLine.from_json, stats['activePlayers'])))
+
+
+def _broadcaster(broadcasters, kind):
+  broadcaster = broadcasters.get(kind)
+  return broadcaster[0]['longName'] if broadcaster else None
+
+
+def _schedule_team(team):
+  return ScheduleTeam(
+      team_id=sys.intern(team['teamId']), score=_optional_int(team['score']))
+
+
+def _optional_int(value):
+  """Parses a number from the feed, which uses an empty string for missing
+  values."""
+  if value is None or value == '':
+    return None
+  return int(value)
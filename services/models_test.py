@@ -0,0 +1,77 @@
+from services.fake_nba_service import FakeNbaService
+from services.models import Boxscore, Schedule, Standings, team_map
+
+import unittest
+
+KNICKS_ID = '1610612752'
+
+
+class ModelsTest(unittest.TestCase):
+
+  def setUp(self):
+    self.nba_service = FakeNbaService()
+
+  def test_boxscore(self):
+    boxscore = Boxscore.from_json(
+        self.nba_service.boxscore('20201227', '0022000036'))
+    self.assertEqual(boxscore.home.team_id, KNICKS_ID)
+    self.assertEqual(boxscore.home.tricode, 'NYK')
+    self.assertEqual((boxscore.home.win, boxscore.home.loss), (1, 2))
+    self.assertEqual(boxscore.home.score, 130)
+    self.assertEqual(boxscore.home.linescore, (30, 31, 35, 34))
+    self.assertEqual(boxscore.road.score, 110)
+    self.assertEqual(boxscore.period, 4)
+    self.assertEqual(boxscore.arena.city, 'New York')
+    self.assertEqual(boxscore.officials,
+                     ('Scott Wall', 'Zach Zarba', 'Evan Scott'))
+    self.assertEqual(boxscore.stats.home.points_leader.name, 'Julius Randle')
+    self.assertEqual(boxscore.stats.home.biggest_lead, 28)
+
+    randle = next(p for p in boxscore.stats.players if p.last_name == 'Randle')
+    self.assertEqual(randle.name, 'Julius Randle')
+    self.assertEqual(randle.plus_minus, 12)
+    self.assertEqual(randle.points, '29')
+
+    # Players that didn't play have no plus minus.
+    knox = next(p for p in boxscore.stats.players if p.last_name == 'Knox II')
+    self.assertIsNone(knox.plus_minus)
+
+  def test_boxscore_withoutPlayers(self):
+    raw = self.nba_service.boxscore('20201227', '0022000036')
+    del raw['stats']
+    raw['basicGameData']['hTeam']['score'] = ''
+    boxscore = Boxscore.from_json(raw)
+    self.assertIsNone(boxscore.stats)
+    self.assertIsNone(boxscore.home.score)
+
+  def test_schedule(self):
+    schedule = Schedule.from_json(self.nba_service.schedule('knicks', '2020'))
+    game = schedule.games[0]
+    self.assertEqual(game.game_url_code, '20201211/NYKDET')
+    self.assertEqual(game.start_time.isoformat(), '2020-12-12T00:00:00+00:00')
+    self.assertEqual(game.knicks.score, 90)
+    self.assertEqual(game.opponent.score, 84)
+    self.assertTrue(game.has_score)
+    self.assertFalse(schedule.games[-1].has_score)
+
+  def test_standings(self):
+    standings = Standings.from_json(self.nba_service.conference_standings())
+    self.assertEqual(len(standings.east), 15)
+    self.assertEqual(standings.east[0].win, 49)
+    self.assertAlmostEqual(standings.east[0].loss_pct, 0.258)
+
+  def test_teams(self):
+    teams = team_map(self.nba_service.teams('2020'))
+    self.assertEqual(teams[KNICKS_ID].full_name, 'New York Knicks')
+    self.assertEqual(teams[KNICKS_ID].url_name, 'knicks')
+
+  def test_recordsAreImmutable(self):
+    teams = team_map(self.nba_service.teams('2020'))
+    with self.assertRaises(AttributeError):
+      teams[KNICKS_ID].nickname = 'Nets'
+    with self.assertRaises(AttributeError):
+      teams[KNICKS_ID].__dict__
+
+
+if __name__ == '__main__':
+  unittest.main()
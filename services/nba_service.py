@@ -2,21 +2,154 @@
 Provides a facade class around the NBA Data APIs. It makes network calls to look
 up NBA data and returns their responses. It encapsulates details around forming
 the correct request URLs and marshalling JSON responses into python objects.
+
+All requests go through a single pooled requests.Session so that connections to
+data.nba.net are kept alive between calls. Every endpoint has its own connect and
+read timeouts and failed requests are retried a bounded number of times with a
+jittered exponential backoff, which puts a hard upper bound on how long any one
+call (and therefore a scheduler tick) can take.
+
+When given a ResponseStore, requests are made conditional on the stored ETag and
+Last-Modified validators and a "304 Not Modified" response is answered from the
+store instead of downloading and parsing the same payload again.
+
+When given CircuitBreakers, every endpoint's requests go through its own circuit
+breaker (see circuit_breaker.py) so that calls to an endpoint that keeps failing
+fail right away instead of waiting for their timeouts and retries.
+
+When given a HedgingPolicy, a box score request that takes longer than usual is
+sent a second time and the first answer is used (see hedging.py).
 """
 
-import json
+from requests.adapters import HTTPAdapter
+from services.player_index import PlayerIndex
+from services.remaining_games import RemainingGames
+from services.response_store import JSON, Format
+from urllib3.util.retry import Retry
+
 import logging.config
+import random
 import requests
 
+DEFAULT_HOST = 'http://data.nba.net'
+
+# (connect, read) timeouts in seconds for each endpoint. The connect timeout is
+# slightly larger than a multiple of 3, which is the TCP packet retransmission
+# window.
+DEFAULT_TIMEOUT = (3.05, 10)
+TIMEOUTS = {
+  'boxscore': (3.05, 5),
+  'conference_standings': (3.05, 10),
+  'current_year': (3.05, 5),
+  'player_index': (3.05, 20),
+  'players': (3.05, 20),
+  'remaining_games': (3.05, 20),
+  'roster': (3.05, 10),
+  'schedule': (3.05, 10),
+  'teams': (3.05, 10),
+}
+
+# How many times a failed request is retried (so each call makes at most
+# MAX_RETRIES + 1 attempts) and how the sleep between attempts grows.
+MAX_RETRIES = 2
+BACKOFF_FACTOR = 0.5
+MAX_BACKOFF_SECONDS = 4
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+# Reads the players feed straight into a PlayerIndex. It shares the players URL
+# (and its validators) with the plain JSON form.
+PLAYER_INDEX = Format(
+    'player_index', PlayerIndex.parse, PlayerIndex.dumps, PlayerIndex.loads)
+
+# Reads the league schedule straight into RemainingGames.
+REMAINING_GAMES = Format(
+    'remaining_games', RemainingGames.parse, RemainingGames.dumps,
+    RemainingGames.loads)
+
+# Read the teams feed straight into a map of teamId -> team and a roster
+# straight into a set of personIds. With a ResponseStore, a "304 Not Modified"
+# answer then hands out the same object again instead of building a new one, so
+# callers can tell that nothing changed by its identity (see OnUpstreamChange in
+# sidebar_sections.py).
+TEAMS = Format(
+    'teams',
+    lambda content: {
+        team['teamId']: team
+        for team in JSON.parse(content)['league']['standard']})
+ROSTER = Format(
+    'roster',
+    lambda content: set(
+        p['personId']
+        for p in JSON.parse(content)['league']['standard']['players']))
+
+# Size of the connection pool. The bots only ever talk to data.nba.net.
+POOL_SIZE = 10
+
+
+class JitteredRetry(Retry):
+  """A urllib3 Retry whose backoff is randomized ("full jitter") and capped at
+  MAX_BACKOFF_SECONDS, so that retries from several workers don't line up."""
+
+  def get_backoff_time(self):
+    backoff = super().get_backoff_time()
+    if backoff <= 0:
+      return 0
+    return random.uniform(0, min(MAX_BACKOFF_SECONDS, backoff))
+
 
 class NbaService:
 
-  def __init__(self, logger=None):
+  def __init__(
+      self, logger=None, session=None, store=None, host=DEFAULT_HOST,
+      breakers=None, hedging=None):
+    """
+    Parameters
+    ----------
+    logger: logging.Logger
+    session: requests.Session
+      Optional session to use instead of a new pooled one.
+    store: ResponseStore
+      Optional on-disk store used to make conditional requests.
+    host: str
+      Scheme and host name of the NBA Data API (i.e., a local stand-in server).
+    breakers: CircuitBreakers
+      Optional circuit breakers to make every request through.
+    hedging: HedgingPolicy
+      Optional policy to hedge box score requests with.
+    """
     if logger is None:
       logging.config.fileConfig('logging.conf')
       self.logger = logging.getLogger(__name__)
     else:
       self.logger = logger
+    self.session = session if session is not None else self._new_session()
+    self.store = store
+    self.host = host
+    self.breakers = breakers
+    self.hedging = hedging
+
+  @staticmethod
+  def _new_session():
+    retry = JitteredRetry(
+        total=MAX_RETRIES,
+        connect=MAX_RETRIES,
+        read=MAX_RETRIES,
+        status=MAX_RETRIES,
+        backoff_factor=BACKOFF_FACTOR,
+        status_forcelist=RETRY_STATUSES,
+        raise_on_status=False)
+    adapter = HTTPAdapter(
+        pool_connections=POOL_SIZE, pool_maxsize=POOL_SIZE, max_retries=retry)
+    session = requests.Session()
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+  def close(self):
+    """Closes all pooled connections."""
+    if self.hedging is not None:
+      self.hedging.close()
+    self.session.close()
 
   def boxscore(self, start_date_est, game_id):
     """
@@ -31,55 +164,97 @@ class NbaService:
       Another string provided by the schedule API for the game in question.
     """
     self.logger.info(f'Fetching boxscore for {start_date_est} and {game_id}.')
-    r = requests.get(
-        f'http://data.nba.net/prod/v1/{start_date_est}/{game_id}_boxscore.json')
-    r.raise_for_status()
-    return json.loads(r.content.decode('utf-8'))
+    url = f'{self.host}/prod/v1/{start_date_est}/{game_id}_boxscore.json'
+    if self.hedging is None:
+      return self._get_json('boxscore', url)
+    return self.hedging.call(lambda: self._get_json('boxscore', url))
 
   def conference_standings(self):
     self.logger.info('Fetching conference standings.')
-    r = requests.get(
-        'http://data.nba.net/10s/prod/v1/current/standings_conference.json')
-    r.raise_for_status()
-    data = json.loads(r.content.decode('utf-8'))
+    data = self._get_json(
+        'conference_standings',
+        f'{self.host}/10s/prod/v1/current/standings_conference.json')
     return data['league']['standard']
 
   def current_year(self):
     self.logger.info('Fetching current season schedule year.')
-    r = requests.get('http://data.nba.net/10s/prod/v1/today.json')
-    r.raise_for_status()
-    data = json.loads(r.content.decode('utf-8'))
+    data = self._get_json(
+        'current_year', f'{self.host}/10s/prod/v1/today.json')
     return data['seasonScheduleYear']
 
+  def player_index(self, year):
+    """Returns a PlayerIndex of the players feed, which is much smaller than the
+    list returned by players()."""
+    self.logger.info(f'Fetching the player index for {year}.')
+    return self._get_json(
+        'player_index', f'{self.host}/prod/v1/{year}/players.json',
+        PLAYER_INDEX)
+
   def players(self, year):
     self.logger.info(f'Fetching all player metadata for {year}.')
-    r = requests.get(f'http://data.nba.net/prod/v1/{year}/players.json')
-    r.raise_for_status()
-    data = json.loads(r.content.decode('utf-8'))
+    data = self._get_json(
+        'players', f'{self.host}/prod/v1/{year}/players.json')
     return data['league']['standard']
 
+  def remaining_games(self, year):
+    """Returns the RemainingGames of the league schedule, which is much smaller
+    than the schedule itself."""
+    self.logger.info(f'Fetching the remaining games of {year}.')
+    return self._get_json(
+        'remaining_games', f'{self.host}/prod/v1/{year}/schedule.json',
+        REMAINING_GAMES)
+
   def roster(self, team, year):
     self.logger.info(f'Fetching {team} roster.')
-    r = requests.get(f'http://data.nba.net/prod/v1/{year}/teams/{team}/roster.json')
-    r.raise_for_status()
-    data = json.loads(r.content.decode('utf-8'))
-    return set(
-        map(lambda p: p['personId'], data['league']['standard']['players']))
+    return self._get_json(
+        'roster', f'{self.host}/prod/v1/{year}/teams/{team}/roster.json',
+        ROSTER)
 
   def schedule(self, team, year):
-    base_url = f'http://data.nba.net/data/10s/prod/v1/{year}/teams/{team}'
+    base_url = f'{self.host}/data/10s/prod/v1/{year}/teams/{team}'
     url = f'{base_url}/schedule.json'
     self.logger.info(f'Fetching {team} schedule information from {url}.')
-    r = requests.get(url)
-    r.raise_for_status()
-    return json.loads(r.content.decode('utf-8'))
+    return self._get_json('schedule', url)
 
   def teams(self, year):
     self.logger.info(f'Fetching {year} team-level metadata for all teams.')
-    r = requests.get(f'http://data.nba.net/10s/prod/v1/{year}/teams.json')
+    return self._get_json(
+        'teams', f'{self.host}/10s/prod/v1/{year}/teams.json', TEAMS)
+
+  def _get_json(self, endpoint, url, format=JSON):
+    """Fetches url over the pooled session and decodes the response.
+
+    Parameters
+    ----------
+    endpoint: str
+      The name of the NbaService method making the call. It selects the timeouts
+      to use from TIMEOUTS.
+    url: str
+      The full URL to fetch.
+    format: Format
+      How to decode the response body. Defaults to plain JSON.
+    """
+    if self.breakers is None:
+      return self._request(endpoint, url, format)
+    return self.breakers.call(
+        endpoint, lambda: self._request(endpoint, url, format))
+
+  def _request(self, endpoint, url, format):
+    timeout = TIMEOUTS.get(endpoint, DEFAULT_TIMEOUT)
+    if self.store is None:
+      r = self.session.get(url, timeout=timeout)
+      r.raise_for_status()
+      return format.parse(r.content)
+
+    r = self.session.get(
+        url, timeout=timeout, headers=self.store.conditional_headers(url))
+    if r.status_code == 304:
+      data = self.store.get(url, format)
+      if data is not None:
+        self.logger.debug(f'{url} was not modified.')
+        return data
+      # The stored copy vanished since the request was made. Ask again without
+      # any validators.
+      r = self.session.get(url, timeout=timeout)
     r.raise_for_status()
-    teams = json.loads(r.content.decode('utf-8'))
-    teams_map = dict()
-    for team in teams['league']['standard']:
-      teams_map[team['teamId']] = team
-    return teams_map
+    return self.store.put(url, r.headers, r.content, format)
@@ -1,8 +1,12 @@
-from services.nba_service import NbaService
+from services.circuit_breaker import CircuitBreakers, CircuitOpenError
+from services.nba_service import MAX_BACKOFF_SECONDS, MAX_RETRIES, TIMEOUTS
+from services.nba_service import JitteredRetry, NbaService
+from services.remaining_games import RemainingGames
 from unittest.mock import patch
 
 import logging.config
 import os.path
+import requests
 import unittest
 
 
@@ -30,15 +34,16 @@ class NbaServiceTest(unittest.TestCase):
     logging.basicConfig(level=logging.ERROR)
     self.nba_service = NbaService(logging.getLogger(__name__))
 
-  @patch('requests.get', side_effect=mocked_requests_get)
+  @patch('requests.Session.get', side_effect=mocked_requests_get)
   def test_boxscore(self, mock_get):
     boxscore = self.nba_service.boxscore('20201231', '0022000066')
     # Just verify a few properties instead of the entire large response.
     self.assertEqual(boxscore['basicGameData']['gameUrlCode'], '20201231/NYKTOR')
     mock_get.assert_called_once_with(
-        'http://data.nba.net/prod/v1/20201231/0022000066_boxscore.json')
+        'http://data.nba.net/prod/v1/20201231/0022000066_boxscore.json',
+        timeout=TIMEOUTS['boxscore'])
 
-  @patch('requests.get', side_effect=mocked_requests_get)
+  @patch('requests.Session.get', side_effect=mocked_requests_get)
   def test_conference_standings(self, mock_get):
     standings = self.nba_service.conference_standings()
     # Just verify a few properties instead of the entire large response.
@@ -46,15 +51,17 @@ class NbaServiceTest(unittest.TestCase):
     teamIds = list(map(lambda t: t['teamId'], standings['conference']['east']))
     self.assertEqual(teamIds[0:2], ['1610612761', '1610612738'])
     mock_get.assert_called_once_with(
-        'http://data.nba.net/10s/prod/v1/current/standings_conference.json')
+        'http://data.nba.net/10s/prod/v1/current/standings_conference.json',
+        timeout=TIMEOUTS['conference_standings'])
 
-  @patch('requests.get', side_effect=mocked_requests_get)
+  @patch('requests.Session.get', side_effect=mocked_requests_get)
   def test_current_year(self, mock_get):
     self.assertEqual(self.nba_service.current_year(), 2020)
     mock_get.assert_called_once_with(
-        'http://data.nba.net/10s/prod/v1/today.json')
+        'http://data.nba.net/10s/prod/v1/today.json',
+        timeout=TIMEOUTS['current_year'])
 
-  @patch('requests.get', side_effect=mocked_requests_get)
+  @patch('requests.Session.get', side_effect=mocked_requests_get)
   def test_players(self, mock_get):
     response = self.nba_service.players('2020')
     # Just verify a few properties instead of the entire large response.
@@ -73,17 +80,32 @@ class NbaServiceTest(unittest.TestCase):
     ]
     self.assertEqual(actual_names, expected_names)
     mock_get.assert_called_once_with(
-        'http://data.nba.net/prod/v1/2020/players.json')
+        'http://data.nba.net/prod/v1/2020/players.json',
+        timeout=TIMEOUTS['players'])
+
+  @patch('requests.Session.get', side_effect=mocked_requests_get)
+  def test_remaining_games(self, mock_get):
+    # The test schedule is the Knicks' (the league schedule has the same layout),
+    # which has 34 regular season games that aren't over.
+    games = self.nba_service.remaining_games('2020')
+    self.assertEqual(len(games.home), 34)
+    self.assertEqual(games.home[0:2], ('1610612739', '1610612761'))
+    self.assertEqual(games.road[0:2], ('1610612752', '1610612752'))
+    self.assertEqual(RemainingGames.loads(games.dumps()), games)
+    mock_get.assert_called_once_with(
+        'http://data.nba.net/prod/v1/2020/schedule.json',
+        timeout=TIMEOUTS['remaining_games'])
 
-  @patch('requests.get', side_effect=mocked_requests_get)
+  @patch('requests.Session.get', side_effect=mocked_requests_get)
   def test_roster(self, mock_get):
     response = self.nba_service.roster('knicks', '2020')
     expected = set(['1629628', '1629649', '203493', '202692'])
     self.assertEqual(response, expected)
     mock_get.assert_called_once_with(
-        'http://data.nba.net/prod/v1/2020/teams/knicks/roster.json')
+        'http://data.nba.net/prod/v1/2020/teams/knicks/roster.json',
+        timeout=TIMEOUTS['roster'])
 
-  @patch('requests.get', side_effect=mocked_requests_get)
+  @patch('requests.Session.get', side_effect=mocked_requests_get)
   def test_schedule(self, mock_get):
     response = self.nba_service.schedule('knicks', '2020')
     # Just verify a few properties instead of the entire large response.
@@ -91,9 +113,10 @@ class NbaServiceTest(unittest.TestCase):
     expected = ['0012000002', '0012000015', '0012000028']
     self.assertEqual(actual[0:3], expected)
     mock_get.assert_called_once_with(
-        'http://data.nba.net/data/10s/prod/v1/2020/teams/knicks/schedule.json')
+        'http://data.nba.net/data/10s/prod/v1/2020/teams/knicks/schedule.json',
+        timeout=TIMEOUTS['schedule'])
 
-  @patch('requests.get', side_effect=mocked_requests_get)
+  @patch('requests.Session.get', side_effect=mocked_requests_get)
   def test_teams(self, mock_get):
     teams = self.nba_service.teams('2020')
     # Just spot check a few properties instead of the entire large response.
@@ -101,7 +124,36 @@ class NbaServiceTest(unittest.TestCase):
     self.assertEqual('Hawks', teams['1610612737']['nickname'])
     self.assertEqual('Boston Celtics', teams['1610612738']['fullName'])
     mock_get.assert_called_once_with(
-        'http://data.nba.net/10s/prod/v1/2020/teams.json')
+        'http://data.nba.net/10s/prod/v1/2020/teams.json',
+        timeout=TIMEOUTS['teams'])
+
+  @patch('requests.Session.get',
+         side_effect=requests.exceptions.ConnectionError('down'))
+  def test_withBreakers_failingEndpointFailsFast(self, mock_get):
+    nba_service = NbaService(
+        logging.getLogger(__name__),
+        breakers=CircuitBreakers(
+            logging.getLogger(__name__), failure_threshold=2))
+    for _ in range(2):
+      with self.assertRaises(requests.exceptions.ConnectionError):
+        nba_service.teams('2020')
+    with self.assertRaises(CircuitOpenError):
+      nba_service.teams('2020')
+    self.assertEqual(mock_get.call_count, 2)
+
+  def test_session_isPooledWithRetries(self):
+    adapter = self.nba_service.session.get_adapter('http://data.nba.net/')
+    self.assertIsInstance(adapter.max_retries, JitteredRetry)
+    self.assertEqual(adapter.max_retries.total, MAX_RETRIES)
+
+  def test_jitteredRetry_backoffIsCapped(self):
+    retry = JitteredRetry(total=10, backoff_factor=10)
+    for _ in range(5):
+      retry = retry.increment(method='GET', url='/')
+    for _ in range(100):
+      backoff = retry.get_backoff_time()
+      self.assertGreaterEqual(backoff, 0)
+      self.assertLessEqual(backoff, MAX_BACKOFF_SECONDS)
 
 
 if __name__ == '__main__':
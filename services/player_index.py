@@ -0,0 +1,121 @@
+"""
+A compact lookup table of the league's players keyed by personId, which also
+has the roster of every team.
+
+The players feed is large (about 700 KB) and has dozens of fields for every
+player in the league, but the bots only ever need a few of them for a handful of
+players. PlayerIndex reads the feed one player at a time, keeps only the fields
+in PLAYER_FIELDS and throws the rest away, so the full feed is never held in
+memory as python objects. The index itself can be saved to and loaded from a
+small JSON document so it doesn't need to be rebuilt after a restart.
+
+Every player in the feed has the teamId of the player's current team, so the
+index also groups the players into rosters. All 30 rosters come from the one
+download of the feed instead of a request per team.
+"""
+
+import json
+import re
+import sys
+
+PLAYER_FIELDS = ('firstName', 'lastName', 'jersey', 'pos')
+
+_WHITESPACE = re.compile(r'\s*')
+
+
+class PlayerIndex:
+
+  def __init__(self, players, teams=None):
+    """
+    Parameters
+    ----------
+    players: dict
+      Maps each personId to a tuple of the PLAYER_FIELDS values, in the order
+      the players appear in the feed.
+    teams: dict
+      Maps personIds to the teamId of each player's team. Free agents are left
+      out.
+    """
+    self._players = players
+    self._teams = teams or dict()
+    self._order = {person_id: i for i, person_id in enumerate(players)}
+    rosters = dict()
+    for person_id, team_id in self._teams.items():
+      rosters.setdefault(team_id, set()).add(person_id)
+    self._rosters = {
+        team_id: frozenset(roster) for team_id, roster in rosters.items()}
+
+  def __len__(self):
+    return len(self._players)
+
+  def __contains__(self, person_id):
+    return person_id in self._players
+
+  def get(self, person_id):
+    """Returns a dict with personId and the PLAYER_FIELDS of a player or None if
+    the player isn't in the index."""
+    values = self._players.get(person_id)
+    if values is None:
+      return None
+    player = dict(zip(PLAYER_FIELDS, values))
+    player['personId'] = person_id
+    return player
+
+  def roster(self, team_id):
+    """Returns the frozenset of the personIds of a team's players."""
+    return self._rosters.get(team_id, frozenset())
+
+  def lookup(self, person_ids):
+    """Returns the players with the given personIds, in the same order as the
+    feed. Unknown personIds are ignored."""
+    known = [pid for pid in person_ids if pid in self._players]
+    known.sort(key=self._order.__getitem__)
+    return [self.get(pid) for pid in known]
+
+  @staticmethod
+  def parse(content):
+    """Builds an index from the raw (bytes or str) players feed."""
+    if isinstance(content, bytes):
+      content = content.decode('utf-8')
+    players = dict()
+    teams = dict()
+    for player in _iter_standard_players(content):
+      person_id = player['personId']
+      players[person_id] = tuple(player.get(field) for field in PLAYER_FIELDS)
+      if player.get('teamId'):
+        teams[person_id] = sys.intern(player['teamId'])
+    return PlayerIndex(players, teams)
+
+  def dumps(self):
+    return json.dumps({
+        'fields': PLAYER_FIELDS,
+        'players': list(self._players.items()),
+        'teams': self._teams,
+    })
+
+  @staticmethod
+  def loads(content):
+    data = json.loads(content)
+    if tuple(data['fields']) != PLAYER_FIELDS:
+      raise ValueError('The index was saved with different fields.')
+    return PlayerIndex(
+        {pid: tuple(values) for pid, values in data['players']},
+        {pid: sys.intern(team_id) for pid, team_id in data['teams'].items()})
+
+
+def _iter_standard_players(text):
+  """Yields each object of the feed's league.standard array, decoding only one
+  player at a time."""
+  decoder = json.JSONDecoder()
+  league = text.index('"league"')
+  standard = text.index('"standard"', league)
+  i = text.index('[', standard) + 1
+  while True:
+    i = _WHITESPACE.match(text, i).end()
+    if text[i] == ']':
+      return
+    player, i = decoder.raw_decode(text, i)
+    yield player
+    i = _WHITESPACE.match(text, i).end()
+    if text[i] == ',':
+      i += 1
@@ -0,0 +1,90 @@
+from services.player_index import PlayerIndex
+
+import json
+import unittest
+
+FEED = b'''{
+  "_internal": {"pubDateTime": "2020-12-29 17:00:00.000"},
+  "league": {
+    "standard": [
+      {"firstName": "Precious", "lastName": "Achiuwa", "personId": "1",
+       "teamId": "1610612748", "jersey": "5", "pos": "F",
+       "draft": {"teamId": "1610612748"}},
+      {"firstName": "Jaylen", "lastName": "Adams", "personId": "2",
+       "jersey": "", "pos": "G", "teams": [{"teamId": "1610612749"}]} ,
+      {"firstName": "Steven", "lastName": "Adams", "personId": "3",
+       "teamId": "1610612748", "jersey": "12", "pos": "C-F"}
+    ],
+    "africa": [
+      {"firstName": "Not", "lastName": "Standard", "personId": "4"}
+    ]
+  }
+}'''
+
+
+class PlayerIndexTest(unittest.TestCase):
+
+  def test_parse_keepsOnlyStandardPlayersAndFields(self):
+    index = PlayerIndex.parse(FEED)
+    self.assertEqual(len(index), 3)
+    self.assertNotIn('4', index)
+    self.assertEqual(index.get('3'), {
+      'personId': '3',
+      'firstName': 'Steven',
+      'lastName': 'Adams',
+      'jersey': '12',
+      'pos': 'C-F',
+    })
+    self.assertIsNone(index.get('5'))
+
+  def test_parse_testdata(self):
+    with open('services/testdata/all_players.json', 'rb') as f:
+      content = f.read()
+    index = PlayerIndex.parse(content)
+    players = json.loads(content)['league']['standard']
+    self.assertEqual(len(index), len(players))
+    self.assertEqual(index.get(players[-1]['personId'])['lastName'],
+                     players[-1]['lastName'])
+
+  def test_lookup_usesFeedOrderAndIgnoresUnknownIds(self):
+    index = PlayerIndex.parse(FEED)
+    players = index.lookup({'3', '5', '1'})
+    self.assertEqual([p['personId'] for p in players], ['1', '3'])
+
+  def test_roster_groupsPlayersByTeam(self):
+    index = PlayerIndex.parse(FEED)
+    self.assertEqual(index.roster('1610612748'), frozenset({'1', '3'}))
+    # Jaylen Adams has no current team.
+    self.assertEqual(index.roster('1610612749'), frozenset())
+
+  def test_roster_testdata(self):
+    with open('services/testdata/all_players.json', 'rb') as f:
+      index = PlayerIndex.parse(f.read())
+    with open('services/testdata/cavaliers_roster.json', 'r') as f:
+      players = json.loads(f.read())['league']['standard']['players']
+    self.assertEqual(
+        index.roster('1610612739'), {p['personId'] for p in players})
+
+  def test_dumpsAndLoads(self):
+    index = PlayerIndex.parse(FEED)
+    loaded = PlayerIndex.loads(index.dumps())
+    self.assertEqual(len(loaded), 3)
+    self.assertEqual(loaded.get('2'), index.get('2'))
+    self.assertEqual(
+        [p['personId'] for p in loaded.lookup({'3', '2'})], ['2', '3'])
+    self.assertEqual(loaded.roster('1610612748'), frozenset({'1', '3'}))
+
+  def test_loads_withoutTeams_raises(self):
+    # Indexes saved before they had rosters are downloaded again.
+    with self.assertRaises(KeyError):
+      PlayerIndex.loads(json.dumps(
+          {'fields': ['firstName', 'lastName', 'jersey', 'pos'],
+           'players': []}))
+
+  def test_loads_withDifferentFields_raises(self):
+    with self.assertRaises(ValueError):
+      PlayerIndex.loads(json.dumps({'fields': ['firstName'], 'players': []}))
+
+
+if __name__ == '__main__':
+  unittest.main()
@@ -0,0 +1,194 @@
+"""
+Estimates every team's chances of a top-6 seed, a play-in spot and each draft
+lottery position by simulating the rest of the regular season (and the play-in
+tournament) many times.
+
+The trials are simulated in batches with NumPy instead of one game at a time: the
+outcome of every remaining game in a batch of trials is drawn at once, the wins
+are tallied with a single matrix product and the seeds are ranked with argsort.
+Each game is won by the home team with a probability that depends on both
+teams' records so far (shrunk towards .500) plus home court advantage.
+
+Lottery positions are the draft order before the lottery drawing: the 14 teams
+that miss the playoffs, worst record first.
+
+Simulating takes a noticeable fraction of a second, so playoff_odds remembers
+the last result and only simulates again when the standings or the remaining
+games change. The random numbers are seeded from the same inputs, so the odds
+(and the sidebar text built from them) don't change between runs unless the
+standings do.
+"""
+
+from services.standings_table import EAST, PLAY_IN_SEEDS, PLAYOFF_SEEDS, WEST
+from typing import NamedTuple, Tuple
+
+import hashlib
+import numpy as np
+import threading
+
+TRIALS = 20000
+# Trials simulated at once. Bounds the memory used for game outcomes to about
+# BATCH_SIZE * (number of remaining games) * 4 bytes.
+BATCH_SIZE = 2000
+
+# The number of teams in the draft lottery.
+LOTTERY_TEAMS = 14
+
+# Records are shrunk towards .500 as if every team had also won and lost this
+# many more games, so that a 3-0 start doesn't make a team unbeatable.
+PRIOR_GAMES = 10
+# Home court advantage, in log-odds. Equal teams win about 56% at home.
+HOME_COURT = 0.25
+
+# Noise added to win percentages to break ties at random.
+_TIE_BREAK = 1e-6
+
+
+class PlayoffOdds(NamedTuple):
+  # In the order of StandingsTable.team_ids.
+  team_ids: Tuple[str, ...]
+  # The probability of finishing 1st to 6th in the conference.
+  top_six: np.ndarray
+  # The probability of finishing 7th to 10th in the conference.
+  play_in: np.ndarray
+  # lottery[i, p] is the probability of team i having lottery position p + 1.
+  lottery: np.ndarray
+  trials: int
+
+
+_latest = None
+_latest_lock = threading.Lock()
+
+
+def playoff_odds(table, games, trials=TRIALS):
+  """Returns the PlayoffOdds of the standings, simulating the season only if
+  the standings or games differ from the last call.
+
+  Parameters
+  ----------
+  table: StandingsTable
+  games: RemainingGames
+  trials: int
+  """
+  global _latest
+  fingerprint = _fingerprint(table, games, trials)
+  with _latest_lock:
+    if _latest is not None and _latest[0] == fingerprint:
+      return _latest[1]
+  seed = int.from_bytes(fingerprint[:8], 'little')
+  odds = simulate(table, games, trials, np.random.default_rng(seed))
+  with _latest_lock:
+    _latest = (fingerprint, odds)
+  return odds
+
+
+def simulate(table, games, trials, rng):
+  """Simulates the rest of the season trials times.
+
+  Parameters
+  ----------
+  table: StandingsTable
+  games: RemainingGames
+  trials: int
+  rng: np.random.Generator
+  """
+  n = len(table)
+  column = {team_id: i for i, team_id in enumerate(table.team_ids)}
+  # Games between two teams in the standings.
+  pairs = [(column[h], column[r]) for h, r in zip(games.home, games.road)
+           if h in column and r in column]
+  home = np.array([h for h, _ in pairs], dtype=np.intp)
+  road = np.array([r for _, r in pairs], dtype=np.intp)
+
+  strength = _logit(
+      (table.wins + PRIOR_GAMES / 2) / (table.wins + table.losses + PRIOR_GAMES))
+  p_home = _sigmoid(strength[home] - strength[road] + HOME_COURT)
+  # A home win adds a win to the home team's column, a road win to the road
+  # team's: wins = outcomes @ (H - R) + R.sum(0).
+  home_minus_road = np.zeros((len(pairs), n), dtype=np.float32)
+  home_minus_road[np.arange(len(pairs)), home] += 1
+  home_minus_road[np.arange(len(pairs)), road] -= 1
+  road_games = np.bincount(road, minlength=n)
+  total_games = (table.wins + table.losses
+                 + np.bincount(home, minlength=n) + road_games)
+
+  conferences = [np.flatnonzero(table.conference == c) for c in (EAST, WEST)]
+  top_six = np.zeros(n)
+  play_in = np.zeros(n)
+  lottery = np.zeros(n * LOTTERY_TEAMS)
+  done = 0
+  while done < trials:
+    batch = min(BATCH_SIZE, trials - done)
+    done += batch
+    outcomes = (rng.random((batch, len(pairs)), dtype=np.float32)
+                < p_home).astype(np.float32)
+    wins = table.wins + road_games + np.rint(outcomes @ home_minus_road)
+    pct = wins / np.maximum(total_games, 1)
+    pct += rng.random((batch, n)) * _TIE_BREAK
+
+    qualified = np.zeros((batch, n), dtype=bool)
+    for teams in conferences:
+      # seeds[t, k] is the column of the team with seed k + 1 in trial t.
+      seeds = teams[np.argsort(-pct[:, teams], axis=1)]
+      top = seeds[:, :PLAYOFF_SEEDS]
+      top_six += np.bincount(top.ravel(), minlength=n)
+      play_in += np.bincount(
+          seeds[:, PLAYOFF_SEEDS:PLAYOFF_SEEDS + PLAY_IN_SEEDS].ravel(),
+          minlength=n)
+      rows = np.arange(batch)[:, None]
+      qualified[rows, top] = True
+      qualified[rows, _play_in_winners(seeds, strength, rng)] = True
+
+    # Everyone that missed the playoffs, worst record first.
+    pct[qualified] = np.inf
+    order = np.argsort(pct, axis=1)[:, :LOTTERY_TEAMS]
+    lottery += np.bincount(
+        (order * LOTTERY_TEAMS + np.arange(LOTTERY_TEAMS)).ravel(),
+        minlength=n * LOTTERY_TEAMS)
+
+  return PlayoffOdds(
+      team_ids=table.team_ids,
+      top_six=top_six / trials,
+      play_in=play_in / trials,
+      lottery=lottery.reshape(n, LOTTERY_TEAMS) / trials,
+      trials=trials)
+
+
+def _play_in_winners(seeds, strength, rng):
+  """Plays the play-in tournament of one conference in every trial and returns
+  the columns of the 7th and 8th seeds."""
+  seventh, eighth, ninth, tenth = (seeds[:, PLAYOFF_SEEDS + k] for k in range(4))
+  # 7th hosts 8th (winner is the 7th seed), 9th hosts 10th (loser is out) and
+  # the loser of the first game hosts the winner of the second for the 8th seed.
+  first = _home_wins(seventh, eighth, strength, rng)
+  seed_7 = np.where(first, seventh, eighth)
+  first_loser = np.where(first, eighth, seventh)
+  second_winner = np.where(_home_wins(ninth, tenth, strength, rng), ninth, tenth)
+  seed_8 = np.where(
+      _home_wins(first_loser, second_winner, strength, rng),
+      first_loser, second_winner)
+  return np.stack([seed_7, seed_8], axis=1)
+
+
+def _home_wins(home, road, strength, rng):
+  p = _sigmoid(strength[home] - strength[road] + HOME_COURT)
+  return rng.random(len(home)) < p
+
+
+def _logit(p):
+  return np.log(p / (1 - p))
+
+
+def _sigmoid(x):
+  return 1 / (1 + np.exp(-x))
+
+
+def _fingerprint(table, games, trials):
+  digest = hashlib.sha1()
+  digest.update(' '.join(table.team_ids).encode('utf-8'))
+  digest.update(table.wins.tobytes())
+  digest.update(table.losses.tobytes())
+  digest.update(' '.join(games.home).encode('utf-8'))
+  digest.update(' '.join(games.road).encode('utf-8'))
+  digest.update(str(trials).encode('utf-8'))
+  return digest.digest()
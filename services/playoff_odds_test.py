@@ -0,0 +1,79 @@
+from services import playoff_odds
+from services.fake_nba_service import FakeNbaService
+from services.models import Standings
+from services.playoff_odds import LOTTERY_TEAMS, TRIALS, simulate
+from services.remaining_games import RemainingGames
+from services.standings_table import StandingsTable
+
+import numpy as np
+import time
+import unittest
+
+# The most CPU time (in seconds) simulating a whole season may take. Runs have
+# to finish well within the scheduler's one minute tick.
+FULL_SEASON_BUDGET_SECONDS = 2
+
+
+class PlayoffOddsTest(unittest.TestCase):
+
+  def setUp(self):
+    self.table = StandingsTable(Standings.from_json(
+        FakeNbaService().conference_standings()))
+    self.games = FakeNbaService().remaining_games('2020')
+
+  def full_season(self):
+    """Returns 1230 games between random teams, like a whole season."""
+    rng = np.random.default_rng(0)
+    ids = self.table.team_ids
+    pairs = [rng.choice(len(ids), 2, replace=False) for _ in range(1230)]
+    return RemainingGames(
+        tuple(ids[h] for h, _ in pairs), tuple(ids[r] for _, r in pairs))
+
+  def test_simulate_probabilitiesAddUp(self):
+    odds = simulate(self.table, self.full_season(), 4000,
+                    np.random.default_rng(0))
+    # 6 top seeds, 4 play-in spots and 14 lottery positions to go around.
+    self.assertAlmostEqual(odds.top_six.sum(), 12)
+    self.assertAlmostEqual(odds.play_in.sum(), 8)
+    np.testing.assert_allclose(odds.lottery.sum(axis=0), 1)
+    self.assertTrue((odds.top_six + odds.play_in <= 1 + 1e-9).all())
+    self.assertEqual(odds.lottery.shape, (30, LOTTERY_TEAMS))
+
+  def test_simulate_noGamesLeft_keepsTheStandings(self):
+    odds = simulate(self.table, RemainingGames((), ()), 1000,
+                    np.random.default_rng(0))
+    ranks = self.table.conference_rank
+    np.testing.assert_array_equal(odds.top_six, (ranks <= 6).astype(float))
+    np.testing.assert_array_equal(
+        odds.play_in, ((ranks > 6) & (ranks <= 10)).astype(float))
+    # The worst team picks first.
+    self.assertEqual(odds.lottery[self.table.tank_order[0], 0], 1)
+
+  def test_playoffOdds_onlySimulatesWhenTheInputsChange(self):
+    odds = playoff_odds.playoff_odds(self.table, self.games, trials=1000)
+    self.assertIs(
+        playoff_odds.playoff_odds(self.table, self.games, trials=1000), odds)
+
+    # Equal standings from a new response are simulated the same way.
+    table = StandingsTable(Standings.from_json(
+        FakeNbaService().conference_standings()))
+    playoff_odds._latest = None
+    again = playoff_odds.playoff_odds(table, self.games, trials=1000)
+    self.assertIsNot(again, odds)
+    np.testing.assert_array_equal(again.lottery, odds.lottery)
+
+    games = self.games._replace(
+        home=self.games.home[1:], road=self.games.road[1:])
+    self.assertIsNot(
+        playoff_odds.playoff_odds(self.table, games, trials=1000), again)
+
+  def test_simulate_fullSeasonStaysWithinBudget(self):
+    games = self.full_season()
+    start = time.process_time()
+    simulate(self.table, games, TRIALS, np.random.default_rng(0))
+    elapsed = time.process_time() - start
+    self.assertLess(elapsed, FULL_SEASON_BUDGET_SECONDS)
+
+
+if __name__ == '__main__':
+  unittest.main()
@@ -0,0 +1,48 @@
+"""
+The regular season games that haven't been played yet, league wide.
+
+The league schedule has every game of the season with dozens of fields each and
+is several megabytes, but simulating the rest of the season only needs to know
+who plays whom (and where). RemainingGames keeps the home and road team ids of
+the regular season games that aren't over and can be saved to and loaded from a
+small JSON document, like PlayerIndex.
+"""
+
+from services.models import STATUS_FINAL
+from typing import NamedTuple, Tuple
+
+import json
+import sys
+
+# seasonStageId of regular season games.
+REGULAR_SEASON = 2
+
+
+class RemainingGames(NamedTuple):
+  # Parallel tuples of team ids, one entry per game, in schedule order.
+  home: Tuple[str, ...]
+  road: Tuple[str, ...]
+
+  @staticmethod
+  def parse(content):
+    """Builds the games from the raw (bytes or str) league schedule."""
+    games = json.loads(content)['league']['standard']
+    home = []
+    road = []
+    for game in games:
+      if (game['seasonStageId'] != REGULAR_SEASON
+          or game['statusNum'] == STATUS_FINAL):
+        continue
+      home.append(sys.intern(game['hTeam']['teamId']))
+      road.append(sys.intern(game['vTeam']['teamId']))
+    return RemainingGames(tuple(home), tuple(road))
+
+  def dumps(self):
+    return json.dumps({'home': self.home, 'road': self.road})
+
+  @staticmethod
+  def loads(content):
+    data = json.loads(content)
+    return RemainingGames(
+        tuple(map(sys.intern, data['home'])),
+        tuple(map(sys.intern, data['road'])))
@@ -0,0 +1,241 @@
+"""
+Persists NBA Data API responses and their HTTP validators (ETag and
+Last-Modified headers) to a local directory so that NbaService can make
+conditional requests, even across process restarts (i.e., when running as a
+cron job that starts a new process every minute).
+
+Parsed responses are also remembered in memory along with the validators they
+came from, so a "304 Not Modified" answer doesn't need to re-parse the body.
+Formats that know how to save themselves (see Format) are also written to disk
+in their parsed form so that a new process doesn't need to parse the body
+either. Callers must treat the objects returned by this class as read-only
+because the same object may be handed out many times.
+
+Both are bounded. The store keeps a limited number of parsed responses in memory
+and evicts the least recently used one when it is full, and it keeps the files
+of a limited number of responses on disk, deleting the ones that were least
+recently stored or served when a new response is added.
+"""
+
+from collections import OrderedDict
+
+import hashlib
+import json
+import os
+import re
+import threading
+
+DEFAULT_DIRECTORY = os.path.join(os.path.expanduser('~'), '.redditbot', 'cache')
+
+# Enough for every feed in each of its formats plus a couple of box scores.
+DEFAULT_MAX_PARSED = 64
+
+# Enough for a season's worth of box scores plus every other feed.
+DEFAULT_MAX_RESPONSES = 256
+
+# The files of a response are named after the SHA-1 of its URL.
+_FILE_NAME = re.compile(r'([0-9a-f]{40})\.\w+')
+
+
+class Format:
+  """Describes how a response body is turned into a python object."""
+
+  def __init__(self, name, parse, dumps=None, loads=None):
+    """
+    Parameters
+    ----------
+    name: str
+      Identifies the format. Must be usable as a file extension.
+    parse: function
+      Turns the raw (bytes) response body into a python object.
+    dumps: function
+      Optional. Turns a parsed object into a str that can be saved to disk.
+    loads: function
+      Optional. The inverse of dumps.
+    """
+    self.name = name
+    self.parse = parse
+    self.dumps = dumps
+    self.loads = loads
+
+
+JSON = Format('json', lambda content: json.loads(content.decode('utf-8')))
+
+
+class ResponseStore:
+
+  def __init__(
+      self, directory=DEFAULT_DIRECTORY, max_parsed=DEFAULT_MAX_PARSED,
+      max_responses=DEFAULT_MAX_RESPONSES):
+    """
+    Parameters
+    ----------
+    directory: str
+      Where to keep the responses.
+    max_parsed: int
+      The maximum number of parsed responses to keep in memory.
+    max_responses: int
+      The maximum number of responses to keep on disk.
+    """
+    self.directory = directory
+    self.max_parsed = max_parsed
+    self.max_responses = max_responses
+    os.makedirs(directory, exist_ok=True)
+    # (url, format name) -> (validators, parsed object)
+    self._parsed = OrderedDict()
+    self._lock = threading.Lock()
+
+  def conditional_headers(self, url):
+    """Returns the request headers that make a request for url conditional on
+    the stored response being stale, or an empty dict if nothing is stored."""
+    meta = self._read_meta(url)
+    if meta is None:
+      return {}
+    headers = {}
+    if meta.get('etag'):
+      headers['If-None-Match'] = meta['etag']
+    if meta.get('last_modified'):
+      headers['If-Modified-Since'] = meta['last_modified']
+    return headers
+
+  def get(self, url, format=JSON):
+    """Returns the body stored for url parsed with format, or None if nothing is
+    stored."""
+    meta = self._read_meta(url)
+    if meta is None:
+      return None
+    validators = [meta.get('etag'), meta.get('last_modified')]
+    self._touch(url)
+    with self._lock:
+      parsed = self._parsed.get((url, format.name))
+    if parsed is not None and parsed[0] == validators:
+      with self._lock:
+        self._parsed.move_to_end((url, format.name))
+      return parsed[1]
+
+    data = self._read_derived(url, format, validators)
+    if data is None:
+      try:
+        with open(self._path(url, 'body'), 'rb') as f:
+          data = format.parse(f.read())
+      except (OSError, ValueError):
+        return None
+      self._write_derived(url, format, validators, data)
+    self._remember(url, format, validators, data)
+    return data
+
+  def put(self, url, headers, content, format=JSON):
+    """Parses content with format and stores it for url if the response has
+    validators.
+
+    Parameters
+    ----------
+    url: str
+    headers: dict
+      The response headers.
+    content: bytes
+      The raw response body.
+    format: Format
+
+    Returns the parsed body.
+    """
+    data = format.parse(content)
+    etag = headers.get('ETag')
+    last_modified = headers.get('Last-Modified')
+    if not etag and not last_modified:
+      return data
+    validators = [etag, last_modified]
+    meta = {'url': url, 'etag': etag, 'last_modified': last_modified}
+    is_new = not os.path.exists(self._path(url, 'meta'))
+    # The body goes first so that the metadata never points at a missing body.
+    self._write(self._path(url, 'body'), content)
+    self._write(self._path(url, 'meta'), json.dumps(meta).encode('utf-8'))
+    self._write_derived(url, format, validators, data)
+    self._remember(url, format, validators, data)
+    if is_new:
+      self._prune()
+    return data
+
+  def _remember(self, url, format, validators, data):
+    with self._lock:
+      self._parsed[(url, format.name)] = (validators, data)
+      self._parsed.move_to_end((url, format.name))
+      while len(self._parsed) > self.max_parsed:
+        self._parsed.popitem(last=False)
+
+  def _touch(self, url):
+    """Marks the response stored for url as recently used, so it's kept."""
+    try:
+      os.utime(self._path(url, 'meta'))
+    except OSError:
+      pass
+
+  def _prune(self):
+    """Deletes the files of the least recently used responses until there are
+    no more than max_responses. A response was last used when its metadata was
+    last written or touched."""
+    files = dict()
+    used = dict()
+    with os.scandir(self.directory) as entries:
+      for entry in entries:
+        m = _FILE_NAME.fullmatch(entry.name)
+        if m is None:
+          continue
+        digest = m.group(1)
+        files.setdefault(digest, []).append(entry.path)
+        if entry.name.endswith('.meta'):
+          try:
+            used[digest] = entry.stat().st_mtime
+          except OSError:
+            pass
+    if len(files) <= self.max_responses:
+      return
+    # Files without metadata are left over from a crash and go first.
+    by_use = sorted(files, key=lambda digest: used.get(digest, 0))
+    for digest in by_use[:len(files) - self.max_responses]:
+      for path in files[digest]:
+        try:
+          os.remove(path)
+        except OSError:
+          pass
+
+  def _read_meta(self, url):
+    try:
+      with open(self._path(url, 'meta'), 'r') as f:
+        meta = json.loads(f.read())
+    except (OSError, ValueError):
+      return None
+    # Guard against hash collisions.
+    return meta if meta.get('url') == url else None
+
+  def _read_derived(self, url, format, validators):
+    if format.loads is None:
+      return None
+    try:
+      with open(self._path(url, format.name), 'r') as f:
+        derived = json.loads(f.read())
+      if derived['validators'] != validators:
+        return None
+      return format.loads(derived['data'])
+    except (OSError, ValueError, KeyError):
+      return None
+
+  def _write_derived(self, url, format, validators, data):
+    if format.dumps is None:
+      return
+    derived = {'validators': validators, 'data': format.dumps(data)}
+    self._write(
+        self._path(url, format.name), json.dumps(derived).encode('utf-8'))
+
+  def _path(self, url, extension):
+    digest = hashlib.sha1(url.encode('utf-8')).hexdigest()
+    return os.path.join(self.directory, f'{digest}.{extension}')
+
+  @staticmethod
+  def _write(path, content):
+    # Write to a temporary file and rename it so that a crash never leaves a
+    # half written file behind.
+    tmp_path = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+    with open(tmp_path, 'wb') as f:
+      f.write(content)
+    os.replace(tmp_path, path)
@@ -0,0 +1,140 @@
+from services.nba_service import PLAYER_INDEX, NbaService
+from services.response_store import ResponseStore
+from unittest.mock import MagicMock, patch
+
+import logging.config
+import os
+import tempfile
+import unittest
+
+URL = 'http://data.nba.net/10s/prod/v1/today.json'
+
+
+class FakeResponse:
+
+  def __init__(self, status_code, content=b'', headers=None):
+    self.status_code = status_code
+    self.content = content
+    self.headers = headers if headers is not None else {}
+
+  def raise_for_status(self):
+    if self.status_code >= 400:
+      raise Exception(f'HTTP {self.status_code}')
+
+
+class ResponseStoreTest(unittest.TestCase):
+
+  def setUp(self):
+    logging.basicConfig(level=logging.ERROR)
+    self.tmpdir = tempfile.TemporaryDirectory()
+    self.store = ResponseStore(self.tmpdir.name)
+
+  def tearDown(self):
+    self.tmpdir.cleanup()
+
+  def test_conditional_headers_nothingStored(self):
+    self.assertEqual(self.store.conditional_headers(URL), {})
+    self.assertIsNone(self.store.get(URL))
+
+  def test_put_withValidators_persists(self):
+    data = self.store.put(
+        URL,
+        {'ETag': '"abc"', 'Last-Modified': 'Tue, 29 Dec 2020 17:00:00 GMT'},
+        b'{"seasonScheduleYear": 2020}')
+    self.assertEqual(data, {'seasonScheduleYear': 2020})
+
+    # A new store (i.e., a new process) reads the same files.
+    store = ResponseStore(self.tmpdir.name)
+    self.assertEqual(store.conditional_headers(URL), {
+      'If-None-Match': '"abc"',
+      'If-Modified-Since': 'Tue, 29 Dec 2020 17:00:00 GMT',
+    })
+    self.assertEqual(store.get(URL), {'seasonScheduleYear': 2020})
+
+  def test_put_withoutValidators_doesNotPersist(self):
+    self.store.put(URL, {}, b'{"seasonScheduleYear": 2020}')
+    self.assertEqual(self.store.conditional_headers(URL), {})
+    self.assertIsNone(self.store.get(URL))
+
+  def test_put_withDerivedFormat_persistsParsedForm(self):
+    url = 'http://data.nba.net/prod/v1/2020/players.json'
+    content = (b'{"league": {"standard": [{"personId": "1", "firstName": "A", '
+               b'"lastName": "B", "jersey": "0", "pos": "G"}]}}')
+    self.store.put(url, {'ETag': '"abc"'}, content, PLAYER_INDEX)
+
+    store = ResponseStore(self.tmpdir.name)
+    with patch.object(PLAYER_INDEX, 'parse') as parse:
+      index = store.get(url, PLAYER_INDEX)
+    # The saved index is loaded instead of parsing the body again.
+    parse.assert_not_called()
+    self.assertEqual(index.get('1')['lastName'], 'B')
+    # The plain JSON form of the same URL is still available.
+    self.assertEqual(len(store.get(url)['league']['standard']), 1)
+
+  def test_get_keepsAtMostMaxParsedInMemory(self):
+    store = ResponseStore(self.tmpdir.name, max_parsed=2)
+    urls = [f'{URL}?{i}' for i in range(3)]
+    for url in urls[:2]:
+      store.put(url, {'ETag': '"abc"'}, b'{}')
+    first = store.get(urls[0])
+    store.put(urls[2], {'ETag': '"abc"'}, b'{}')
+
+    # The second response was used least recently, so it's parsed again.
+    self.assertIs(store.get(urls[0]), first)
+    self.assertEqual(len(store._parsed), 2)
+    self.assertNotIn((urls[1], 'json'), store._parsed)
+    self.assertEqual(store.get(urls[1]), {})
+
+  def test_put_keepsAtMostMaxResponsesOnDisk(self):
+    store = ResponseStore(self.tmpdir.name, max_responses=2)
+    urls = [f'{URL}?{i}' for i in range(3)]
+    for i, url in enumerate(urls[:2]):
+      store.put(url, {'ETag': '"abc"'}, b'{}')
+      # Make the first response the least recently used one.
+      os.utime(store._path(url, 'meta'), (i, i))
+    store.put(urls[2], {'ETag': '"abc"'}, b'{}')
+
+    self.assertEqual(store.conditional_headers(urls[0]), {})
+    self.assertIsNone(store.get(urls[0]))
+    self.assertFalse(os.path.exists(store._path(urls[0], 'body')))
+    for url in urls[1:]:
+      self.assertEqual(store.get(url), {})
+    self.assertEqual(len(os.listdir(self.tmpdir.name)), 4)
+
+  def test_nbaService_notModified_servesStoredBody(self):
+    session = MagicMock()
+    session.get.side_effect = [
+      FakeResponse(200, b'{"seasonScheduleYear": 2020}', {'ETag': '"abc"'}),
+      FakeResponse(304),
+    ]
+    nba_service = NbaService(logging.getLogger(__name__), session, self.store)
+
+    self.assertEqual(nba_service.current_year(), 2020)
+    self.assertEqual(nba_service.current_year(), 2020)
+
+    self.assertEqual(session.get.call_count, 2)
+    self.assertEqual(
+        session.get.call_args.kwargs['headers'], {'If-None-Match': '"abc"'})
+
+  def test_nbaService_notModified_handsOutTheSameObjects(self):
+    teams = b'{"league": {"standard": [{"teamId": "1", "nickname": "Knicks"}]}}'
+    roster = b'{"league": {"standard": {"players": [{"personId": "2"}]}}}'
+    session = MagicMock()
+    session.get.side_effect = [
+      FakeResponse(200, teams, {'ETag': '"abc"'}),
+      FakeResponse(304),
+      FakeResponse(200, roster, {'ETag': '"def"'}),
+      FakeResponse(304),
+    ]
+    nba_service = NbaService(logging.getLogger(__name__), session, self.store)
+
+    first = nba_service.teams('2020')
+    self.assertEqual(first, {'1': {'teamId': '1', 'nickname': 'Knicks'}})
+    self.assertIs(nba_service.teams('2020'), first)
+    first = nba_service.roster('knicks', '2020')
+    self.assertEqual(first, {'2'})
+    self.assertIs(nba_service.roster('knicks', '2020'), first)
+
+
+if __name__ == '__main__':
+  unittest.main()
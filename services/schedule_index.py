@@ -0,0 +1,97 @@
+"""
+An index over a team's season schedule for finding games by time.
+
+Tip-off times are kept as epoch seconds in a sorted list so that the game that
+is on right now, the next one and the previous one are found with a binary
+search instead of parsing every game's start time on every run. Eastern start
+times, opponents and home/away flags are worked out once when the index is
+built.
+
+The index is built once per version of the schedule: ScheduleIndex.of returns
+the same index for as long as it's given the same (cached) schedule response,
+so the bots and the scheduler all share one index.
+"""
+
+from bisect import bisect_left, bisect_right
+from constants import EASTERN_TIMEZONE
+from services.models import PRESEASON, Schedule
+
+import threading
+
+
+class ScheduleIndex:
+
+  _latest = None
+  _latest_lock = threading.Lock()
+
+  def __init__(self, schedule):
+    """
+    Parameters
+    ----------
+    schedule: Schedule
+    """
+    self.games = tuple(sorted(schedule.games, key=lambda g: g.start_time))
+    self.start_times = [int(g.start_time.timestamp()) for g in self.games]
+    self.eastern_starts = tuple(
+        g.start_time.astimezone(EASTERN_TIMEZONE) for g in self.games)
+    self.eastern_dates = tuple(s.date() for s in self.eastern_starts)
+    self.opponent_ids = tuple(g.opponent.team_id for g in self.games)
+    self.is_home = tuple(g.is_home_team for g in self.games)
+    # The number of games that are over.
+    self.final_games = sum(g.is_final for g in self.games)
+    # Positions (in self.games) and start times of regular season and playoff
+    # games only.
+    self._season = [
+        i for i, g in enumerate(self.games) if g.season_stage_id != PRESEASON]
+    self._season_start_times = [self.start_times[i] for i in self._season]
+
+  @staticmethod
+  def of(schedule):
+    """Returns the index of a raw schedule response (see NbaService.schedule).
+
+    The last index built is reused for as long as the same response object is
+    passed in."""
+    with ScheduleIndex._latest_lock:
+      latest = ScheduleIndex._latest
+      if latest is not None and latest[0] is schedule:
+        return latest[1]
+    index = ScheduleIndex(Schedule.from_json(schedule))
+    with ScheduleIndex._latest_lock:
+      # Keeping a reference to the response guarantees that its id isn't reused.
+      ScheduleIndex._latest = (schedule, index)
+    return index
+
+  def __len__(self):
+    return len(self.games)
+
+  def last_started(self, when, preseason=True):
+    """Returns the position of the last game that tipped off at or before when,
+    or -1 if there is none.
+
+    Parameters
+    ----------
+    when: datetime
+    preseason: bool
+      Whether preseason games count.
+    """
+    if preseason:
+      return bisect_right(self.start_times, when.timestamp()) - 1
+    i = bisect_right(self._season_start_times, when.timestamp()) - 1
+    return self._season[i] if i >= 0 else -1
+
+  def next_to_start(self, when, preseason=True):
+    """Returns the position of the first game that tips off after when, or None
+    if there is none."""
+    if preseason:
+      i = bisect_right(self.start_times, when.timestamp())
+      return i if i < len(self.games) else None
+    i = bisect_right(self._season_start_times, when.timestamp())
+    return self._season[i] if i < len(self._season) else None
+
+  def starting_between(self, start, end, preseason=True):
+    """Returns the positions of the games that tip off between start and end
+    (inclusive)."""
+    lo = bisect_left(self.start_times, start.timestamp())
+    hi = bisect_right(self.start_times, end.timestamp())
+    return [i for i in range(lo, hi)
+            if preseason or self.games[i].season_stage_id != PRESEASON]
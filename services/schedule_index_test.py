@@ -0,0 +1,75 @@
+from constants import UTC
+from datetime import datetime
+from services.fake_nba_service import FakeNbaService
+from services.schedule_index import ScheduleIndex
+
+import unittest
+
+
+class ScheduleIndexTest(unittest.TestCase):
+  # 20201223/NYKIND (the first regular season game) starts at
+  # 2020-12-24T00:00:00.000Z and follows 4 preseason games.
+  # 20201227/MILNYK starts at 2020-12-28T00:30:00.000Z.
+  # 20201229/NYKCLE starts at 2020-12-30T00:00:00.000Z.
+
+  def setUp(self):
+    self.schedule = FakeNbaService().schedule('knicks', '2020')
+    self.index = ScheduleIndex.of(self.schedule)
+
+  def test_of_reusesIndexForSameSchedule(self):
+    self.assertIs(ScheduleIndex.of(self.schedule), self.index)
+    other = FakeNbaService().schedule('knicks', '2020')
+    self.assertIsNot(ScheduleIndex.of(other), self.index)
+
+  def test_lastStarted(self):
+    now = datetime(2020, 12, 29, 12, 0, 0, 0, UTC)
+    i = self.index.last_started(now)
+    self.assertEqual(self.index.games[i].game_url_code, '20201227/MILNYK')
+    self.assertEqual(self.index.eastern_dates[i].isoformat(), '2020-12-27')
+    self.assertTrue(self.index.is_home[i])
+
+    # Exactly at tip-off.
+    now = datetime(2020, 12, 30, 0, 0, 0, 0, UTC)
+    i = self.index.last_started(now)
+    self.assertEqual(self.index.games[i].game_url_code, '20201229/NYKCLE')
+
+  def test_lastStarted_beforeSeason(self):
+    now = datetime(2020, 12, 1, 0, 0, 0, 0, UTC)
+    self.assertEqual(self.index.last_started(now), -1)
+
+  def test_lastStarted_skipsPreseason(self):
+    # After the last preseason game but before the season opener.
+    now = datetime(2020, 12, 20, 0, 0, 0, 0, UTC)
+    self.assertEqual(self.index.last_started(now), 3)
+    self.assertEqual(self.index.last_started(now, preseason=False), -1)
+
+    now = datetime(2020, 12, 24, 1, 0, 0, 0, UTC)
+    i = self.index.last_started(now, preseason=False)
+    self.assertEqual(self.index.games[i].game_url_code, '20201223/NYKIND')
+
+  def test_nextToStart(self):
+    now = datetime(2020, 12, 29, 12, 0, 0, 0, UTC)
+    i = self.index.next_to_start(now)
+    self.assertEqual(self.index.games[i].game_url_code, '20201229/NYKCLE')
+
+    now = datetime(2020, 12, 15, 0, 0, 0, 0, UTC)
+    i = self.index.next_to_start(now, preseason=False)
+    self.assertEqual(self.index.games[i].game_url_code, '20201223/NYKIND')
+
+    self.assertIsNone(self.index.next_to_start(datetime(2021, 7, 1, 0, 0, 0, 0, UTC)))
+
+  def test_startingBetween(self):
+    start = datetime(2020, 12, 27, 0, 0, 0, 0, UTC)
+    end = datetime(2020, 12, 30, 0, 0, 0, 0, UTC)
+    codes = [self.index.games[i].game_url_code
+             for i in self.index.starting_between(start, end)]
+    self.assertEqual(
+        codes, ['20201226/PHINYK', '20201227/MILNYK', '20201229/NYKCLE'])
+
+  def test_finalGames(self):
+    # 4 preseason games and the first 3 regular season games.
+    self.assertEqual(self.index.final_games, 7)
+
+
+if __name__ == '__main__':
+  unittest.main()
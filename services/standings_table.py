@@ -0,0 +1,115 @@
+"""
+The league standings as columns of NumPy arrays, one entry per team.
+
+The 30 teams are loaded once, in the order of the conference standings (the
+East, best first, then the West), and every table the sidebar shows is worked
+out with array operations on those columns: conference ranks, games behind the
+conference leader, the tank race (worst records first) and lottery positions.
+A table is returned as Lines, positions into the columns plus the games behind
+to print for each, so new tables don't copy the standings or re-parse anything.
+"""
+
+from typing import NamedTuple
+
+import numpy as np
+
+EAST = 0
+WEST = 1
+
+# Conference ranks 1 to PLAYOFF_SEEDS make the playoffs outright and the next
+# four play for the last two seeds.
+PLAYOFF_SEEDS = 6
+PLAY_IN_SEEDS = 4
+# The number of seeds per conference that make the playoffs after the play-in.
+POSTSEASON_SEEDS = PLAYOFF_SEEDS + 2
+
+
+class Lines(NamedTuple):
+  """Rows of a standings table, in the order they're shown."""
+  # Positions in the StandingsTable columns.
+  rows: np.ndarray
+  # Games behind the first row of the table (or the conference leader).
+  games_behind: np.ndarray
+
+
+class StandingsTable:
+
+  def __init__(self, standings):
+    """
+    Parameters
+    ----------
+    standings: Standings
+    """
+    rows = standings.east + standings.west
+    self.team_ids = tuple(row.team_id for row in rows)
+    self.wins = np.array([row.win for row in rows], dtype=np.int32)
+    self.losses = np.array([row.loss for row in rows], dtype=np.int32)
+    self.loss_pct = np.array([row.loss_pct for row in rows], dtype=np.float64)
+    self.conference = np.repeat(
+        np.array([EAST, WEST], dtype=np.int8),
+        [len(standings.east), len(standings.west)])
+    # 1 for the first team in each conference. The feed lists teams in rank
+    # order, tie breakers included.
+    east = len(standings.east)
+    self.conference_rank = np.concatenate(
+        [np.arange(1, east + 1), np.arange(1, len(rows) - east + 1)])
+    leader = np.where(self.conference == EAST, 0, east)
+    self.games_behind = self._games_behind(leader)
+
+    # Worst record first. Ties keep their conference order.
+    self.tank_order = np.argsort(-self.loss_pct, kind='stable')
+    # 1 for the worst team that would miss the postseason if it ended today
+    # (assuming the 7th and 8th seeds win the play-in), 0 for everyone else.
+    self.lottery_position = np.zeros(len(rows), dtype=np.int32)
+    lottery = self.tank_order[
+        self.conference_rank[self.tank_order] > POSTSEASON_SEEDS]
+    self.lottery_position[lottery] = np.arange(1, len(lottery) + 1)
+
+  def __len__(self):
+    return len(self.team_ids)
+
+  def conference_lines(self, conference):
+    """Returns the standings of EAST or WEST."""
+    rows = np.flatnonzero(self.conference == conference)
+    return Lines(rows, self.games_behind[rows])
+
+  def tank_lines(self, n=None):
+    """Returns the n (or all) teams with the worst records, worst first, and how
+    many games each is behind the worst team."""
+    rows = self.tank_order[:n]
+    return Lines(rows, self._games_apart(rows[0])[rows])
+
+  def play_in_lines(self, conference):
+    """Returns the teams of EAST or WEST that would be in the play-in if the
+    season ended today."""
+    ranks = self.conference_rank
+    rows = np.flatnonzero(
+        (self.conference == conference)
+        & (ranks > PLAYOFF_SEEDS)
+        & (ranks <= PLAYOFF_SEEDS + PLAY_IN_SEEDS))
+    return Lines(rows, self.games_behind[rows])
+
+  def lottery_lines(self):
+    """Returns the teams that would be in the draft lottery, in lottery
+    order."""
+    rows = np.flatnonzero(self.lottery_position)
+    rows = rows[np.argsort(self.lottery_position[rows])]
+    return Lines(rows, self._games_apart(rows[0])[rows])
+
+  def _games_behind(self, reference):
+    """Returns how many games each team is behind (or ahead of, if negative)
+    the team at position reference.
+
+    Parameters
+    ----------
+    reference: int or np.ndarray
+      One position for all of the teams, or a position for every team.
+    """
+    return ((self.wins[reference] - self.wins)
+            + (self.losses - self.losses[reference])) / 2
+
+  def _games_apart(self, reference):
+    """Like _games_behind but counts the difference in wins and losses
+    separately, i.e., when comparing to the worst team."""
+    return (np.abs(self.wins[reference] - self.wins)
+            + np.abs(self.losses[reference] - self.losses)) / 2
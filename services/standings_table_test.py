@@ -0,0 +1,56 @@
+from services.fake_nba_service import FakeNbaService
+from services.models import Standings
+from services.standings_table import EAST, WEST, StandingsTable
+
+import unittest
+
+
+class StandingsTableTest(unittest.TestCase):
+
+  def setUp(self):
+    self.standings = Standings.from_json(
+        FakeNbaService().conference_standings())
+    self.table = StandingsTable(self.standings)
+
+  def test_conferenceLines_matchTheFeed(self):
+    for conference, rows in ((EAST, self.standings.east),
+                             (WEST, self.standings.west)):
+      lines = self.table.conference_lines(conference)
+      self.assertEqual(
+          [self.table.team_ids[i] for i in lines.rows],
+          [row.team_id for row in rows])
+      self.assertEqual(
+          lines.games_behind.tolist(),
+          [float(row.games_behind) for row in rows])
+
+  def test_tankLines_worstRecordsFirst(self):
+    rows = self.standings.east + self.standings.west
+    expected = sorted(rows, key=lambda row: row.loss_pct, reverse=True)[:10]
+    lines = self.table.tank_lines(10)
+    self.assertEqual(
+        [self.table.team_ids[i] for i in lines.rows],
+        [row.team_id for row in expected])
+    worst = expected[0]
+    self.assertEqual(
+        lines.games_behind.tolist(),
+        [(abs(worst.win - row.win) + abs(worst.loss - row.loss)) / 2
+         for row in expected])
+
+  def test_playInLines(self):
+    lines = self.table.play_in_lines(WEST)
+    self.assertEqual(
+        [self.table.team_ids[i] for i in lines.rows],
+        [row.team_id for row in self.standings.west[6:10]])
+
+  def test_lotteryLines(self):
+    lines = self.table.lottery_lines()
+    self.assertEqual(len(lines.rows), 14)
+    self.assertEqual(lines.rows[0], self.table.tank_order[0])
+    self.assertTrue((self.table.conference_rank[lines.rows] > 8).all())
+    self.assertEqual(
+        self.table.lottery_position[lines.rows].tolist(), list(range(1, 15)))
+    self.assertEqual(lines.games_behind[0], 0)
+
+
+if __name__ == '__main__':
+  unittest.main()
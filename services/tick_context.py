@@ -0,0 +1,114 @@
+"""
+A wrapper around an NbaService that lives for a single scheduler tick and
+resolves each feed at most once, no matter how many bots ask for it. It has the
+same lookup methods as NbaService, so the bots can use it in place of one.
+Concurrent requests for the same feed are coalesced ("single-flight"): the
+first caller makes the call and every other caller waits for and shares its
+result.
+
+Create a new TickContext for every tick so that nothing is served across ticks;
+caching across ticks is CachingNbaService's job. If the service it wraps can
+tell how old its responses are (see CachingNbaService.age), the age of each
+feed that was used is kept in ages. Give each bot its own view() of the tick to
+tell which feeds, and how old, each bot used.
+"""
+
+import threading
+
+
+class _Flight:
+  """A call that is in progress or done."""
+
+  def __init__(self):
+    self.done = threading.Event()
+    self.value = None
+    self.error = None
+    # The age in seconds of value, if the service can tell.
+    self.age = None
+
+
+class TickContext:
+
+  def __init__(self, nba_service):
+    """
+    Parameters
+    ----------
+    nba_service: NbaService
+      The service that makes the actual calls.
+    """
+    self.nba_service = nba_service
+    # (endpoint, args) -> age in seconds of the response the tick used.
+    self.ages = dict()
+    self._flights = dict()
+    self._lock = threading.Lock()
+
+  def view(self):
+    """Returns a TickContext that shares this one's lookups but keeps its own
+    ages."""
+    view = TickContext(self.nba_service)
+    view._flights = self._flights
+    view._lock = self._lock
+    return view
+
+  def boxscore(self, start_date_est, game_id):
+    return self._resolve(
+        'boxscore', self.nba_service.boxscore, start_date_est, game_id)
+
+  def conference_standings(self):
+    return self._resolve(
+        'conference_standings', self.nba_service.conference_standings)
+
+  def current_year(self):
+    return self._resolve('current_year', self.nba_service.current_year)
+
+  def player_index(self, year):
+    return self._resolve(
+        'player_index', self.nba_service.player_index, year)
+
+  def players(self, year):
+    return self._resolve('players', self.nba_service.players, year)
+
+  def remaining_games(self, year):
+    return self._resolve(
+        'remaining_games', self.nba_service.remaining_games, year)
+
+  def roster(self, team, year):
+    return self._resolve('roster', self.nba_service.roster, team, year)
+
+  def schedule(self, team, year):
+    return self._resolve('schedule', self.nba_service.schedule, team, year)
+
+  def teams(self, year):
+    return self._resolve('teams', self.nba_service.teams, year)
+
+  def _resolve(self, endpoint, method, *args):
+    key = (endpoint, args)
+    with self._lock:
+      flight = self._flights.get(key)
+      is_leader = flight is None
+      if is_leader:
+        flight = self._flights[key] = _Flight()
+
+    if not is_leader:
+      flight.done.wait()
+      if flight.error is not None:
+        raise flight.error
+      if flight.age is not None:
+        self.ages[key] = flight.age
+      return flight.value
+
+    try:
+      flight.value = method(*args)
+      age = getattr(self.nba_service, 'age', None)
+      if age is not None:
+        flight.age = self.ages[key] = age(endpoint, *args)
+    except Exception as e:
+      # Share the error with anyone already waiting but let later callers try
+      # again.
+      flight.error = e
+      with self._lock:
+        del self._flights[key]
+      raise
+    finally:
+      flight.done.set()
+    return flight.value
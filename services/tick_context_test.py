@@ -0,0 +1,100 @@
+from concurrent.futures import ThreadPoolExecutor
+from services.fake_nba_service import FakeNbaService
+from services.tick_context import TickContext, _Flight
+from unittest.mock import MagicMock, patch
+
+import threading
+import unittest
+
+
+class CountingEvent(threading.Event):
+  """An Event that releases a semaphore whenever a thread starts waiting on
+  it."""
+
+  def __init__(self, waiting):
+    super().__init__()
+    self._waiting = waiting
+
+  def wait(self, timeout=None):
+    self._waiting.release()
+    return super().wait(timeout)
+
+
+class TickContextTest(unittest.TestCase):
+
+  def setUp(self):
+    self.delegate = MagicMock(wraps=FakeNbaService())
+    self.tick = TickContext(self.delegate)
+
+  def test_sameFeed_resolvedOnce(self):
+    first = self.tick.teams('2020')
+    second = self.tick.teams('2020')
+    self.assertIs(first, second)
+    self.delegate.teams.assert_called_once_with('2020')
+
+  def test_ages_recordedWhenTheServiceKnowsThem(self):
+    self.assertEqual(self.tick.ages, {})
+    self.delegate.age = MagicMock(return_value=42)
+    self.tick.teams('2020')
+    self.tick.teams('2020')
+    self.delegate.age.assert_called_once_with('teams', '2020')
+    self.assertEqual(self.tick.ages, {('teams', ('2020',)): 42})
+
+  def test_view_sharesLookupsButKeepsItsOwnAges(self):
+    self.delegate.age = MagicMock(return_value=42)
+    sidebar = self.tick.view()
+    game_thread = self.tick.view()
+    self.assertIs(sidebar.teams('2020'), game_thread.teams('2020'))
+    game_thread.current_year()
+    self.delegate.teams.assert_called_once_with('2020')
+    self.assertEqual(sidebar.ages, {('teams', ('2020',)): 42})
+    self.assertEqual(game_thread.ages, {
+      ('current_year', ()): 42,
+      ('teams', ('2020',)): 42,
+    })
+
+  def test_differentArguments_resolvedSeparately(self):
+    self.tick.roster('knicks', '2020')
+    self.tick.roster('cavaliers', '2020')
+    self.tick.roster('knicks', '2020')
+    self.assertEqual(self.delegate.roster.call_count, 2)
+
+  def test_concurrentCalls_coalesced(self):
+    started = threading.Event()
+    release = threading.Event()
+    self.addCleanup(release.set)
+    waiting = threading.Semaphore(0)
+
+    class Flight(_Flight):
+      def __init__(self):
+        super().__init__()
+        self.done = CountingEvent(waiting)
+
+    def slow_current_year():
+      started.set()
+      release.wait()
+      return '2020'
+    self.delegate.current_year.side_effect = slow_current_year
+
+    with patch('services.tick_context._Flight', Flight), \
+        ThreadPoolExecutor(max_workers=4) as executor:
+      futures = [executor.submit(self.tick.current_year) for _ in range(4)]
+      self.assertTrue(started.wait(timeout=1))
+      # Only release the first call once the other three are waiting for it.
+      for _ in range(3):
+        self.assertTrue(waiting.acquire(timeout=1))
+      release.set()
+      results = [f.result() for f in futures]
+
+    self.assertEqual(results, ['2020'] * 4)
+    self.delegate.current_year.assert_called_once()
+
+  def test_error_notRemembered(self):
+    self.delegate.current_year.side_effect = [Exception('boom'), '2020']
+    with self.assertRaises(Exception):
+      self.tick.current_year()
+    self.assertEqual(self.tick.current_year(), '2020')
+
+
+if __name__ == '__main__':
+  unittest.main()
@@ -0,0 +1,102 @@
+"""
+Splits a subreddit sidebar into static text and sections so that any number of
+sections can be replaced in a single pass.
+
+A section named Foo is everything from the [](#StartFoo) marker up to and
+including the [](#EndFoo) marker after it. The markers are empty links, so they
+don't show up in the rendered sidebar. The sidebar is scanned for markers once,
+when the document is created, and splice builds the new sidebar with a single
+join, so the cost doesn't grow with the number of sections.
+"""
+
+from typing import NamedTuple
+
+import re
+
+_MARKER = re.compile(r'\[\]\(#(Start|End)(\w+)\)')
+
+
+class _Section(NamedTuple):
+  name: str
+  # The section's current text, including both markers.
+  text: str
+
+
+class SidebarDocument:
+
+  def __init__(self, text, names=None):
+    """
+    Parameters
+    ----------
+    text: str
+      The sidebar (i.e., the subreddit's description).
+    names: collection of str
+      Optional names of the sections to recognize. Every pair of markers is a
+      section if this is missing.
+    """
+    self.text = text
+    # Static text (str) and sections (_Section) in the order they appear.
+    self._spans = self._tokenize(text, names)
+
+  @staticmethod
+  def _tokenize(text, names):
+    spans = []
+    pos = 0
+    open_name = None
+    open_start = None
+    for m in _MARKER.finditer(text):
+      kind, name = m.group(1), m.group(2)
+      if names is not None and name not in names:
+        continue
+      if kind == 'Start':
+        # A start marker inside another section is just text.
+        if open_name is None:
+          open_name, open_start = name, m.start()
+      elif name == open_name:
+        spans.append(text[pos:open_start])
+        spans.append(_Section(name, text[open_start:m.end()]))
+        pos = m.end()
+        open_name = None
+    spans.append(text[pos:])
+    return spans
+
+  @property
+  def names(self):
+    """The names of the sections in the document, in order."""
+    names = []
+    for span in self._spans:
+      if isinstance(span, _Section) and span.name not in names:
+        names.append(span.name)
+    return names
+
+  def splice(self, sections):
+    """Replaces the text of sections.
+
+    Parameters
+    ----------
+    sections: dict
+      Maps section names to their new text (without markers). Sections that
+      aren't in the document are ignored and sections that aren't in the dict
+      are left alone.
+
+    Returns the new document text and the names of the sections whose text
+    changed, in document order.
+    """
+    parts = []
+    changed = []
+    for span in self._spans:
+      if not isinstance(span, _Section):
+        parts.append(span)
+        continue
+      text = sections.get(span.name)
+      if text is None:
+        parts.append(span.text)
+        continue
+      new_text = (f'[](#Start{span.name})\n\n{text}\n\n'
+                  f'[](#End{span.name})')
+      parts.append(new_text)
+      if new_text != span.text and span.name not in changed:
+        changed.append(span.name)
+    if not changed:
+      return self.text, changed
+    return ''.join(parts), changed
@@ -0,0 +1,72 @@
+from sidebar_document import SidebarDocument
+
+import unittest
+
+SIDEBAR = """# Welcome
+
+[](#StartSchedule)
+
+old schedule
+
+[](#EndSchedule)
+
+Some text in between.
+
+[](#StartRoster)
+
+old roster
+
+[](#EndRoster)
+
+[](#StartCustom)
+
+custom
+
+[](#EndCustom)
+"""
+
+
+class SidebarDocumentTest(unittest.TestCase):
+
+  def test_names(self):
+    document = SidebarDocument(SIDEBAR)
+    self.assertEqual(document.names, ['Schedule', 'Roster', 'Custom'])
+    document = SidebarDocument(SIDEBAR, ['Roster'])
+    self.assertEqual(document.names, ['Roster'])
+
+  def test_splice_replacesSectionsInOnePass(self):
+    text, changed = SidebarDocument(SIDEBAR).splice(
+        {'Schedule': 'new schedule', 'Custom': 'custom', 'Missing': 'x'})
+    self.assertEqual(changed, ['Schedule'])
+    self.assertIn('[](#StartSchedule)\n\nnew schedule\n\n[](#EndSchedule)', text)
+    self.assertIn('old roster', text)
+    self.assertNotIn('old schedule', text)
+    self.assertTrue(text.startswith('# Welcome\n\n'))
+    self.assertIn('\n\nSome text in between.\n\n', text)
+
+  def test_splice_nothingChanged_returnsSameText(self):
+    document = SidebarDocument(SIDEBAR)
+    text, changed = document.splice({'Custom': 'custom'})
+    self.assertIs(text, SIDEBAR)
+    self.assertEqual(changed, [])
+
+  def test_splice_onlyReplacesTheSectionItself(self):
+    # The same text as the section elsewhere in the sidebar must not change.
+    sidebar = ('[](#StartA)\n\nsame\n\n[](#EndA)\n'
+               '[](#StartB)\n\nsame\n\n[](#EndB)')
+    text, changed = SidebarDocument(sidebar).splice({'A': 'new'})
+    self.assertEqual(changed, ['A'])
+    self.assertEqual(
+        text,
+        '[](#StartA)\n\nnew\n\n[](#EndA)\n[](#StartB)\n\nsame\n\n[](#EndB)')
+
+  def test_splice_ignoresUnmatchedMarkers(self):
+    sidebar = '[](#EndA) [](#StartA)\n\nold\n\n[](#EndA) [](#StartB) end'
+    text, changed = SidebarDocument(sidebar).splice({'A': 'new', 'B': 'new'})
+    self.assertEqual(changed, ['A'])
+    self.assertEqual(
+        text, '[](#EndA) [](#StartA)\n\nnew\n\n[](#EndA) [](#StartB) end')
+
+
+if __name__ == '__main__':
+  unittest.main()
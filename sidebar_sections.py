@@ -0,0 +1,265 @@
+"""
+Decides which sidebar sections need to be rebuilt on a run and remembers the
+text of the ones that don't.
+
+Every section declares the NBA data it's built from (its dependencies) and the
+refresh policies that say when its text goes stale. The roster, for example,
+changes a few times a season, so there's no point in downloading the players
+feed every minute to rebuild it. A run first looks up only the data the policies
+need to decide what's stale, then only the data the stale sections are built
+from, and reuses the remembered text of everything else.
+
+A section is stale if it was never built or if any of its policies says so. A
+section without policies is rebuilt on every run.
+"""
+
+from constants import EASTERN_TIMEZONE
+from services.models import Standings, team_map
+from services.playoff_odds import playoff_odds
+from services.schedule_index import ScheduleIndex
+from services.standings_table import StandingsTable
+from typing import NamedTuple
+
+# The names of the NBA data sections can depend on.
+DEPENDENCIES = (
+    'player_index', 'remaining_games', 'roster', 'schedule', 'standings',
+    'teams')
+
+
+class Section:
+
+  def __init__(self, name, build, depends=DEPENDENCIES, policies=()):
+    """
+    Parameters
+    ----------
+    name: str
+      The name used in the section's markers, i.e., Foo for [](#StartFoo).
+    build: function
+      Called with a logger and SidebarData. Returns the section's text.
+    depends: tuple of str
+      The data in DEPENDENCIES that build reads.
+    policies: tuple
+      The refresh policies (i.e., Interval) that decide when the section is
+      rebuilt.
+    """
+    self.name = name
+    self.build = build
+    self.depends = tuple(depends)
+    self.policies = tuple(policies)
+
+
+class Interval:
+  """Rebuilds a section once its text is older than interval."""
+
+  def __init__(self, interval):
+    self.interval = interval
+
+  def requires(self, section):
+    return ()
+
+  def snapshot(self, section, data):
+    return data.now
+
+  def is_stale(self, section, snapshot, data):
+    return data.now - snapshot >= self.interval
+
+
+class OnUpstreamChange:
+  """Rebuilds a section when any of the responses it depends on changed.
+
+  The services hand out the same response object for as long as the data
+  doesn't change (see CachingNbaService, ResponseStore and the Formats in
+  nba_service.py), so this compares identities instead of contents. A service
+  that returns a new object every time makes this rebuild on every run."""
+
+  def requires(self, section):
+    return section.depends
+
+  def snapshot(self, section, data):
+    return tuple(data.responses[name] for name in section.depends)
+
+  def is_stale(self, section, snapshot, data):
+    return any(data.responses[name] is not response
+               for name, response in zip(section.depends, snapshot))
+
+
+class OnGameFinal:
+  """Rebuilds a section when another Knicks game is over."""
+
+  def requires(self, section):
+    return ('schedule',)
+
+  def snapshot(self, section, data):
+    return data.schedule.final_games
+
+  def is_stale(self, section, snapshot, data):
+    return data.schedule.final_games != snapshot
+
+
+class OnNewDay:
+  """Rebuilds a section when the date changes in New York, i.e., for text that
+  says Today or Yesterday."""
+
+  def requires(self, section):
+    return ()
+
+  def snapshot(self, section, data):
+    return data.now.astimezone(EASTERN_TIMEZONE).date()
+
+  def is_stale(self, section, snapshot, data):
+    return self.snapshot(section, data) != snapshot
+
+
+class BuiltSection(NamedTuple):
+  text: str
+  # What each of the section's policies saw when the text was built.
+  snapshots: tuple
+
+
+class SidebarData:
+  """Everything the sections are built from. The raw NBA Data API responses are
+  converted into records (see services/models.py), the standings into a
+  StandingsTable and the playoff odds are simulated the first time they're
+  used. Only the responses that were
+  looked up on this run are available."""
+
+  def __init__(self, now, responses):
+    """
+    Parameters
+    ----------
+    now: datetime
+    responses: dict
+      Maps names in DEPENDENCIES to raw NBA Data API responses.
+    """
+    self.now = now
+    self.responses = responses
+    self._records = dict()
+
+  @property
+  def player_index(self):
+    return self.responses['player_index']
+
+  @property
+  def roster(self):
+    return self.responses['roster']
+
+  @property
+  def teams(self):
+    return self._record('teams', lambda: team_map(self.responses['teams']))
+
+  @property
+  def schedule(self):
+    return self._record(
+        'schedule', lambda: ScheduleIndex.of(self.responses['schedule']))
+
+  @property
+  def standings(self):
+    return self._record(
+        'standings', lambda: Standings.from_json(self.responses['standings']))
+
+  @property
+  def standings_table(self):
+    return self._record(
+        'standings_table', lambda: StandingsTable(self.standings))
+
+  @property
+  def playoff_odds(self):
+    return self._record('playoff_odds', lambda: playoff_odds(
+        self.standings_table, self.responses['remaining_games']))
+
+  def _record(self, name, make):
+    record = self._records.get(name)
+    if record is None:
+      record = self._records[name] = make()
+    return record
+
+
+class SectionRefresh:
+  """Rebuilds the stale sections on one run.
+
+  Usage: look up the data in to_check(), then the data in to_build(), adding
+  each response to responses (or its name to failed if the lookup failed), then
+  call build.
+
+  A section that can't be built, because some of its data couldn't be looked up
+  or because build raised, keeps its text from the last run and is left out if
+  it was never built. The other sections are built as usual."""
+
+  def __init__(self, sections, built, now):
+    """
+    Parameters
+    ----------
+    sections: list of Section
+    built: dict
+      Maps section names to BuiltSection from earlier runs. Updated by build.
+    now: datetime
+    """
+    self.sections = sections
+    self.built = built
+    self.responses = dict()
+    # The names of the data that couldn't be looked up.
+    self.failed = set()
+    self.data = SidebarData(now, self.responses)
+    self._stale = None
+
+  def to_check(self):
+    """Returns the names of the data needed to decide which sections are
+    stale."""
+    names = set()
+    for section in self.sections:
+      if section.name in self.built:
+        for policy in section.policies:
+          names.update(policy.requires(section))
+    return names - self.responses.keys() - self.failed
+
+  def to_build(self):
+    """Returns the names of the data needed to build the stale sections. The
+    data in to_check must have been looked up."""
+    self._stale = [s for s in self.sections if self._is_stale(s)]
+    names = set()
+    for section in self._stale:
+      names.update(self._requires(section))
+    return names - self.responses.keys() - self.failed
+
+  def build(self, logger):
+    """Builds the stale sections and returns a list of (marker, text) tuples for
+    every section that has text."""
+    if self._stale is None:
+      self.to_build()
+    for section in self._stale:
+      missing = self.failed.intersection(self._requires(section))
+      if missing:
+        logger.warning(
+            f'Not building {section.name} text without '
+            f'{", ".join(sorted(missing))}.')
+        continue
+      logger.info(f'Building {section.name} text.')
+      try:
+        text = section.build(logger, self.data)
+        snapshots = tuple(
+            p.snapshot(section, self.data) for p in section.policies)
+      except Exception:
+        logger.exception(f'Could not build {section.name} text.')
+        continue
+      self.built[section.name] = BuiltSection(text, snapshots)
+    return [(s.name, self.built[s.name].text) for s in self.sections
+            if s.name in self.built]
+
+  @staticmethod
+  def _requires(section):
+    """The names of all the data it takes to build section."""
+    names = set(section.depends)
+    for policy in section.policies:
+      names.update(policy.requires(section))
+    return names
+
+  def _is_stale(self, section):
+    built = self.built.get(section.name)
+    if built is None or not section.policies:
+      return True
+    if any(self.failed.intersection(p.requires(section))
+           for p in section.policies):
+      # There's no telling, so the text from the last run is kept.
+      return False
+    return any(policy.is_stale(section, snapshot, self.data)
+               for policy, snapshot in zip(section.policies, built.snapshots))
@@ -0,0 +1,172 @@
+from constants import UTC
+from datetime import datetime, timedelta
+from services.fake_nba_service import FakeNbaService
+from sidebar_sections import (
+    Interval, OnGameFinal, OnNewDay, OnUpstreamChange, Section, SectionRefresh)
+from unittest.mock import MagicMock
+
+import unittest
+
+NOW = datetime(2020, 12, 29, 17, 0, 0, 0, UTC)
+
+
+class SectionRefreshTest(unittest.TestCase):
+
+  def setUp(self):
+    self.logger = MagicMock()
+    self.builds = []
+    self.built = dict()
+    self.schedule = FakeNbaService().schedule('knicks', '2020')
+    self.teams = FakeNbaService().teams('2020')
+
+  def section(self, name, depends, policies):
+    def build(logger, data):
+      self.builds.append(name)
+      return f'{name} {len(data.teams)}'
+    return Section(name, build, depends, policies)
+
+  def run_refresh(self, sections, now, responses):
+    """Runs a refresh and returns the names of the data it looked up. Looking up
+    anything that isn't in responses fails."""
+    refresh = SectionRefresh(sections, self.built, now)
+    looked_up = []
+    for to_look_up in (refresh.to_check, refresh.to_build):
+      for name in sorted(to_look_up()):
+        looked_up.append(name)
+        if name in responses:
+          refresh.responses[name] = responses[name]
+        else:
+          refresh.failed.add(name)
+    self.sections = refresh.build(self.logger)
+    return looked_up
+
+  def test_firstRun_buildsEverything(self):
+    sections = [
+        self.section('A', ('teams',), (Interval(timedelta(hours=1)),)),
+        self.section('B', ('schedule', 'teams'), ())]
+    looked_up = self.run_refresh(
+        sections, NOW, {'teams': self.teams, 'schedule': self.schedule})
+    self.assertEqual(looked_up, ['schedule', 'teams'])
+    self.assertEqual(self.builds, ['A', 'B'])
+    self.assertEqual(self.sections, [('A', 'A 42'), ('B', 'B 42')])
+
+  def test_failedLookup_onlySkipsTheSectionsThatNeedIt(self):
+    sections = [
+        self.section('A', ('teams',), ()),
+        self.section('B', ('schedule', 'teams'), ())]
+    self.run_refresh(sections, NOW, {'teams': self.teams})
+    self.assertEqual(self.builds, ['A'])
+    self.assertEqual(self.sections, [('A', 'A 42')])
+
+    # B keeps the text from the last run.
+    self.run_refresh(
+        sections, NOW, {'schedule': self.schedule, 'teams': self.teams})
+    self.run_refresh(sections, NOW, {'teams': self.teams})
+    self.assertEqual(self.builds, ['A', 'A', 'B', 'A'])
+    self.assertEqual(self.sections, [('A', 'A 42'), ('B', 'B 42')])
+
+  def test_failedBuild_onlySkipsThatSection(self):
+    def fail(logger, data):
+      raise ValueError('boom')
+    sections = [
+        Section('A', fail, ('teams',), ()),
+        self.section('B', ('teams',), ())]
+    self.run_refresh(sections, NOW, {'teams': self.teams})
+    self.assertEqual(self.sections, [('B', 'B 42')])
+    self.logger.exception.assert_called_once()
+
+  def test_interval_reusesTextWithoutLookingAnythingUp(self):
+    sections = [self.section('A', ('teams',), (Interval(timedelta(hours=1)),))]
+    self.run_refresh(sections, NOW, {'teams': self.teams})
+
+    looked_up = self.run_refresh(
+        sections, NOW + timedelta(minutes=59), {'teams': self.teams})
+    self.assertEqual(looked_up, [])
+    self.assertEqual(self.builds, ['A'])
+    self.assertEqual(self.sections, [('A', 'A 42')])
+
+    self.run_refresh(sections, NOW + timedelta(hours=1), {'teams': self.teams})
+    self.assertEqual(self.builds, ['A', 'A'])
+
+  def test_noPolicies_rebuildsEveryRun(self):
+    sections = [self.section('A', ('teams',), ())]
+    self.run_refresh(sections, NOW, {'teams': self.teams})
+    self.run_refresh(sections, NOW, {'teams': self.teams})
+    self.assertEqual(self.builds, ['A', 'A'])
+
+  def test_onUpstreamChange_comparesResponseIdentity(self):
+    sections = [self.section('A', ('teams',), (OnUpstreamChange(),))]
+    self.run_refresh(sections, NOW, {'teams': self.teams})
+
+    self.run_refresh(sections, NOW, {'teams': self.teams})
+    self.assertEqual(self.builds, ['A'])
+
+    self.run_refresh(sections, NOW, {'teams': FakeNbaService().teams('2020')})
+    self.assertEqual(self.builds, ['A', 'A'])
+
+  def test_onGameFinal_rebuildsWhenAnotherGameIsOver(self):
+    sections = [self.section('A', ('teams',), (OnGameFinal(),))]
+    responses = {'teams': self.teams, 'schedule': self.schedule}
+    self.assertEqual(
+        self.run_refresh(sections, NOW, responses), ['schedule', 'teams'])
+
+    # Only the schedule is needed to see that nothing changed.
+    responses['schedule'] = FakeNbaService().schedule('knicks', '2020')
+    self.assertEqual(self.run_refresh(sections, NOW, responses), ['schedule'])
+    self.assertEqual(self.builds, ['A'])
+
+    schedule = FakeNbaService().schedule('knicks', '2020')
+    game = next(g for g in schedule['league']['standard']
+                if g['statusNum'] != 3)
+    game['statusNum'] = 3
+    responses['schedule'] = schedule
+    self.run_refresh(sections, NOW, responses)
+    self.assertEqual(self.builds, ['A', 'A'])
+
+  def test_onNewDay_rebuildsAfterMidnightInNewYork(self):
+    sections = [self.section('A', ('teams',), (OnNewDay(),))]
+    # 11:30 PM in New York.
+    now = datetime(2020, 12, 30, 4, 30, 0, 0, UTC)
+    self.run_refresh(sections, now, {'teams': self.teams})
+    self.run_refresh(sections, now + timedelta(minutes=29), {'teams': self.teams})
+    self.assertEqual(self.builds, ['A'])
+    self.run_refresh(sections, now + timedelta(minutes=30), {'teams': self.teams})
+    self.assertEqual(self.builds, ['A', 'A'])
+
+  def test_onlyStaleSectionsAreRebuilt(self):
+    sections = [
+        self.section('A', ('teams',), (Interval(timedelta(hours=1)),)),
+        self.section('B', ('teams',), ())]
+    self.run_refresh(sections, NOW, {'teams': self.teams})
+    self.run_refresh(sections, NOW, {'teams': self.teams})
+    self.assertEqual(self.builds, ['A', 'B', 'B'])
+    self.assertEqual(self.sections, [('A', 'A 42'), ('B', 'B 42')])
+
+  def test_failedLookup_onlySkipsTheSectionsThatNeedIt(self):
+    sections = [
+        self.section('A', ('teams',), ()),
+        self.section('B', ('schedule', 'teams'), ())]
+    self.run_refresh(sections, NOW, {'teams': self.teams})
+    self.assertEqual(self.builds, ['A'])
+    self.assertEqual(self.sections, [('A', 'A 42')])
+
+    # B keeps the text from the last run.
+    self.run_refresh(
+        sections, NOW, {'schedule': self.schedule, 'teams': self.teams})
+    self.run_refresh(sections, NOW, {'teams': self.teams})
+    self.assertEqual(self.builds, ['A', 'A', 'B', 'A'])
+    self.assertEqual(self.sections, [('A', 'A 42'), ('B', 'B 42')])
+
+  def test_failedBuild_onlySkipsThatSection(self):
+    def fail(logger, data):
+      raise ValueError('boom')
+    sections = [
+        Section('A', fail, ('teams',), ()),
+        self.section('B', ('teams',), ())]
+    self.run_refresh(sections, NOW, {'teams': self.teams})
+    self.assertEqual(self.sections, [('B', 'B 42')])
+    self.logger.exception.assert_called_once()
+
+
+if __name__ == '__main__':
+  unittest.main()
@@ -1,22 +1,108 @@
 from constants import EASTERN_TIMEZONE, TEAM_SUB_MAP, UTC
 from datetime import datetime, timedelta
 from optparse import OptionParser
+from services.async_nba_service import AsyncNbaService
 from services.nba_service import NbaService
-
-import copy
+from services.response_store import ResponseStore
+from services.playoff_odds import LOTTERY_TEAMS
+from services.standings_table import EAST, WEST
+from sidebar_document import SidebarDocument
+from sidebar_sections import (
+    DEPENDENCIES, Interval, OnGameFinal, OnNewDay, OnUpstreamChange, Section,
+    SectionRefresh)
+
+import asyncio
 import dateutil.parser
+import hashlib
+import json
 import logging.config
+import numpy as np
+import os
 import praw
 import sys
 import traceback
 
-def build_roster(nba_service, year):
-  players = nba_service.players(year)
-  roster = nba_service.roster('knicks', year)
-  team_players = filter(lambda player: player['personId'] in roster, players)
-
+# Even when none of the sections changed, the sidebar is read again after this
+# long in case a moderator edited it by hand.
+SETTINGS_REREAD_INTERVAL = timedelta(minutes=15)
+
+DEFAULT_STATE_PATH = os.path.join(
+    os.path.expanduser('~'), '.redditbot', 'sidebar.json')
+
+
+class SidebarState:
+  """Remembers content hashes of the sections from the last time the sidebar
+  was known to be up to date so that unchanged runs can skip reddit entirely,
+  and which sections the sidebar had then so that only those are built.
+
+  State is kept in memory and, if a path is given, in a JSON file so that it
+  also works when the bot runs as a cron job. The text of the sections (see
+  SectionRefresh) is only kept in memory, so a new process builds every section
+  once."""
+
+  def __init__(self, path=None):
+    self.path = path
+    self.hashes = dict()
+    self.last_read = None
+    # The names of the sections whose markers were in the sidebar.
+    self.names = None
+    # Section name -> BuiltSection
+    self.sections = dict()
+    if path is not None:
+      self._load()
+
+  @staticmethod
+  def hash_sections(sections):
+    return {marker: hashlib.sha1(text.encode('utf-8')).hexdigest()
+            for marker, text in sections}
+
+  def is_current(self, hashes, now):
+    """Returns True if the sidebar already has these sections and it was read
+    recently enough to trust that."""
+    return (self.last_read is not None
+            and hashes == self.hashes
+            and now - self.last_read < SETTINGS_REREAD_INTERVAL)
+
+  def present_sections(self, now):
+    """Returns the names of the sections that were in the sidebar when it was
+    last read, or None if it has to be read again to tell."""
+    if (self.names is None or self.last_read is None
+        or now - self.last_read >= SETTINGS_REREAD_INTERVAL):
+      return None
+    return self.names
+
+  def remember(self, hashes, now, names):
+    self.hashes = hashes
+    self.last_read = now
+    self.names = names
+    if self.path is not None:
+      self._save()
+
+  def _load(self):
+    try:
+      with open(self.path, 'r') as f:
+        data = json.loads(f.read())
+      self.hashes = data['hashes']
+      self.last_read = dateutil.parser.parse(data['last_read'])
+      self.names = data.get('names')
+    except (OSError, ValueError, KeyError):
+      pass
+
+  def _save(self):
+    os.makedirs(os.path.dirname(self.path), exist_ok=True)
+    data = {
+      'hashes': self.hashes,
+      'last_read': self.last_read.isoformat(),
+      'names': self.names,
+    }
+    tmp_path = f'{self.path}.{os.getpid()}.tmp'
+    with open(tmp_path, 'w') as f:
+      f.write(json.dumps(data))
+    os.replace(tmp_path, self.path)
+
+def build_roster(player_index, roster):
   rows = []
-  for player in team_players:
+  for player in player_index.lookup(roster):
     name = f'{player["firstName"]} {player["lastName"]}'
     jersey = player['jersey'] if player['jersey'] else '-'
     position = player['pos'].replace('-', '/') if player['pos'] else ''
@@ -30,49 +116,48 @@ def build_roster(nba_service, year):
   return '\n'.join(rows)
 
 
-def build_schedule(logger, nba_service, now, teams, year):
+def build_schedule(logger, schedule, now, teams):
+  """Builds the schedule table from a ScheduleIndex."""
   today = now.astimezone(EASTERN_TIMEZONE).date()
-  schedule = nba_service.schedule('knicks', year)
 
   logger.info('Building schedule text.')
   # FYI: We want to show to a show a total of 12 games:
   #    most recent + 4 prior + 7 next.
-  # Get the array index of the last game played.
-  last_played_idx = schedule['league']['lastStandardGamePlayedIndex']
+  # Get the array index of the last game that tipped off.
+  last_played_idx = schedule.last_started(now)
 
   # Get the next 7 games.
-  end_idx = min(last_played_idx + 7, len(schedule['league']['standard']))
+  end_idx = min(last_played_idx + 7, len(schedule))
 
   # Show the previous 4 games or more if we're at the end of the season.
   start_idx = max(0, last_played_idx - (4 + (7 - (end_idx - last_played_idx - 1))))
 
   rows = ['Date|Team|Loc|Time/Outcome', ':--:|:--:|:--:|:--:']
   for i in range(start_idx, end_idx):
-    game = schedule['league']['standard'][i]
-    is_home_team = game['isHomeTeam']
-    knicks_score = game['hTeam' if is_home_team else 'vTeam']
-    opp_score = game['vTeam' if is_home_team else 'hTeam']
-    opp_team_name = teams[opp_score['teamId']]['nickname']
+    game = schedule.games[i]
+    is_home_team = schedule.is_home[i]
+    knicks_score = game.knicks
+    opp_score = game.opponent
+    opp_team_name = teams[schedule.opponent_ids[i]].nickname
     opp_team_sub = TEAM_SUB_MAP[opp_team_name]
 
-    gametime = dateutil.parser \
-        .parse(game['startTimeUTC']) \
-        .astimezone(EASTERN_TIMEZONE)
+    gametime = schedule.eastern_starts[i]
+    gamedate = schedule.eastern_dates[i]
 
-    if gametime.date() == today:
+    if gamedate == today:
       date = 'Today'
-    elif gametime.date() == today - timedelta(days=1):
+    elif gamedate == today - timedelta(days=1):
       date = 'Yesterday'
-    elif gametime.date() == today + timedelta(days=1):
+    elif gamedate == today + timedelta(days=1):
       date = 'Tomorrow'
     else:
       date = gametime.strftime('%b %d')
 
     time = gametime.strftime('%I:%M %p').lstrip('0')
-    time_or_score = (time if knicks_score['score'] == ''
+    time_or_score = (time if knicks_score.score is None
         else winloss(knicks_score, opp_score))
 
-    if game['gameUrlCode'] == '20210220/SASNYK':
+    if game.game_url_code == '20210220/SASNYK':
       time_or_score = 'POSTPONED'
 
     row = ('%s|[](/r/%s)|%s|%s' %
@@ -82,52 +167,93 @@ def build_schedule(logger, nba_service, now, teams, year):
   return '\n'.join(rows)
 
 
-def build_standings(standings, teams):
+def build_standings(table, lines, teams):
+  """Builds a standings table.
+
+  Parameters
+  ----------
+  table: StandingsTable
+  lines: Lines
+    The teams to show, i.e., table.conference_lines(EAST).
+  teams: dict
+    teamId -> Team
+  """
   rows = [' | | |Record|GB', ':--:|:--:|:--|:--:|:--:']
-  for i, d in enumerate(standings):
-    team = teams[d['teamId']]['nickname']
+  wins = table.wins[lines.rows].tolist()
+  losses = table.losses[lines.rows].tolist()
+  games_behind = lines.games_behind.tolist()
+  for i, row in enumerate(lines.rows.tolist()):
+    team = teams[table.team_ids[row]].nickname
     teamsub = TEAM_SUB_MAP[team]
-    wins = d['win']
-    loses = d['loss']
-    games_behind = d['gamesBehind']
-    games_behind = '-' if games_behind == '0' else games_behind
-    row = ('%s|[](/r/%s)|%s|%s-%s|%s' %
-           (i + 1, teamsub, team, wins, loses, games_behind))
-    rows.append(row)
+    gb = '-' if games_behind[i] == 0 else (
+        '%.1f' % games_behind[i]).replace('.0', '')
+    rows.append('%s|[](/r/%s)|%s|%s-%s|%s' %
+                (i + 1, teamsub, team, wins[i], losses[i], gb))
+  return '\n'.join(rows)
+
+
+def build_tank_standings(table, teams):
+  """Builds the standings of the 10 worst teams in the league."""
+  return build_standings(table, table.tank_lines(10), teams)
+
+
+def build_playoff_odds(table, odds, conference, teams):
+  """Builds the playoff odds of the teams in conference (EAST or WEST), in
+  standings order."""
+  rows = [' | |Top 6|Play-In|Lottery', ':--:|:--|:--:|:--:|:--:']
+  lottery = odds.lottery.sum(axis=1)
+  for i in table.conference_lines(conference).rows.tolist():
+    team = teams[table.team_ids[i]].nickname
+    rows.append('[](/r/%s)|%s|%s|%s|%s' % (
+        TEAM_SUB_MAP[team], team, _percent(odds.top_six[i]),
+        _percent(odds.play_in[i]), _percent(lottery[i])))
   return '\n'.join(rows)
 
 
-def build_tank_standings(standings, teams):
-  s2 = copy.deepcopy(standings)
-  rows = s2['conference']['east'] + s2['conference']['west']
-  rows = sorted(rows, key=lambda team: float(team['lossPct']), reverse=True)
-  worst_wins = int(rows[0]['win'])
-  worst_loss = int(rows[0]['loss'])
-  for row in rows:
-     gb = (abs(worst_wins - int(row['win'])) + abs(worst_loss - int(row['loss']))) / 2
-     row['gamesBehind'] = ('%.1f' % gb).replace('.0', '')
-  return build_standings(rows[:10], teams)
+def build_lottery_odds(table, odds, teams):
+  """Builds the odds of each lottery position (before the drawing) for the
+  teams that might miss the playoffs, most likely to pick first first."""
+  positions = np.arange(1, LOTTERY_TEAMS + 1)
+  chance = odds.lottery.sum(axis=1)
+  candidates = np.flatnonzero(chance)
+  expected = (odds.lottery[candidates] @ positions) / chance[candidates]
+  candidates = candidates[np.argsort(expected, kind='stable')]
+
+  rows = [' | |' + '|'.join(map(str, positions)),
+          ':--:|:--' + '|:--:' * LOTTERY_TEAMS]
+  for i in candidates.tolist():
+    team = teams[table.team_ids[i]].nickname
+    cells = '|'.join(_percent(p) for p in odds.lottery[i].tolist())
+    rows.append('[](/r/%s)|%s|%s' % (TEAM_SUB_MAP[team], team, cells))
+  return '\n'.join(rows)
+
+
+def _percent(p):
+  if p == 0:
+    return '-'
+  if p < 0.005:
+    return '<1%'
+  if p > 0.995 and p < 1:
+    return '>99%'
+  return '%d%%' % round(p * 100)
 
 
 def update_reddit_descr(descr, text, marker):
-  start_marker = f'[](#Start{marker})'
-  start = descr.find(start_marker)
-  end_marker = f'[](#End{marker})'
-  end = descr.find(end_marker)
-  if start == -1 or end == -1:
-    return descr
-  new_text = f'{start_marker}\n\n{text}\n\n{end_marker}'
-  return descr.replace(descr[start:end + len(end_marker)], new_text)
+  """Replaces the text of a single section. See SidebarDocument to replace
+  several at once."""
+  updated_descr, _ = SidebarDocument(descr, [marker]).splice({marker: text})
+  return updated_descr
 
 
 def winloss(knicks_score, opp_score):
-  kscore = int(knicks_score['score'])
-  oscore = int(opp_score['score'])
+  kscore = knicks_score.score
+  oscore = opp_score.score
   return ('W %s-%s' % (kscore, oscore)
       if kscore > oscore else 'L %s-%s' % (oscore, kscore))
 
 
-def execute(logger, now, reddit, subreddit_name):
+def execute(
+    logger, now, reddit, subreddit_name, nba_service=None, state=None):
   """
     The main starting point (after command line args are parsed) that initiates
     all of the work this bot will do. It intereacts with reddit and the NBA Data
@@ -144,35 +270,204 @@ def execute(logger, now, reddit, subreddit_name):
     subreddit_name : string
       The name of the subreddit to modify. The bot must have permissions to edit
       in this sub.
+    nba_service : NbaService
+      Optional service to look up NBA data with (i.e., a CachingNbaService that
+      is shared across runs). A new NbaService is created if this is missing.
+    state : SidebarState
+      Optional state from earlier runs. When given, only the sections that are
+      stale (see SECTIONS) are rebuilt, and reddit isn't queried at all if none
+      of the sections changed since the sidebar was last read.
   """
-  nba_service = NbaService(logger)
-
-  current_year = nba_service.current_year()
-  roster = build_roster(nba_service, current_year)
-  teams = nba_service.teams(current_year)
-  schedule = build_schedule(logger, nba_service, now, teams, current_year)
-
-  logger.info('Building standings text.')
-  nba_standings = nba_service.conference_standings()
-  tank_standings = build_tank_standings(nba_standings, teams)
-  east_standings = build_standings(nba_standings['conference']['east'], teams)
-  west_standings = build_standings(nba_standings['conference']['west'], teams)
+  if nba_service is None:
+    nba_service = NbaService(logger)
+
+  refresh, descr = _section_refresh(logger, now, reddit, subreddit_name, state)
+  current_year = None
+  for to_look_up in (refresh.to_check, refresh.to_build):
+    names = sorted(to_look_up())
+    if names and current_year is None:
+      current_year = nba_service.current_year()
+    for name in names:
+      try:
+        refresh.responses[name] = FETCHERS[name](nba_service, current_year)
+      except Exception:
+        logger.exception(f'Could not look up {name}.')
+        refresh.failed.add(name)
+
+  sections = refresh.build(logger)
+  update_sidebar(logger, now, reddit, subreddit_name, sections, state, descr)
+
+
+async def execute_async(
+    logger, now, reddit, subreddit_name, nba_service=None, state=None):
+  """
+    Same as execute but looks up all of the NBA data it needs concurrently, so it
+    only takes as long as the slowest call instead of the sum of all of them.
 
+    Parameters
+    ----------
+    nba_service : AsyncNbaService or NbaService
+      Optional service to look up NBA data with. An NbaService is wrapped in an
+      AsyncNbaService. A new service is created if this is missing.
+  """
+  if nba_service is None:
+    nba_service = NbaService(logger)
+  if isinstance(nba_service, AsyncNbaService):
+    return await _execute_async(
+        logger, now, reddit, subreddit_name, nba_service, state)
+  async_nba_service = AsyncNbaService(nba_service)
+  try:
+    return await _execute_async(
+        logger, now, reddit, subreddit_name, async_nba_service, state)
+  finally:
+    async_nba_service.close()
+
+
+async def _execute_async(
+    logger, now, reddit, subreddit_name, nba_service, state):
+  refresh, descr = _section_refresh(logger, now, reddit, subreddit_name, state)
+  current_year = None
+  for to_look_up in (refresh.to_check, refresh.to_build):
+    names = sorted(to_look_up())
+    if names and current_year is None:
+      current_year = await nba_service.current_year()
+    # A failed lookup only affects the sections built from it.
+    responses = await asyncio.gather(
+        *[FETCHERS[name](nba_service, current_year) for name in names],
+        return_exceptions=True)
+    for name, response in zip(names, responses):
+      if isinstance(response, Exception):
+        logger.error(f'Could not look up {name}.', exc_info=response)
+        refresh.failed.add(name)
+      else:
+        refresh.responses[name] = response
+
+  sections = refresh.build(logger)
+  update_sidebar(logger, now, reddit, subreddit_name, sections, state, descr)
+
+
+# How to look up each of the DEPENDENCIES with an NbaService (or
+# AsyncNbaService) and the current season's year.
+FETCHERS = {
+  'player_index': lambda nba_service, year: nba_service.player_index(year),
+  'remaining_games':
+      lambda nba_service, year: nba_service.remaining_games(year),
+  'roster': lambda nba_service, year: nba_service.roster('knicks', year),
+  'schedule': lambda nba_service, year: nba_service.schedule('knicks', year),
+  'standings': lambda nba_service, year: nba_service.conference_standings(),
+  'teams': lambda nba_service, year: nba_service.teams(year),
+}
+
+
+# The sections the bot maintains, in the order they're built. Sections whose
+# markers aren't in the sidebar are neither looked up nor built.
+#
+# The schedule shows scores and says Today/Yesterday, the standings and playoff
+# odds only move when the standings response does (which is at most hourly,
+# after games end) and the roster changes a few times a season.
+SECTIONS = [
+  Section('Schedule', lambda logger, data: build_schedule(
+      logger, data.schedule, data.now, data.teams),
+      depends=('schedule', 'teams'),
+      policies=(OnUpstreamChange(), OnNewDay())),
+  Section('TankStandings', lambda logger, data: build_tank_standings(
+      data.standings_table, data.teams),
+      depends=('standings', 'teams'),
+      policies=(OnUpstreamChange(), OnGameFinal())),
+  Section('EastStandings', lambda logger, data: build_standings(
+      data.standings_table, data.standings_table.conference_lines(EAST),
+      data.teams),
+      depends=('standings', 'teams'),
+      policies=(OnUpstreamChange(), OnGameFinal())),
+  Section('WestStandings', lambda logger, data: build_standings(
+      data.standings_table, data.standings_table.conference_lines(WEST),
+      data.teams),
+      depends=('standings', 'teams'),
+      policies=(OnUpstreamChange(), OnGameFinal())),
+  Section('EastPlayoffOdds', lambda logger, data: build_playoff_odds(
+      data.standings_table, data.playoff_odds, EAST, data.teams),
+      depends=('remaining_games', 'standings', 'teams'),
+      policies=(OnUpstreamChange(),)),
+  Section('WestPlayoffOdds', lambda logger, data: build_playoff_odds(
+      data.standings_table, data.playoff_odds, WEST, data.teams),
+      depends=('remaining_games', 'standings', 'teams'),
+      policies=(OnUpstreamChange(),)),
+  Section('LotteryOdds', lambda logger, data: build_lottery_odds(
+      data.standings_table, data.playoff_odds, data.teams),
+      depends=('remaining_games', 'standings', 'teams'),
+      policies=(OnUpstreamChange(),)),
+  Section('Roster', lambda logger, data: build_roster(
+      data.player_index, data.roster),
+      depends=('player_index', 'roster'),
+      policies=(Interval(timedelta(hours=6)),)),
+]
+
+
+def register_section(name, build, depends=DEPENDENCIES, policies=()):
+  """Adds a section to SECTIONS, or replaces the one with the same name. See
+  Section for the parameters. By default the section can read all of the data
+  and is rebuilt on every run."""
+  section = Section(name, build, depends, policies)
+  for i, existing in enumerate(SECTIONS):
+    if existing.name == name:
+      SECTIONS[i] = section
+      return
+  SECTIONS.append(section)
+
+
+def _section_refresh(logger, now, reddit, subreddit_name, state):
+  """Returns a SectionRefresh of the sections whose markers are in the sidebar,
+  and the sidebar if it had to be read to find out which those are (otherwise
+  None)."""
+  descr = None
+  names = state.present_sections(now) if state is not None else None
+  if names is None:
+    descr = _read_sidebar(logger, reddit, subreddit_name)
+    names = SidebarDocument(descr, [s.name for s in SECTIONS]).names
+  built = state.sections if state is not None else dict()
+  sections = [s for s in SECTIONS if s.name in names]
+  return SectionRefresh(sections, built, now), descr
+
+
+def _read_sidebar(logger, reddit, subreddit_name):
   logger.info('Querying reddit settings.')
-  subreddit = reddit.subreddit(subreddit_name)
-  descr = subreddit.mod.settings()['description']
-  updated_descr = update_reddit_descr(descr, schedule, 'Schedule')
-  updated_descr = update_reddit_descr(updated_descr, tank_standings, 'TankStandings')
-  updated_descr = update_reddit_descr(updated_descr, east_standings, 'EastStandings')
-  updated_descr = update_reddit_descr(updated_descr, west_standings, 'WestStandings')
-  updated_descr = update_reddit_descr(updated_descr, roster, 'Roster')
-
-  if updated_descr != descr:
-    logger.info('Updating reddit settings.')
-    subreddit.wiki['config/sidebar'].edit(updated_descr)
+  return reddit.subreddit(subreddit_name).mod.settings()['description']
+
+
+def build_sections(
+    logger, now, player_index, roster, teams, schedule, nba_standings):
+  """Builds the text of every section in SECTIONS from raw NBA Data API
+  responses and returns a list of (marker, text) tuples."""
+  refresh = SectionRefresh(SECTIONS, dict(), now)
+  refresh.responses.update(
+      player_index=player_index, roster=roster, teams=teams, schedule=schedule,
+      standings=nba_standings)
+  return refresh.build(logger)
+
+
+def update_sidebar(
+    logger, now, reddit, subreddit_name, sections, state=None, descr=None):
+  """Replaces the text between each section's markers in the sidebar and saves
+  it if anything changed. descr is the sidebar if it was already read on this
+  run."""
+  hashes = SidebarState.hash_sections(sections)
+  if descr is None:
+    if state is not None and state.is_current(hashes, now):
+      logger.info('No changes since the sidebar was last read.')
+      return
+    descr = _read_sidebar(logger, reddit, subreddit_name)
+  document = SidebarDocument(
+      descr, [s.name for s in SECTIONS] + [marker for marker, _ in sections])
+  updated_descr, changed = document.splice(dict(sections))
+
+  if changed:
+    logger.info(f'Updating reddit settings. Changed: {", ".join(changed)}.')
+    reddit.subreddit(subreddit_name).wiki['config/sidebar'].edit(updated_descr)
   else:
     logger.info('No changes.')
 
+  if state is not None:
+    state.remember(hashes, now, document.names)
   logger.info('All done.')
 
 
@@ -201,6 +496,9 @@ if __name__ == "__main__":
   reddit = praw.Reddit(username)
 
   try:
-    execute(logger, datetime.now(UTC), reddit, subreddit_name)
+    nba_service = NbaService(logger, store=ResponseStore())
+    state = SidebarState(DEFAULT_STATE_PATH)
+    execute(
+        logger, datetime.now(UTC), reddit, subreddit_name, nba_service, state)
   except:
     logger.error(traceback.format_exc())
@@ -3,10 +3,14 @@ Verifies that the sidebarbot correctly updates the sidebar text by mocking
 calls to the Reddit and NBA Data APIs.
 """
 
-from datetime import datetime
+from datetime import datetime, timedelta
 from services import nba_service_test
+from services.fake_nba_service import FakeNbaService
+from services.standings_table import EAST
+from sidebar_sections import SidebarData
 from unittest.mock import MagicMock, patch
 
+import asyncio
 import logging.config
 import sidebarbot
 import unittest
@@ -151,7 +155,7 @@ class SidebarBotTest(unittest.TestCase):
     self.logger = logging.getLogger(__name__)
 
   @patch('praw.Reddit')
-  @patch('requests.get', side_effect=nba_service_test.mocked_requests_get)
+  @patch('requests.Session.get', side_effect=nba_service_test.mocked_requests_get)
   def test_execute_newChanges_updatesDescription(self, mock_get, mock_praw):
     # Expect it to lookup the initial description from the reddit API.
     mock_mod = MagicMock()
@@ -171,7 +175,30 @@ class SidebarBotTest(unittest.TestCase):
     mock_wiki.edit.assert_called_with(EXPECTED_UPDATED_DESCR)
 
   @patch('praw.Reddit')
-  @patch('requests.get', side_effect=nba_service_test.mocked_requests_get)
+  @patch('requests.Session.get', side_effect=nba_service_test.mocked_requests_get)
+  def test_executeAsync_newChanges_updatesDescription(self, mock_get, mock_praw):
+    mock_mod = MagicMock()
+    mock_mod.settings.return_value = {'description': INITIAL_DESCR}
+    mock_wiki = MagicMock(['edit'])
+    mock_subreddit = MagicMock(mod=mock_mod, wiki={'config/sidebar': mock_wiki})
+    mock_reddit = MagicMock(['subreddit'])
+    mock_reddit.subreddit.return_value = mock_subreddit
+    mock_praw.return_value = mock_reddit
+    now = datetime(2020, 12, 29, 17, 12, 52, 305157, sidebarbot.UTC)
+
+    # Execute.
+    asyncio.run(
+        sidebarbot.execute_async(self.logger, now, mock_reddit, 'subredditName'))
+
+    # Verify.
+    # The current year, plus one request for each dependency of the sections
+    # in the sidebar. It has no playoff odds, so the league schedule isn't
+    # looked up.
+    self.assertEqual(mock_get.call_count, 6)
+    mock_wiki.edit.assert_called_with(EXPECTED_UPDATED_DESCR)
+
+  @patch('praw.Reddit')
+  @patch('requests.Session.get', side_effect=nba_service_test.mocked_requests_get)
   def test_execute_noChanges_doesNotUpdateDescrip(self, mock_get, mock_praw):
     # Expect it to lookup the initial description from the reddit API.
     mock_mod = MagicMock()
@@ -190,7 +217,7 @@ class SidebarBotTest(unittest.TestCase):
     mock_mod.update.assert_not_called()
 
   @patch('praw.Reddit')
-  @patch('requests.get', side_effect=nba_service_test.mocked_requests_get)
+  @patch('requests.Session.get', side_effect=nba_service_test.mocked_requests_get)
   def test_execute_tankChanges_updatesDescription(self, mock_get, mock_praw):
     # Expect it to lookup the initial description from the reddit API.
     mock_mod = MagicMock()
@@ -225,7 +252,7 @@ class SidebarBotTest(unittest.TestCase):
 [](#EndTankStandings)""")
 
   @patch('praw.Reddit')
-  @patch('requests.get', side_effect=nba_service_test.mocked_requests_get)
+  @patch('requests.Session.get', side_effect=nba_service_test.mocked_requests_get)
   def test_execute_scheduleWithYesterdayTomorrow(self, mock_get, mock_praw):
     # Expect it to lookup the initial description from the reddit API.
     mock_mod = MagicMock()
@@ -260,6 +287,190 @@ Jan 08|[](/r/thunder)|Home|7:30 PM
 
 [](#EndSchedule)""")
 
+  @patch('praw.Reddit')
+  @patch('requests.Session.get', side_effect=nba_service_test.mocked_requests_get)
+  def test_execute_withState_skipsRedditWhenNothingChanged(
+      self, mock_get, mock_praw):
+    mock_mod = MagicMock()
+    mock_mod.settings.return_value = {'description': INITIAL_DESCR}
+    mock_wiki = MagicMock(['edit'])
+    mock_subreddit = MagicMock(mod=mock_mod, wiki={'config/sidebar': mock_wiki})
+    mock_reddit = MagicMock(['subreddit'])
+    mock_reddit.subreddit.return_value = mock_subreddit
+    mock_praw.return_value = mock_reddit
+    now = datetime(2020, 12, 29, 17, 12, 52, 305157, sidebarbot.UTC)
+    state = sidebarbot.SidebarState()
+
+    # The first run has to read and write the sidebar.
+    sidebarbot.execute(
+        self.logger, now, mock_reddit, 'subredditName', state=state)
+    mock_mod.settings.assert_called_once()
+    mock_wiki.edit.assert_called_once_with(EXPECTED_UPDATED_DESCR)
+
+    # Nothing changed a minute later.
+    sidebarbot.execute(
+        self.logger,
+        now + timedelta(minutes=1),
+        mock_reddit,
+        'subredditName',
+        state=state)
+    mock_mod.settings.assert_called_once()
+    mock_wiki.edit.assert_called_once()
+
+    # The sidebar is eventually read again in case a moderator edited it.
+    mock_mod.settings.return_value = {'description': EXPECTED_UPDATED_DESCR}
+    sidebarbot.execute(
+        self.logger,
+        now + sidebarbot.SETTINGS_REREAD_INTERVAL,
+        mock_reddit,
+        'subredditName',
+        state=state)
+    self.assertEqual(mock_mod.settings.call_count, 2)
+    mock_wiki.edit.assert_called_once()
+
+  @patch('praw.Reddit')
+  def test_execute_withState_onlyRebuildsStaleSections(self, mock_praw):
+    mock_mod = MagicMock()
+    mock_mod.settings.return_value = {'description': INITIAL_DESCR}
+    mock_wiki = MagicMock(['edit'])
+    mock_subreddit = MagicMock(mod=mock_mod, wiki={'config/sidebar': mock_wiki})
+    mock_reddit = MagicMock(['subreddit'])
+    mock_reddit.subreddit.return_value = mock_subreddit
+    mock_praw.return_value = mock_reddit
+    nba_service = MagicMock(wraps=FakeNbaService())
+    now = datetime(2020, 12, 29, 17, 12, 52, 305157, sidebarbot.UTC)
+    state = sidebarbot.SidebarState()
+
+    sidebarbot.execute(
+        self.logger, now, mock_reddit, 'subredditName', nba_service, state)
+    sidebarbot.execute(
+        self.logger,
+        now + timedelta(minutes=1),
+        mock_reddit,
+        'subredditName',
+        nba_service,
+        state)
+
+    # The roster is reused, so the players feed and roster are only looked up
+    # once. The schedule and standings are looked up on every run.
+    self.assertEqual(nba_service.player_index.call_count, 1)
+    self.assertEqual(nba_service.roster.call_count, 1)
+    self.assertEqual(nba_service.schedule.call_count, 2)
+    self.assertEqual(nba_service.conference_standings.call_count, 2)
+    mock_wiki.edit.assert_called_once_with(EXPECTED_UPDATED_DESCR)
+
+    # The roster is rebuilt eventually.
+    sidebarbot.execute(
+        self.logger,
+        now + timedelta(hours=6),
+        mock_reddit,
+        'subredditName',
+        nba_service,
+        state)
+    self.assertEqual(nba_service.player_index.call_count, 2)
+
+  @patch('praw.Reddit')
+  @patch('requests.Session.get', side_effect=nba_service_test.mocked_requests_get)
+  def test_execute_registeredSection_updatesItsMarkers(self, mock_get, mock_praw):
+    mock_mod = MagicMock()
+    mock_mod.settings.return_value = {
+      'description': EXPECTED_UPDATED_DESCR + '[](#StartCustom)[](#EndCustom)'
+    }
+    mock_wiki = MagicMock(['edit'])
+    mock_subreddit = MagicMock(mod=mock_mod, wiki={'config/sidebar': mock_wiki})
+    mock_reddit = MagicMock(['subreddit'])
+    mock_reddit.subreddit.return_value = mock_subreddit
+    mock_praw.return_value = mock_reddit
+    now = datetime(2020, 12, 29, 17, 12, 52, 305157, sidebarbot.UTC)
+
+    sections = list(sidebarbot.SECTIONS)
+    sidebarbot.register_section(
+        'Custom', lambda logger, data: f'{len(data.teams)} teams')
+    try:
+      sidebarbot.execute(self.logger, now, mock_reddit, 'subredditName')
+    finally:
+      sidebarbot.SECTIONS[:] = sections
+
+    mock_wiki.edit.assert_called_with(
+        EXPECTED_UPDATED_DESCR + '[](#StartCustom)\n\n42 teams\n\n[](#EndCustom)')
+
+  @patch('praw.Reddit')
+  def test_execute_onlyBuildsTheSectionsInTheSidebar(self, mock_praw):
+    mock_mod = MagicMock()
+    mock_mod.settings.return_value = {
+      'description': '[](#StartSchedule)[](#EndSchedule)'}
+    mock_wiki = MagicMock(['edit'])
+    mock_subreddit = MagicMock(mod=mock_mod, wiki={'config/sidebar': mock_wiki})
+    mock_reddit = MagicMock(['subreddit'])
+    mock_reddit.subreddit.return_value = mock_subreddit
+    mock_praw.return_value = mock_reddit
+    nba_service = MagicMock(wraps=FakeNbaService())
+    now = datetime(2020, 12, 29, 17, 12, 52, 305157, sidebarbot.UTC)
+    state = sidebarbot.SidebarState()
+
+    for minutes in (0, 1):
+      sidebarbot.execute(
+          self.logger,
+          now + timedelta(minutes=minutes),
+          mock_reddit,
+          'subredditName',
+          nba_service,
+          state)
+
+    # The sidebar is read once, before anything is looked up.
+    mock_mod.settings.assert_called_once()
+    self.assertEqual(state.names, ['Schedule'])
+    self.assertEqual(nba_service.schedule.call_count, 2)
+    nba_service.conference_standings.assert_not_called()
+    nba_service.remaining_games.assert_not_called()
+    nba_service.player_index.assert_not_called()
+    mock_wiki.edit.assert_called_once()
+
+  @patch('praw.Reddit')
+  def test_executeAsync_failedOddsLookup_stillUpdatesTheOtherSections(
+      self, mock_praw):
+    mock_mod = MagicMock()
+    mock_mod.settings.return_value = {
+      'description': INITIAL_DESCR + '[](#StartLotteryOdds)[](#EndLotteryOdds)'}
+    mock_wiki = MagicMock(['edit'])
+    mock_subreddit = MagicMock(mod=mock_mod, wiki={'config/sidebar': mock_wiki})
+    mock_reddit = MagicMock(['subreddit'])
+    mock_reddit.subreddit.return_value = mock_subreddit
+    mock_praw.return_value = mock_reddit
+    nba_service = MagicMock(wraps=FakeNbaService())
+    nba_service.remaining_games.side_effect = Exception('down')
+    now = datetime(2020, 12, 29, 17, 12, 52, 305157, sidebarbot.UTC)
+
+    logger = MagicMock()
+    asyncio.run(sidebarbot.execute_async(
+        logger, now, mock_reddit, 'subredditName', nba_service))
+
+    # The lottery odds are left alone.
+    mock_wiki.edit.assert_called_once_with(
+        EXPECTED_UPDATED_DESCR + '[](#StartLotteryOdds)[](#EndLotteryOdds)')
+    logger.error.assert_called_once()
+
+  def test_buildOddsSections(self):
+    nba_service = FakeNbaService()
+    data = SidebarData(
+        datetime(2020, 12, 29, 17, 0, 0, 0, sidebarbot.UTC),
+        {'remaining_games': nba_service.remaining_games('2020'),
+         'standings': nba_service.conference_standings(),
+         'teams': nba_service.teams('2020')})
+
+    east = sidebarbot.build_playoff_odds(
+        data.standings_table, data.playoff_odds, EAST, data.teams).split('\n')
+    self.assertEqual(len(east), 2 + 15)
+    self.assertEqual(east[2], '[](/r/torontoraptors)|Raptors|100%|-|-')
+    self.assertEqual(east[-1], '[](/r/AtlantaHawks)|Hawks|-|-|100%')
+
+    lottery = sidebarbot.build_lottery_odds(
+        data.standings_table, data.playoff_odds, data.teams).split('\n')
+    self.assertEqual(lottery[0], ' | |' + '|'.join(map(str, range(1, 15))))
+    # The Grizzlies have the worst record and the Knicks have a few games left.
+    self.assertTrue(lottery[2].startswith('[](/r/memphisgrizzlies)|Grizzlies|'))
+    self.assertTrue(any(row.startswith('[](/r/NYKnicks)|') for row in lottery))
+
 
 if __name__ == '__main__':
   unittest.main()
@@ -0,0 +1,68 @@
+"""
+Remembers which reddit submission the game thread bot posted for each game so
+that it can fetch its own thread directly instead of scanning the newest posts
+in the subreddit on every run.
+
+The records are kept in a small JSON file (by default under ~/.redditbot) so
+they survive restarts, which matters when the bot runs as a cron job.
+"""
+
+import json
+import os
+import threading
+
+DEFAULT_PATH = os.path.join(os.path.expanduser('~'), '.redditbot', 'threads.json')
+
+# Only the most recent records are kept. Older games are never looked up again.
+MAX_RECORDS = 50
+
+
+class ThreadRegistry:
+
+  def __init__(self, path=DEFAULT_PATH):
+    self.path = path
+    self._lock = threading.Lock()
+    self._records = self._load()
+
+  def get(self, game_id, kind):
+    """Returns the submission id recorded for a game and type of thread (i.e.,
+    game thread or post game thread) or None."""
+    with self._lock:
+      return self._records.get(self._key(game_id, kind))
+
+  def put(self, game_id, kind, submission_id):
+    with self._lock:
+      key = self._key(game_id, kind)
+      if self._records.get(key) == submission_id:
+        return
+      # Re-insert so that the newest record is always last.
+      self._records.pop(key, None)
+      self._records[key] = submission_id
+      while len(self._records) > MAX_RECORDS:
+        del self._records[next(iter(self._records))]
+      self._save()
+
+  def remove(self, game_id, kind):
+    with self._lock:
+      if self._records.pop(self._key(game_id, kind), None) is not None:
+        self._save()
+
+  @staticmethod
+  def _key(game_id, kind):
+    return f'{game_id}/{kind}'
+
+  def _load(self):
+    try:
+      with open(self.path, 'r') as f:
+        return json.loads(f.read())
+    except (OSError, ValueError):
+      return dict()
+
+  def _save(self):
+    directory = os.path.dirname(self.path)
+    if directory:
+      os.makedirs(directory, exist_ok=True)
+    tmp_path = f'{self.path}.{os.getpid()}.tmp'
+    with open(tmp_path, 'w') as f:
+      f.write(json.dumps(self._records))
+    os.replace(tmp_path, self.path)
@@ -0,0 +1,42 @@
+from thread_registry import MAX_RECORDS, ThreadRegistry
+
+import os.path
+import tempfile
+import unittest
+
+
+class ThreadRegistryTest(unittest.TestCase):
+
+  def setUp(self):
+    self.tmpdir = tempfile.TemporaryDirectory()
+    self.path = os.path.join(self.tmpdir.name, 'threads.json')
+
+  def tearDown(self):
+    self.tmpdir.cleanup()
+
+  def test_get_nothingRecorded(self):
+    self.assertIsNone(ThreadRegistry(self.path).get('0022000046', 'game'))
+
+  def test_put_persists(self):
+    ThreadRegistry(self.path).put('0022000046', 'game', 'abc123')
+    registry = ThreadRegistry(self.path)
+    self.assertEqual(registry.get('0022000046', 'game'), 'abc123')
+    self.assertIsNone(registry.get('0022000046', 'post_game'))
+
+  def test_remove(self):
+    registry = ThreadRegistry(self.path)
+    registry.put('0022000046', 'game', 'abc123')
+    registry.remove('0022000046', 'game')
+    self.assertIsNone(ThreadRegistry(self.path).get('0022000046', 'game'))
+
+  def test_put_keepsOnlyNewestRecords(self):
+    registry = ThreadRegistry(self.path)
+    for i in range(MAX_RECORDS + 1):
+      registry.put(str(i), 'game', f'id{i}')
+    registry = ThreadRegistry(self.path)
+    self.assertIsNone(registry.get('0', 'game'))
+    self.assertEqual(registry.get(str(MAX_RECORDS), 'game'), f'id{MAX_RECORDS}')
+
+
+if __name__ == '__main__':
+  unittest.main()